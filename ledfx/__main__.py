@@ -17,6 +17,7 @@ For non-development purposes run:
 
 import argparse
 import logging
+import multiprocessing
 import os
 import subprocess
 import sys
@@ -127,7 +128,6 @@ def setup_logging(loglevel, config_dir):
     logging.addLevelName(PYUPDATERLOGLEVEL, "Updater")
 
     # Suppress some of the overly verbose logs
-    logging.getLogger("sacn").setLevel(logging.WARNING)
     logging.getLogger("aiohttp.access").setLevel(logging.WARNING)
     logging.getLogger("pyupdater").setLevel(logging.WARNING)
     logging.getLogger("zeroconf").setLevel(logging.WARNING)
@@ -305,6 +305,8 @@ def update_ledfx(icon=None):
 
 def main():
     """Main entry point allowing external calls"""
+    # render pool workers are spawned, which re-runs main in frozen builds
+    multiprocessing.freeze_support()
     args = parse_args()
     config_helpers.ensure_config_directory(args.config)
     setup_logging(args.loglevel, config_dir=args.config)
@@ -0,0 +1,41 @@
+import logging
+
+from aiohttp import web
+
+from ledfx.api import RestEndpoint
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AudioStatsEndpoint(RestEndpoint):
+    """REST end-point for statistics of the audio analysis worker"""
+
+    ENDPOINT_PATH = "/api/audio/stats"
+
+    def _audio_stats(self):
+        return getattr(self._ledfx.audio, "audio_stats", None)
+
+    async def get(self) -> web.Response:
+        """
+        Get the audio analysis statistics. Includes the blocks dropped
+        because analysis fell behind the input, the gaps in the input, and
+        a histogram of the time taken to analyse each block.
+        """
+        stats = self._audio_stats()
+        response = {
+            "status": "success",
+            "active": stats is not None and self._ledfx.audio._is_activated,
+        }
+        if stats is not None:
+            response.update(stats.to_dict())
+        return web.json_response(data=response, status=200)
+
+    async def delete(self) -> web.Response:
+        """
+        Reset the audio analysis statistics
+        """
+        stats = self._audio_stats()
+        if stats is not None:
+            stats.reset()
+        response = {"status": "success"}
+        return web.json_response(data=response, status=200)
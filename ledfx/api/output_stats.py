@@ -0,0 +1,33 @@
+import logging
+
+from aiohttp import web
+
+from ledfx.api import RestEndpoint
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class OutputStatsEndpoint(RestEndpoint):
+    """REST end-point for statistics of the shared UDP output"""
+
+    ENDPOINT_PATH = "/api/output/stats"
+
+    async def get(self) -> web.Response:
+        """
+        Get the UDP output statistics. Includes the packets waiting to be
+        sent, and the packets and bytes sent, dropped and refused by the
+        network for each device.
+        """
+        response = {
+            "status": "success",
+            **self._ledfx.udp_output.stats(),
+        }
+        return web.json_response(data=response, status=200)
+
+    async def delete(self) -> web.Response:
+        """
+        Reset the UDP output statistics
+        """
+        self._ledfx.udp_output.reset_stats()
+        response = {"status": "success"}
+        return web.json_response(data=response, status=200)
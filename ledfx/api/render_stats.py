@@ -0,0 +1,34 @@
+import logging
+
+from aiohttp import web
+
+from ledfx.api import RestEndpoint
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RenderStatsEndpoint(RestEndpoint):
+    """REST end-point for frame pacing statistics of the render scheduler"""
+
+    ENDPOINT_PATH = "/api/render/stats"
+
+    async def get(self) -> web.Response:
+        """
+        Get the frame pacing statistics of all scheduled virtuals.
+        Includes dispatch jitter and render time histograms, overruns and
+        the measured fps of each virtual, and the effects that share frames.
+        """
+        response = {
+            "status": "success",
+            **self._ledfx.render_scheduler.stats(),
+            "render_groups": self._ledfx.effects.render_groups,
+        }
+        return web.json_response(data=response, status=200)
+
+    async def delete(self) -> web.Response:
+        """
+        Reset the frame pacing statistics
+        """
+        self._ledfx.render_scheduler.reset_stats()
+        response = {"status": "success"}
+        return web.json_response(data=response, status=200)
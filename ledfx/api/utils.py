@@ -17,7 +17,18 @@ TYPES_MAP = {
 }
 
 PERMITTED_KEYS = {
-    "audio": ("min_volume", "audio_device", "delay_ms"),
+    "audio": (
+        "min_volume",
+        "audio_device",
+        "delay_ms",
+        "native_rate",
+        "file_input",
+        "file_loop",
+        "file_realtime",
+        "raw_sample_rate",
+        "raw_format",
+        "raw_channels",
+    ),
     "melbanks": (
         "max_frequencies",
         "min_frequency",
@@ -32,6 +43,10 @@ PERMITTED_KEYS = {
         "visualisation_fps",
         "visualisation_maxlen",
         "global_transitions",
+        "render_threads",
+        "frame_pacing",
+        "render_processes",
+        "pixel_dtype",
     ),
 }
 
@@ -169,6 +169,7 @@ class VirtualEndpoint(RestEndpoint):
             return web.json_response(data=response, status=404)
 
         virtual.clear_effect()
+        virtual.clear_layers()
         device_id = virtual.is_device
         device = self._ledfx.devices.get(device_id)
         if device is not None:
@@ -0,0 +1,185 @@
+import logging
+from json import JSONDecodeError
+
+import voluptuous as vol
+from aiohttp import web
+
+from ledfx.api import RestEndpoint
+from ledfx.config import save_config
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class LayersEndpoint(RestEndpoint):
+    """REST end-point for the effect layers of a virtual"""
+
+    ENDPOINT_PATH = "/api/virtuals/{virtual_id}/layers"
+
+    def _save_layers(self, virtual):
+        for item in self._ledfx.config["virtuals"]:
+            if item["id"] == virtual.id:
+                item["layers"] = [
+                    {
+                        "type": layer.effect.type,
+                        "config": layer.effect.config,
+                        "layer": layer.config,
+                    }
+                    for layer in virtual.layers
+                ]
+                break
+
+        save_config(
+            config=self._ledfx.config,
+            config_dir=self._ledfx.config_dir,
+        )
+
+    def _layers_response(self, virtual):
+        response = {
+            "status": "success",
+            "layers": [layer.to_dict() for layer in virtual.layers],
+        }
+        return web.json_response(data=response, status=200)
+
+    def _layer_index(self, virtual, data):
+        """Returns the validated layer index of a request, or None"""
+        index = data.get("index")
+        if not isinstance(index, int) or not (
+            0 <= index < len(virtual.layers)
+        ):
+            return None
+        return index
+
+    async def get(self, virtual_id) -> web.Response:
+        """
+        Get the layers of a virtual, bottom first
+        """
+        virtual = self._ledfx.virtuals.get(virtual_id)
+        if virtual is None:
+            response = {
+                "status": "failed",
+                "reason": f"Virtual with ID {virtual_id} not found",
+            }
+            return web.json_response(data=response, status=404)
+
+        return self._layers_response(virtual)
+
+    async def post(self, virtual_id, request) -> web.Response:
+        """
+        Add an effect as a new top layer of a virtual
+        """
+        virtual = self._ledfx.virtuals.get(virtual_id)
+        if virtual is None:
+            response = {
+                "status": "failed",
+                "reason": f"Virtual with ID {virtual_id} not found",
+            }
+            return web.json_response(data=response, status=404)
+
+        try:
+            data = await request.json()
+        except JSONDecodeError:
+            response = {
+                "status": "failed",
+                "reason": "JSON Decoding failed",
+            }
+            return web.json_response(data=response, status=400)
+        effect_type = data.get("type")
+        if effect_type is None:
+            response = {
+                "status": "failed",
+                "reason": 'Required attribute "type" was not provided',
+            }
+            return web.json_response(data=response, status=400)
+
+        try:
+            effect = self._ledfx.effects.create(
+                ledfx=self._ledfx,
+                type=effect_type,
+                config=data.get("config") or {},
+            )
+            virtual.add_layer(effect, data.get("layer") or {})
+        except (ValueError, vol.Invalid) as msg:
+            response = {
+                "status": "failed",
+                "payload": {"type": "warning", "reason": str(msg)},
+            }
+            return web.json_response(data=response, status=202)
+
+        self._save_layers(virtual)
+        return self._layers_response(virtual)
+
+    async def put(self, virtual_id, request) -> web.Response:
+        """
+        Update the effect config and/or layer settings of a layer
+        """
+        virtual = self._ledfx.virtuals.get(virtual_id)
+        if virtual is None:
+            response = {
+                "status": "failed",
+                "reason": f"Virtual with ID {virtual_id} not found",
+            }
+            return web.json_response(data=response, status=404)
+
+        try:
+            data = await request.json()
+        except JSONDecodeError:
+            response = {
+                "status": "failed",
+                "reason": "JSON Decoding failed",
+            }
+            return web.json_response(data=response, status=400)
+        index = self._layer_index(virtual, data)
+        if index is None:
+            response = {
+                "status": "failed",
+                "reason": 'Required attribute "index" was invalid',
+            }
+            return web.json_response(data=response, status=400)
+
+        try:
+            if data.get("config"):
+                virtual.layers[index].effect.update_config(data["config"])
+            if data.get("layer"):
+                virtual.update_layer(index, data["layer"])
+        except vol.Invalid as msg:
+            response = {
+                "status": "failed",
+                "payload": {"type": "warning", "reason": str(msg)},
+            }
+            return web.json_response(data=response, status=202)
+
+        self._save_layers(virtual)
+        return self._layers_response(virtual)
+
+    async def delete(self, virtual_id, request) -> web.Response:
+        """
+        Remove a layer from a virtual, or all of its layers if no index is
+        given
+        """
+        virtual = self._ledfx.virtuals.get(virtual_id)
+        if virtual is None:
+            response = {
+                "status": "failed",
+                "reason": f"Virtual with ID {virtual_id} not found",
+            }
+            return web.json_response(data=response, status=404)
+
+        try:
+            data = await request.json()
+        except JSONDecodeError:
+            data = {}
+
+        if data.get("index") is None:
+            virtual.clear_layers()
+        else:
+            index = self._layer_index(virtual, data)
+            if index is None:
+                response = {
+                    "status": "failed",
+                    "reason": 'Required attribute "index" was invalid',
+                }
+                return web.json_response(data=response, status=400)
+            virtual.remove_layer(index)
+
+        self._save_layers(virtual)
+        return self._layers_response(virtual)
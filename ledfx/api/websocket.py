@@ -1,7 +1,9 @@
 import asyncio
 import json
 import logging
+import struct
 from concurrent import futures
+from types import SimpleNamespace
 
 import numpy as np
 import voluptuous as vol
@@ -40,6 +42,32 @@ def websocket_handler(type):
 WEB_AUDIO_CLIENTS = set()
 ACTIVE_AUDIO_STREAM = None
 
+# Web audio can also be sent as binary frames, which are a fraction of the
+# size of JSON and much faster to decode. Each frame is this header, then
+# the client id as UTF-8, then the samples as little endian PCM:
+#   version (u8), sample format (u8), client id length (u16),
+#   sample rate (u32), sequence number (u32)
+WEB_AUDIO_HEADER = struct.Struct("<BBHII")
+WEB_AUDIO_VERSION = 1
+
+# Sample formats of binary web audio, as numpy dtypes and their full scale
+WEB_AUDIO_FORMATS = {
+    0: (np.dtype("<f4"), 1),
+    1: (np.dtype("<i2"), 2**15),
+}
+
+# Sample rates of binary web audio that are accepted, in Hz
+WEB_AUDIO_MIN_RATE = 8000
+WEB_AUDIO_MAX_RATE = 384000
+
+# Frames this far behind the last one are late or duplicated and dropped.
+# Further behind than this, the client has restarted its sequence.
+WEB_AUDIO_LATE_FRAMES = 32
+
+# Passed to the audio callback when frames were lost before a frame, like
+# the status flags of a sounddevice stream
+WEB_AUDIO_LOST_STATUS = SimpleNamespace(input_overflow=True)
+
 
 class WebsocketEndpoint(RestEndpoint):
 
@@ -180,7 +208,7 @@ class WebsocketConnection:
         )
 
         try:
-            message = await socket.receive_json()
+            message = await self._receive_json()
             while message:
                 message = BASE_MESSAGE_SCHEMA(message)
 
@@ -192,7 +220,7 @@ class WebsocketConnection:
                     )
                     self.send_error(message["id"], "Unknown command type.")
 
-                message = await socket.receive_json()
+                message = await self._receive_json()
 
         except (vol.Invalid, ValueError):
             _LOGGER.info("Invalid message format.")
@@ -227,6 +255,72 @@ class WebsocketConnection:
 
         return socket
 
+    async def _receive_json(self):
+        """
+        Receives the next JSON message, handing any binary web audio frames
+        that arrive before it to audio_stream_binary_handler
+        """
+        msg = await self._socket.receive()
+        while msg.type == web.WSMsgType.BINARY:
+            self.audio_stream_binary_handler(msg.data)
+            msg = await self._socket.receive()
+
+        if msg.type != web.WSMsgType.TEXT:
+            raise TypeError(f"Received message {msg.type} is not str")
+        return json.loads(msg.data)
+
+    def audio_stream_binary_handler(self, data):
+        """Decodes a binary web audio frame, see WEB_AUDIO_HEADER"""
+        try:
+            (
+                version,
+                sample_format,
+                client_length,
+                sample_rate,
+                sequence,
+            ) = WEB_AUDIO_HEADER.unpack_from(data)
+        except struct.error:
+            _LOGGER.warning("Discarded truncated web audio frame")
+            return
+
+        if version != WEB_AUDIO_VERSION or (
+            sample_format not in WEB_AUDIO_FORMATS
+        ):
+            _LOGGER.warning(
+                f"Discarded web audio frame with version {version} and sample format {sample_format}"
+            )
+            return
+
+        if not WEB_AUDIO_MIN_RATE <= sample_rate <= WEB_AUDIO_MAX_RATE:
+            _LOGGER.warning(
+                f"Discarded web audio frame with sample rate {sample_rate} Hz"
+            )
+            return
+
+        if not ACTIVE_AUDIO_STREAM:
+            return
+
+        offset = WEB_AUDIO_HEADER.size + client_length
+        if offset > len(data):
+            _LOGGER.warning("Discarded truncated web audio frame")
+            return
+        client = data[WEB_AUDIO_HEADER.size : offset].decode(
+            "utf-8", "replace"
+        )
+        if ACTIVE_AUDIO_STREAM.client != client:
+            return
+
+        dtype, scale = WEB_AUDIO_FORMATS[sample_format]
+        samples = np.frombuffer(
+            data,
+            dtype=dtype,
+            count=(len(data) - offset) // dtype.itemsize,
+            offset=offset,
+        )
+        if scale != 1:
+            samples = samples.astype(np.float32) / scale
+        ACTIVE_AUDIO_STREAM.receive(samples, sample_rate, sequence)
+
     @websocket_handler("subscribe_event")
     def subscribe_event_handler(self, message):
         def notify_websocket(event):
@@ -302,11 +396,21 @@ class WebsocketConnection:
 
 
 class WebAudioStream:
-    def __init__(self, client: str, callback: callable):
+    def __init__(
+        self, client: str, callback: callable, blocks_per_second: int
+    ):
         self.client = client
         self.callback = callback
         self._data = None
         self._active = False
+        self.samplerate = None
+        self.blocksize = None
+        self._blocks_per_second = blocks_per_second
+        self._block = None
+        self._filled = 0
+        self._sequence = None
+        self.lost_frames = 0
+        self.late_frames = 0
 
     def start(self):
         self._active = True
@@ -329,3 +433,58 @@ class WebAudioStream:
                 self.callback(self._data, None, None, None)
             except Exception as e:
                 _LOGGER.error(e)
+
+    def receive(self, samples, sample_rate, sequence):
+        """
+        Passes on a binary frame of audio, using its sequence number to
+        count frames lost on the way and drop any that arrive late.
+
+        Clients send frames of whatever length suits them, so the samples
+        are passed on in blocks of one analysis frame at the frame's rate,
+        like the blocks of a sounddevice stream.
+        """
+        if not self._active:
+            return
+        # a rate too low for a single sample per block would never fill one
+        if int(sample_rate / self._blocks_per_second) < 1:
+            _LOGGER.warning(
+                f"Discarded web audio frame with sample rate {sample_rate} Hz"
+            )
+            return
+
+        status = None
+        if self._sequence is not None:
+            # the distance from the last frame, allowing for wrap around
+            step = (sequence - self._sequence) % 2**32
+            if step >= 2**31:
+                step -= 2**32
+            if -WEB_AUDIO_LATE_FRAMES < step <= 0:
+                self.late_frames += 1
+                return
+            if step > 1:
+                self.lost_frames += step - 1
+                status = WEB_AUDIO_LOST_STATUS
+        self._sequence = sequence
+
+        if sample_rate != self.samplerate:
+            _LOGGER.info(
+                f"Web audio from client {self.client} at {sample_rate} Hz"
+            )
+            self.samplerate = sample_rate
+            self.blocksize = int(sample_rate / self._blocks_per_second)
+            self._block = np.zeros(self.blocksize, dtype=np.float32)
+            self._filled = 0
+
+        while len(samples):
+            count = min(len(samples), self.blocksize - self._filled)
+            self._block[self._filled : self._filled + count] = samples[:count]
+            self._filled += count
+            samples = samples[count:]
+            if self._filled < self.blocksize:
+                break
+            self._filled = 0
+            try:
+                self.callback(self._block, self.blocksize, None, status)
+            except Exception as e:
+                _LOGGER.error(e)
+            status = None
@@ -0,0 +1,291 @@
+"""
+Benchmarks the audio analysis pipeline offline, by pushing recorded or
+synthetic audio through AudioAnalysisSource as fast as it can be analysed,
+and reports the latency of each stage and the throughput. To run it:
+
+    python -m ledfx.benchmark
+    python -m ledfx.benchmark --input song.wav --fft-sizes 2048 4096
+
+Every stage runs on every frame, so the timings are for the worst case of
+all the audio features being used by an effect.
+"""
+
+import argparse
+import json
+import logging
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from ledfx.effects.audio import AudioAnalysisSource
+from ledfx.effects.audio_file import open_audio_file
+from ledfx.effects.melbank import FFT_SIZE, MAX_FREQ, MEL_MAX_FREQS
+
+# Sample rate of the synthetic audio, the most common rate of audio devices
+SYNTHETIC_RATE = 44100
+
+# Seconds of audio analysed before the timings start, so that the filters,
+# caches and the tempo detection have settled
+WARMUP_SECONDS = 1
+
+# The stages of the pipeline, in order, and the attribute of
+# AudioAnalysisSource that runs each of them
+STAGES = {
+    "resample": "resampler",
+    "pre_emphasis": "pre_emphasis",
+    "pvoc": "_phase_vocoder",
+    "melbanks": "melbanks",
+    "pitch": "pitch",
+    "onset": "onset",
+    "bpm_beat_now": "bpm_beat_now",
+    "volume_beat_now": "volume_beat_now",
+    "freq_power": "freq_power",
+}
+
+
+class _StageTimer:
+    """Times each call to a stage, and forwards everything else to it"""
+
+    def __init__(self, stage, timings):
+        self._stage = stage
+        self._timings = timings
+
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._stage(*args, **kwargs)
+        finally:
+            self._timings.append(time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self._stage, name)
+
+
+def synthetic_audio(duration, rate=SYNTHETIC_RATE):
+    """
+    Returns duration seconds of a 120 BPM kick drum over a chord and some
+    noise, so that every stage has something to detect
+    """
+    rng = np.random.default_rng(0)
+    t = np.arange(int(duration * rate)) / rate
+    beat = t % 0.5
+    kick = np.sin(2 * np.pi * 55 * beat) * np.exp(-beat * 20)
+    chord = sum(
+        np.sin(2 * np.pi * freq * t) for freq in (220.0, 277.18, 329.63)
+    )
+    noise = rng.normal(scale=0.05, size=len(t))
+    audio = 0.5 * kick + 0.1 * chord + noise
+    return audio.astype(np.float32), rate
+
+
+def recorded_audio(path, duration):
+    """Returns up to duration seconds of audio from a file"""
+    reader = open_audio_file(path, SYNTHETIC_RATE, "s16le", 1)
+    try:
+        audio = reader.read(int(duration * reader.samplerate))
+    finally:
+        reader.close()
+    if len(audio) == 0:
+        raise ValueError(f"No audio in {path}")
+    return audio.astype(np.float32), reader.samplerate
+
+
+def melbank_frequencies(count):
+    """
+    Returns the max frequencies for count melbanks: the default melbanks,
+    with the highest resolution one split into several from 10000Hz up
+    """
+    return [
+        *MEL_MAX_FREQS[:2],
+        *np.linspace(MAX_FREQ, 10000, count - 2)[::-1].astype(int).tolist(),
+    ]
+
+
+def _summarise(timings):
+    if not timings:
+        return None
+    timings = np.array(timings) * 1000
+    return {
+        "mean_ms": float(np.mean(timings)),
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p95_ms": float(np.percentile(timings, 95)),
+        "p99_ms": float(np.percentile(timings, 99)),
+        "max_ms": float(np.max(timings)),
+    }
+
+
+def run_benchmark(
+    audio, rate, fft_size, sample_rate, max_frequencies, native_rate=False
+):
+    """
+    Analyses audio at rate Hz with the given config, and returns the latency
+    distribution of each stage and of the whole pipeline, in milliseconds
+    """
+    ledfx = SimpleNamespace(
+        events=SimpleNamespace(add_listener=lambda *args: None),
+        config={"melbanks": {"max_frequencies": max_frequencies}},
+        dev_enabled=lambda: False,
+    )
+    source = AudioAnalysisSource(
+        ledfx,
+        {
+            "fft_size": fft_size,
+            "sample_rate": sample_rate,
+            # analyse every frame in full, however quiet the audio is
+            "min_volume": 0,
+            "native_rate": native_rate,
+        },
+    )
+    source.prepare_analysis(rate)
+
+    timings = {stage: [] for stage in STAGES}
+    for stage, attribute in STAGES.items():
+        if stage == "resample":
+            source.resampler = SimpleNamespace(
+                process=_StageTimer(source.resampler.process, timings[stage])
+            )
+        else:
+            setattr(
+                source,
+                attribute,
+                _StageTimer(getattr(source, attribute), timings[stage]),
+            )
+    # the live features are looked up when they are added, so after timing
+    source.add_features(
+        [stage for stage in STAGES if stage in AudioAnalysisSource.FEATURES]
+    )
+
+    block_size = int(rate / sample_rate)
+    blocks = [
+        audio[i : i + block_size]
+        for i in range(0, len(audio) - block_size + 1, block_size)
+    ]
+    warmup = min(WARMUP_SECONDS * sample_rate, len(blocks) // 2)
+    for block in blocks[:warmup]:
+        source._process_audio_sample(block)
+    for stage_timings in timings.values():
+        stage_timings.clear()
+
+    total = []
+    for block in blocks[warmup:]:
+        start = time.perf_counter()
+        source._process_audio_sample(block)
+        total.append(time.perf_counter() - start)
+
+    return {
+        "fft_size": fft_size,
+        "sample_rate": sample_rate,
+        "analysis_rate": source.analysis_rate,
+        "max_frequencies": [int(freq) for freq in max_frequencies],
+        "frames": len(total),
+        "frames_per_second": len(total) / sum(total) if total else 0.0,
+        "stages": {
+            stage: _summarise(stage_timings)
+            for stage, stage_timings in timings.items()
+        },
+        "total": _summarise(total),
+    }
+
+
+def print_result(result):
+    print(
+        f"fft_size {result['fft_size']}, sample_rate {result['sample_rate']}, "
+        f"{len(result['max_frequencies'])} melbanks, "
+        f"analysed at {result['analysis_rate']} Hz: "
+        f"{result['frames_per_second']:.0f} frames/s"
+    )
+    print(
+        f"  {'stage':<16}{'mean':>8}{'p50':>8}{'p95':>8}{'p99':>8}"
+        f"{'max':>8}  (ms)"
+    )
+    rows = {**result["stages"], "total": result["total"]}
+    for stage, summary in rows.items():
+        if summary is None:
+            print(f"  {stage:<16}{'n/a':>8}")
+            continue
+        print(
+            f"  {stage:<16}"
+            + "".join(
+                f"{summary[key]:>8.3f}"
+                for key in ("mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms")
+            )
+        )
+    print()
+
+
+def melbank_count(value):
+    count = int(value)
+    if count < 3:
+        raise argparse.ArgumentTypeError("at least 3 melbanks are needed")
+    return count
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the LedFx audio analysis pipeline"
+    )
+    parser.add_argument(
+        "--input",
+        help="WAV or FLAC file to analyse, instead of synthetic audio",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=10,
+        help="Seconds of audio to analyse for each config",
+    )
+    parser.add_argument(
+        "--fft-sizes", type=int, nargs="+", default=[2048, FFT_SIZE, 8192]
+    )
+    parser.add_argument(
+        "--sample-rates", type=int, nargs="+", default=[30, 60, 120]
+    )
+    parser.add_argument(
+        "--melbanks", type=melbank_count, nargs="+", default=[3, 4, 5]
+    )
+    parser.add_argument(
+        "--native-rate",
+        action="store_true",
+        help="Analyse the audio at its own rate instead of resampling it",
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="Print the results as JSON"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    # the first resampled frame is always short and discarded, which isn't
+    # worth a warning for every config
+    logging.getLogger("ledfx.effects.audio").setLevel(logging.ERROR)
+
+    if args.input:
+        audio, rate = recorded_audio(args.input, args.duration)
+    else:
+        audio, rate = synthetic_audio(args.duration)
+
+    results = []
+    for fft_size in args.fft_sizes:
+        for sample_rate in args.sample_rates:
+            for count in args.melbanks:
+                result = run_benchmark(
+                    audio,
+                    rate,
+                    fft_size,
+                    sample_rate,
+                    melbank_frequencies(count),
+                    args.native_rate,
+                )
+                results.append(result)
+                if not args.json:
+                    print_result(result)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -91,6 +91,26 @@ CORE_CONFIG_SCHEMA = vol.Schema(
         vol.Optional("visualisation_maxlen", default=50): vol.All(
             int, vol.Range(5, 300)
         ),
+        vol.Optional(
+            "render_threads",
+            description="Number of worker threads used to render virtuals",
+            default=4,
+        ): vol.All(int, vol.Range(1, 32)),
+        vol.Optional(
+            "frame_pacing",
+            description="Skip: drop frames that miss their deadline. Catch up: render missed frames as soon as possible",
+            default="skip",
+        ): vol.In(["skip", "catch_up"]),
+        vol.Optional(
+            "render_processes",
+            description="Number of worker processes to render effects in. 0 renders effects in the main process",
+            default=0,
+        ): vol.All(int, vol.Range(0, 32)),
+        vol.Optional(
+            "pixel_dtype",
+            description="Numeric type that effects render pixels in. float32 halves frame memory",
+            default="float64",
+        ): vol.In(["float64", "float32"]),
         vol.Optional(
             "global_transitions",
             description="Changes to any virtual's transitions apply to all other virtuals",
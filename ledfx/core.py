@@ -6,6 +6,8 @@ import warnings
 import webbrowser
 from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
+
 from ledfx.color import (
     LEDFX_COLORS,
     LEDFX_GRADIENTS,
@@ -27,7 +29,10 @@ from ledfx.events import (
 from ledfx.http_manager import HttpServer
 from ledfx.integrations import Integrations
 from ledfx.presets import ledfx_presets
+from ledfx.render_pool import RenderPool
 from ledfx.scenes import Scenes
+from ledfx.scheduler import RenderScheduler
+from ledfx.udp_output import UDPOutput
 from ledfx.utils import (
     RollingQueueHandler,
     UserDefaultCollection,
@@ -156,6 +161,15 @@ class LedFxCore:
 
             pixels = event.pixels
 
+            if not is_device:
+                # virtual frames are flushed through device maps that apply
+                # the center offset, so apply it here for the preview
+                virtual = self.virtuals.get(vis_id)
+                if virtual is not None and virtual.config["center_offset"]:
+                    pixels = np.roll(
+                        pixels, virtual.config["center_offset"], axis=0
+                    )
+
             if len(pixels) > max_len:
                 pixels = interpolate_pixels(pixels, max_len)
 
@@ -229,6 +243,10 @@ class LedFxCore:
             self.icon.notify(
                 "Started in background.\nUse the tray icon to open.", "LedFx"
             )
+        self.render_scheduler = RenderScheduler(
+            self, self.config["render_threads"], self.config["frame_pacing"]
+        )
+        self.udp_output = UDPOutput(self)
         self.devices = Devices(self)
         self.effects = Effects(self)
         self.virtuals = Virtuals(self)
@@ -250,6 +268,11 @@ class LedFxCore:
             validate_gradient,
             parse_gradient,
         )
+        self.render_pool = (
+            RenderPool(self, self.config["render_processes"])
+            if self.config["render_processes"]
+            else None
+        )
 
         # TODO: Deferr
         self.devices.create_from_config(self.config["devices"])
@@ -1,6 +1,5 @@
 import asyncio
 import logging
-import socket
 from abc import abstractmethod
 from functools import cached_property, partial
 
@@ -19,6 +18,7 @@ from ledfx.utils import (
     RegistryLoader,
     async_fire_and_forget,
     generate_id,
+    get_pixel_dtype,
     resolve_destination,
 )
 
@@ -72,6 +72,7 @@ class Device(BaseRegistry):
         self._config = config
         self._segments = []
         self._pixels = None
+        self._quantised = None
         self._silence_start = None
         self._device_type = ""
         self._online = True
@@ -135,12 +136,18 @@ class Device(BaseRegistry):
             )
             return
 
-        for pixels, start, end in data:
-            self._pixels[start : end + 1] = pixels
+        # data is compiled by the virtual, see Virtual._device_maps
+        for pixels, frame_index, device_index in data:
+            if device_index is None and pixels.dtype == self._pixels.dtype:
+                np.take(pixels, frame_index, axis=0, out=self._pixels)
+            elif device_index is None:
+                self._pixels[:] = pixels[frame_index]
+            else:
+                self._pixels[device_index] = pixels[frame_index]
 
         if virtual_id == self.priority_virtual.id:
             frame = self.assemble_frame()
-            self.flush(frame)
+            self.flush(self.quantise(frame))
             # _LOGGER.debug(f"Device {self.id} flushed by Virtual {virtual_id}")
 
             self._ledfx.events.fire_event(DeviceUpdateEvent(self.id, frame))
@@ -149,20 +156,33 @@ class Device(BaseRegistry):
         """
         Assembles the frame to be flushed. Currently this will just return
         the active channels pixels, but will eventually handle things like
-        merging multiple segments segments and alpha blending channels
+        merging multiple segments segments and alpha blending channels.
+        The center offset is already applied by the virtuals' device maps.
         """
-        frame = self._pixels
+        return self._pixels
 
-        if self._config["center_offset"]:
-            frame = np.roll(frame, self._config["center_offset"], axis=0)
-        return frame
+    def quantise(self, frame):
+        """
+        Quantises a frame to the uint8 values sent to the device. This is the
+        only cast a frame goes through on its way out, the result is written
+        into a buffer that is reused on every flush and is what every
+        protocol encoder reads from.
+        """
+        if self._quantised is None or self._quantised.shape != frame.shape:
+            self._quantised = np.zeros(frame.shape, dtype=np.uint8)
+        np.copyto(self._quantised, frame, casting="unsafe")
+        return self._quantised
 
     def activate(self):
-        self._pixels = np.zeros((self.pixel_count, 3))
+        self._pixels = np.zeros(
+            (self.pixel_count, 3), dtype=get_pixel_dtype(self._ledfx)
+        )
+        self._quantised = np.zeros((self.pixel_count, 3), dtype=np.uint8)
         self._active = True
 
     def deactivate(self):
         self._pixels = None
+        self._quantised = None
         self._active = False
         # self.flush(np.zeros((self.pixel_count, 3)))
 
@@ -383,7 +403,8 @@ class UDPDevice(NetworkedDevice):
     )
 
     def activate(self):
-        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # packets are sent by the shared UDP output, off the render threads
+        self._sock = self._ledfx.udp_output.sender(self.id)
         _LOGGER.debug(
             f"{self._device_type} sender for {self._config['name']} started."
         )
@@ -576,8 +597,7 @@ class Devices(RegistryLoader):
 
             # determine sync mode
             # UDP < 480
-            # DDP or E131 depending on: ledfx's configured preferred mode first, else the device's mode
-            # ARTNET can do one
+            # DDP, E131 or ARTNET depending on: ledfx's configured preferred mode first, else the device's mode
 
             if wled_count > 480:
                 await wled.get_sync_settings()
@@ -594,14 +614,14 @@ class Devices(RegistryLoader):
                 #     await wled.get_sync_settings()
                 #     sync_mode = wled.get_sync_mode()
 
-            if sync_mode == "ARTNET":
-                msg = f"Cannot add WLED device at {resolved_dest}. Unsupported mode: 'ARTNET', and too many pixels for UDP sync (>480)"
-                _LOGGER.warning(msg)
-                raise ValueError(msg)
-
             wled_config["sync_mode"] = sync_mode
             device_config.update(wled_config)
 
+        # Devices saved before OPC could use TCP default to UDP, which is
+        # what they were sent over, but new ones use TCP like most servers
+        if device_type == "open_pixel_control":
+            device_config.setdefault("protocol", "TCP")
+
         device_id = generate_id(device_config["name"])
 
         # Create the device
@@ -0,0 +1,187 @@
+import logging
+import struct
+
+import numpy as np
+import voluptuous as vol
+
+from ledfx.devices import NetworkedDevice
+
+_LOGGER = logging.getLogger(__name__)
+
+ARTNET_PORT = 6454
+
+
+class ArtNetDevice(NetworkedDevice):
+    """Art-Net device support"""
+
+    CONFIG_SCHEMA = vol.Schema(
+        {
+            vol.Required(
+                "pixel_count",
+                description="Number of individual pixels",
+                default=1,
+            ): vol.All(int, vol.Range(min=1)),
+            vol.Optional(
+                "universe",
+                description="Art-Net universe (port-address) for the device",
+                default=0,
+            ): vol.All(int, vol.Range(min=0, max=32767)),
+            vol.Optional(
+                "universe_size",
+                description="Size of each DMX universe",
+                default=510,
+            ): vol.All(int, vol.Range(min=1, max=512)),
+            vol.Optional(
+                "channel_offset",
+                description="Channel offset within the DMX universe",
+                default=0,
+            ): vol.All(int, vol.Range(min=0)),
+            vol.Optional(
+                "port",
+                description="Port for the Art-Net device",
+                default=ARTNET_PORT,
+            ): vol.All(int, vol.Range(min=1, max=65535)),
+            vol.Optional(
+                "sync",
+                description="Send ArtSync after each frame, so that all universes update at once",
+                default=False,
+            ): bool,
+        }
+    )
+
+    def __init__(self, ledfx, config):
+        super().__init__(ledfx, config)
+        self._device_type = "ArtNet"
+        self._config["channel_count"] = self._config["pixel_count"] * 3
+
+        span = (
+            self._config["channel_offset"] + self._config["channel_count"] - 1
+        )
+        self._config["universe_end"] = self._config["universe"] + (
+            span // self._config["universe_size"]
+        )
+
+        self._encoder = None
+
+    def activate(self):
+        universes = range(
+            self._config["universe"], self._config["universe_end"] + 1
+        )
+        _LOGGER.info(
+            f"Art-Net activating universes {universes.start} to {universes.stop - 1}"
+        )
+        self._encoder = ArtNetEncoder(
+            universes,
+            self._config["universe_size"],
+            self._config["channel_offset"],
+            self._config["channel_count"],
+        )
+        # packets are sent by the shared UDP output, off the render threads
+        self._sock = self._ledfx.udp_output.sender(self.id)
+
+        _LOGGER.info(f"Art-Net sender for {self.config['name']} started.")
+        super().activate()
+
+    def deactivate(self):
+        super().deactivate()
+
+        if not self._encoder:
+            return
+
+        # Art-Net has no way to end a stream, so leave the device blank
+        self.flush(np.zeros(self._config["channel_count"], dtype=np.uint8))
+
+        self._encoder = None
+        self._sock = None
+        _LOGGER.info(f"Art-Net sender for {self.config['name']} stopped.")
+
+    def flush(self, data):
+        """Flush the data to all the Art-Net universes of the device"""
+
+        if not self._encoder:
+            self.activate()
+        if data.size != self._config["channel_count"]:
+            raise Exception(
+                f"Invalid buffer size. {data.size} != {self._config['channel_count']}"
+            )
+
+        destination = self.destination
+        if destination is None:
+            return
+        address = (destination, self._config["port"])
+        for packet in self._encoder.encode(data):
+            self._sock.sendto(packet, address)
+        if self._config["sync"]:
+            self._sock.sendto(ArtNetEncoder.SYNC_PACKET, address)
+
+
+class ArtNetEncoder:
+    """
+    Encodes the universes of a device into Art-Net ArtDmx packets.
+
+    The packets are laid out back to back in a buffer that is reused for
+    every frame, with their headers written once up front. Where each
+    channel of a frame goes in the buffer is worked out once as well, so
+    encoding a frame is a single scatter of the channel data into every
+    universe at once. The sequence number is then set, and the packets are
+    returned as slices of a single bytes copy of the buffer, so they can be
+    sent after the next frame has been encoded.
+    """
+
+    ID = b"Art-Net\x00"
+    PROTOCOL_VERSION = 14
+    OP_DMX = 0x5000
+    OP_SYNC = 0x5200
+
+    SEQUENCE = 12
+    HEADER_LEN = 18
+    PACKET_LEN = HEADER_LEN + 512
+
+    SYNC_PACKET = (
+        ID + struct.pack("<H", OP_SYNC) + struct.pack("!HBB", 14, 0, 0)
+    )
+
+    def __init__(
+        self, universes, universe_size, channel_offset, channel_count
+    ):
+        self.channel_count = channel_count
+        self._sequence = 0
+        self._buffer = np.zeros(
+            (len(universes), self.PACKET_LEN), dtype=np.uint8
+        )
+
+        # the index in the buffer of each channel of a frame
+        channels = np.arange(channel_count) + channel_offset
+        universe, slot = np.divmod(channels, universe_size)
+        self._channel_map = universe * self.PACKET_LEN + self.HEADER_LEN + slot
+
+        self._slices = []
+        for i, port_address in enumerate(universes):
+            used = slot[universe == i]
+            # ArtDmx data must have an even length of at least 2
+            length = int(used.max()) + 1 if used.size else 2
+            length += length % 2
+            struct.pack_into("<8sH", self._buffer[i], 0, self.ID, self.OP_DMX)
+            struct.pack_into(
+                "!HBBBBH",
+                self._buffer[i],
+                10,
+                self.PROTOCOL_VERSION,
+                0,
+                0,
+                port_address & 0xFF,
+                port_address >> 8,
+                length,
+            )
+            start = i * self.PACKET_LEN
+            self._slices.append(slice(start, start + self.HEADER_LEN + length))
+
+    def encode(self, data):
+        """Returns the ArtDmx packets of a frame of uint8 data"""
+        # sequence numbers run from 1 to 255, 0 turns off reordering
+        self._sequence = self._sequence % 255 + 1
+        self._buffer[:, self.SEQUENCE] = self._sequence
+        self._buffer.reshape(-1)[self._channel_map] = data.reshape(-1)
+
+        frame = memoryview(self._buffer.tobytes())
+        return [frame[packet] for packet in self._slices]
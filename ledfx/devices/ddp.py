@@ -51,58 +51,80 @@ class DDPDevice(UDPDevice):
         super().__init__(ledfx, config)
         self._device_type = "DDP"
         self.frame_count = 0
+        self._encoder = None
 
     def flush(self, data):
         self.frame_count += 1
+        if self._encoder is None or self._encoder.channel_count != data.size:
+            self._encoder = DDPEncoder(data.size)
         try:
-            DDPDevice.send_out(
-                self._sock,
-                self.destination,
-                self._config["port"],
-                data,
-                self.frame_count,
-            )
+            address = (self.destination, self._config["port"])
+            for packet in self._encoder.encode(
+                data, self.frame_count % 15 + 1
+            ):
+                self._sock.sendto(packet, address)
         except AttributeError:
             self.activate()
 
-    @staticmethod
-    def send_out(sock, dest, port, data, frame_count):
-        sequence = frame_count % 15 + 1
-        byteData = data.astype(np.uint8).flatten().tobytes()
-        packets, remainder = divmod(len(byteData), DDPDevice.MAX_DATALEN)
-        if remainder == 0:
-            packets -= 1  # divmod returns 1 when len(byteData) fits evenly in DDPDevice.MAX_DATALEN
-
-        for i in range(packets + 1):
-            data_start = i * DDPDevice.MAX_DATALEN
-            data_end = data_start + DDPDevice.MAX_DATALEN
-            DDPDevice.send_packet(
-                sock, dest, port, sequence, i, byteData[data_start:data_end]
-            )
 
-    @staticmethod
-    def send_packet(sock, dest, port, sequence, packet_count, data):
-        bytes_length = len(data)
-        udpData = bytearray()
-        header = struct.pack(
-            "!BBBBLH",
-            DDPDevice.VER1
-            | (
-                DDPDevice.VER1
-                if (bytes_length == DDPDevice.MAX_DATALEN)
-                else DDPDevice.PUSH
-            ),
-            sequence,
-            DDPDevice.DATATYPE,
-            DDPDevice.SOURCE,
-            packet_count * DDPDevice.MAX_DATALEN,
-            bytes_length,
-        )
+class DDPEncoder:
+    """
+    Encodes frames of a fixed number of channels into DDP packets.
+
+    The packets are laid out back to back in a buffer that is reused for
+    every frame, with their headers written once up front. Encoding a frame
+    copies the pixels into the payload of each packet and sets the sequence
+    number, then returns the packets as slices of a single bytes copy of the
+    buffer, so they can be sent after the next frame has been encoded.
+    """
+
+    PACKET_LEN = DDPDevice.HEADER_LEN + DDPDevice.MAX_DATALEN
 
-        udpData.extend(header)
-        udpData.extend(data)
+    def __init__(self, channel_count):
+        self.channel_count = channel_count
+        packets = max(1, -(-channel_count // DDPDevice.MAX_DATALEN))
+        self._full_packets, self._remainder = divmod(
+            channel_count, DDPDevice.MAX_DATALEN
+        )
+        self._buffer = np.zeros((packets, self.PACKET_LEN), dtype=np.uint8)
+        self._payload = self._buffer[:, DDPDevice.HEADER_LEN :]
+
+        self._slices = []
+        for i in range(packets):
+            length = min(
+                DDPDevice.MAX_DATALEN,
+                channel_count - i * DDPDevice.MAX_DATALEN,
+            )
+            # only the last packet of a frame tells the device to show it
+            flags = DDPDevice.VER1
+            if i == packets - 1:
+                flags |= DDPDevice.PUSH
+            struct.pack_into(
+                "!BBBBLH",
+                self._buffer[i],
+                0,
+                flags,
+                0,
+                DDPDevice.DATATYPE,
+                DDPDevice.SOURCE,
+                i * DDPDevice.MAX_DATALEN,
+                length,
+            )
+            start = i * self.PACKET_LEN
+            self._slices.append(
+                slice(start, start + DDPDevice.HEADER_LEN + length)
+            )
 
-        sock.sendto(
-            bytes(udpData),
-            (dest, port),
+    def encode(self, data, sequence):
+        """Returns the packets of a frame of uint8 data"""
+        data = data.reshape(-1)
+        full = self._full_packets * DDPDevice.MAX_DATALEN
+        self._payload[: self._full_packets] = data[:full].reshape(
+            -1, DDPDevice.MAX_DATALEN
         )
+        if self._remainder:
+            self._payload[self._full_packets, : self._remainder] = data[full:]
+        self._buffer[:, 1] = sequence
+
+        frame = memoryview(self._buffer.tobytes())
+        return [frame[packet] for packet in self._slices]
@@ -1,13 +1,16 @@
 import logging
+import struct
+import uuid
 
 import numpy as np
-import sacn
 import voluptuous as vol
 
 from ledfx.devices import NetworkedDevice
 
 _LOGGER = logging.getLogger(__name__)
 
+E131_PORT = 5568
+
 
 class E131Device(NetworkedDevice):
     """E1.31 device support"""
@@ -28,7 +31,12 @@ class E131Device(NetworkedDevice):
                 "universe_size",
                 description="Size of each DMX universe",
                 default=510,
-            ): vol.All(int, vol.Range(min=1)),
+            ): vol.All(
+                int,
+                vol.Range(min=1),
+                # configs saved before the limit held universes of any size
+                vol.Clamp(max=512),
+            ),
             vol.Optional(
                 "channel_offset",
                 description="Channel offset within the DMX universe",
@@ -39,6 +47,11 @@ class E131Device(NetworkedDevice):
                 description="Priority given to the sACN packets for this device",
                 default=100,
             ): vol.All(int, vol.Range(min=0, max=200)),
+            vol.Optional(
+                "sync_universe",
+                description="Universe for synchronization packets, so that all universes update at once. 0 disables synchronization",
+                default=0,
+            ): vol.All(int, vol.Range(min=0, max=63999)),
         }
     )
 
@@ -61,41 +74,43 @@ class E131Device(NetworkedDevice):
         span = (
             self._config["channel_offset"] + self._config["channel_count"] - 1
         )
-        self._config["universe_end"] = self._config["universe"] + int(
-            span / self._config["universe_size"]
+        self._config["universe_end"] = self._config["universe"] + (
+            span // self._config["universe_size"]
         )
-        if span % self._config["universe_size"] == 0:
-            self._config["universe_end"] -= 1
 
-        self._sacn = None
+        self._encoder = None
 
     def activate(self):
-        if self._config["ip_address"].lower() == "multicast":
-            multicast = True
-        else:
-            multicast = False
+        multicast = self._config["ip_address"].lower() == "multicast"
 
-        if self._sacn:
-            _LOGGER.warning(
-                f"sACN sender already started for device {self.id}"
-            )
-
-        # Configure sACN and start the dedicated thread to flush the buffer
-        # Some variables are immutable and must be called here
-        self._sacn = sacn.sACNsender(source_name=self.name)
-
-        for universe in range(
+        universes = range(
             self._config["universe"], self._config["universe_end"] + 1
-        ):
-            _LOGGER.info(f"sACN activating universe {universe}")
-            self._sacn.activate_output(universe)
-            self._sacn[universe].priority = self._config["packet_priority"]
-            self._sacn[universe].multicast = multicast
-            if not multicast:
-                self._sacn[universe].destination = self.destination
-
-        self._sacn.start()
-        self._sacn.manual_flush = True
+        )
+        _LOGGER.info(
+            f"sACN activating universes {universes.start} to {universes.stop - 1}"
+        )
+        self._encoder = E131Encoder(
+            universes,
+            self._config["universe_size"],
+            self._config["channel_offset"],
+            self._config["channel_count"],
+            self.name,
+            self._config["packet_priority"],
+            self._config["sync_universe"],
+        )
+        if multicast:
+            self._addresses = [
+                (E131Encoder.multicast_address(universe), E131_PORT)
+                for universe in universes
+            ]
+            self._sync_address = (
+                E131Encoder.multicast_address(self._config["sync_universe"]),
+                E131_PORT,
+            )
+        else:
+            self._addresses = None
+        # packets are sent by the shared UDP output, off the render threads
+        self._sock = self._ledfx.udp_output.sender(self.id)
 
         _LOGGER.info(f"sACN sender for {self.config['name']} started.")
         super().activate()
@@ -103,79 +118,196 @@ class E131Device(NetworkedDevice):
     def deactivate(self):
         super().deactivate()
 
-        if not self._sacn:
-            # He's dead, Jim
-            # _LOGGER.warning("sACN sender not started.")
+        if not self._encoder:
             return
 
+        # blank the device, then tell it the stream has ended so that it
+        # doesn't wait for the data loss timeout before moving on
         self.flush(np.zeros(self._config["channel_count"]))
+        for _ in range(3):
+            self._send(self._encoder.encode(terminated=True))
 
-        self._sacn.stop()
-        self._sacn = None
+        self._encoder = None
+        self._sock = None
         _LOGGER.info(f"sACN sender for {self.config['name']} stopped.")
 
     def flush(self, data):
         """Flush the data to all the E1.31 channels account for spanning universes"""
 
-        if not self._sacn:
+        if not self._encoder:
             self.activate()
         if data.size != self._config["channel_count"]:
             raise Exception(
                 f"Invalid buffer size. {data.size} != {self._config['channel_count']}"
             )
 
-        data = data.flatten()
-        current_index = 0
-        for universe in range(
-            self._config["universe"], self._config["universe_end"] + 1
-        ):
-            # Calculate offset into the provide input buffer for the channel. There are some
-            # cleaner ways this can be done... This is just the quick and dirty
-            universe_start = (
-                universe - self._config["universe"]
-            ) * self._config["universe_size"]
-            universe_end = (
-                universe - self._config["universe"] + 1
-            ) * self._config["universe_size"]
-
-            dmx_start = (
-                max(universe_start, self._config["channel_offset"])
-                % self._config["universe_size"]
-            )
-            dmx_end = (
-                min(
-                    universe_end,
-                    self._config["channel_offset"]
-                    + self._config["channel_count"],
+        self._encoder.write(data)
+        self._send(self._encoder.encode())
+
+    def _send(self, packets):
+        if self._addresses is None:
+            destination = self.destination
+            if destination is None:
+                return
+            addresses = [(destination, E131_PORT)] * len(packets)
+            sync_address = addresses[0]
+        else:
+            addresses = self._addresses
+            sync_address = self._sync_address
+
+        for packet, address in zip(packets, addresses):
+            self._sock.sendto(packet, address)
+        if self._encoder.sync_universe:
+            self._sock.sendto(self._encoder.encode_sync(), sync_address)
+
+
+class E131Encoder:
+    """
+    Encodes the universes of a device into E1.31 (sACN) data packets.
+
+    There is one preallocated packet per universe, with every field but the
+    DMX data and the sequence number filled in up front. Channel data is
+    written with one slice assignment per universe straight into the DMX
+    property values of the packets, and each frame is returned as slices of
+    a single bytes copy of the packets, so they can be sent after the next
+    frame has been written.
+
+    With a sync universe, the data packets ask receivers to hold them until
+    a synchronization packet from encode_sync, so that every universe
+    changes at the same time.
+    """
+
+    # Offsets of the fields that change, and of the DMX data
+    SEQUENCE = 111
+    OPTIONS = 112
+    DMX_START = 126
+    PACKET_LEN = DMX_START + 512
+
+    STREAM_TERMINATED = 0x40
+
+    def __init__(
+        self,
+        universes,
+        universe_size,
+        channel_offset,
+        channel_count,
+        source_name,
+        priority=100,
+        sync_universe=0,
+        cid=None,
+    ):
+        self.sync_universe = sync_universe
+        self._cid = cid or uuid.uuid4().bytes
+        self._sequence = 0
+        self._sync_sequence = 0
+        self._packets = np.zeros(
+            (len(universes), self.PACKET_LEN), dtype=np.uint8
+        )
+        for packet, universe in zip(self._packets, universes):
+            self._pack_data_header(packet, universe, source_name, priority)
+        self._dmx = self._packets[:, self.DMX_START :]
+
+        # where each universe's part of the channel data goes: length
+        # channels from data_start go in the universe's slots from slot_start
+        self._segments = []
+        for i in range(len(universes)):
+            start = max(i * universe_size, channel_offset)
+            end = min((i + 1) * universe_size, channel_offset + channel_count)
+            if end > start:
+                self._segments.append(
+                    (
+                        i,
+                        start - i * universe_size,
+                        start - channel_offset,
+                        end - start,
+                    )
                 )
-                % self._config["universe_size"]
-            )
-            if dmx_end == 0:
-                dmx_end = self._config["universe_size"]
-
-            input_start = current_index
-            input_end = current_index + dmx_end - dmx_start
-            current_index = input_end
-
-            dmx_data = np.array(self._sacn[universe].dmx_data)
-            dmx_data[dmx_start:dmx_end] = data[input_start:input_end]
-
-            # Because the sACN library checks for data to be of int type, we have to
-            # convert the numpy array into a python list of ints using tolist()
-            self._sacn[universe].dmx_data = dmx_data.clip(0, 255).tolist()
-            # output = dmx_data.clip(0, 255)
-
-        # This is ugly - weird race condition where loading on startup from a device with a short ID results in the sACN thread trying to send data to NoneType.
-        # No idea how to properly handle it - but this stops it breaking and seems to be reasonably resilient. Sorry to whoever stumbles onto it. -Shaun
-        try:
-            self._sacn.flush()
-        except AttributeError:
-            _LOGGER.info(
-                "Attempted to start sACN thread prior to sACN activating. Restarting sACN thread."
-            )
-            self.activate()
 
-        # # Hack up a manual flush of the E1.31 data vs having a background thread
-        # if self._sacn._output_thread._socket:
-        #     for output in list(self._sacn._output_thread._outputs.values()):
-        #         self._sacn._output_thread.send_out(output)
+        self._sync_packet = bytearray(49)
+        if sync_universe:
+            self._pack_sync_header(self._sync_packet, sync_universe)
+
+    @staticmethod
+    def multicast_address(universe):
+        return f"239.255.{universe >> 8}.{universe & 0xFF}"
+
+    def _pack_root_layer(self, packet, length, vector):
+        struct.pack_into(
+            "!HH12sHL16s",
+            packet,
+            0,
+            0x0010,
+            0x0000,
+            b"ASC-E1.17",
+            0x7000 | (length - 16),
+            vector,
+            self._cid,
+        )
+
+    def _pack_data_header(self, packet, universe, source_name, priority):
+        self._pack_root_layer(packet, self.PACKET_LEN, 0x00000004)
+        struct.pack_into(
+            "!HL64sBHBBH",
+            packet,
+            38,
+            0x7000 | (self.PACKET_LEN - 38),
+            0x00000002,
+            source_name.encode("utf-8")[:63],
+            priority,
+            self.sync_universe,
+            0,
+            0,
+            universe,
+        )
+        struct.pack_into(
+            "!HBBHHHB",
+            packet,
+            115,
+            0x7000 | (self.PACKET_LEN - 115),
+            0x02,
+            0xA1,
+            0x0000,
+            0x0001,
+            513,
+            0x00,
+        )
+
+    def _pack_sync_header(self, packet, sync_universe):
+        self._pack_root_layer(packet, len(packet), 0x00000008)
+        struct.pack_into(
+            "!HLBHH",
+            packet,
+            38,
+            0x7000 | (len(packet) - 38),
+            0x00000001,
+            0,
+            sync_universe,
+            0,
+        )
+
+    def write(self, data):
+        """Writes the channel data of a frame into the packets"""
+        data = data.reshape(-1)
+        for universe, slot_start, data_start, length in self._segments:
+            self._dmx[universe, slot_start : slot_start + length] = data[
+                data_start : data_start + length
+            ]
+
+    def encode(self, terminated=False):
+        """Returns the data packets of the next frame, one per universe"""
+        self._sequence = (self._sequence + 1) % 256
+        self._packets[:, self.SEQUENCE] = self._sequence
+        self._packets[:, self.OPTIONS] = (
+            self.STREAM_TERMINATED if terminated else 0
+        )
+        frame = memoryview(self._packets.tobytes())
+        return [
+            frame[start : start + self.PACKET_LEN]
+            for start in range(0, len(frame), self.PACKET_LEN)
+        ]
+
+    def encode_sync(self):
+        """Returns the synchronization packet of the next frame"""
+        self._sync_sequence = (self._sync_sequence + 1) % 256
+        self._sync_packet[44] = self._sync_sequence
+        return bytes(self._sync_packet)
@@ -1,13 +1,24 @@
 import logging
 import socket
 import struct
+import threading
 
+import numpy as np
 import voluptuous as vol
 
 from ledfx.devices import NetworkedDevice
 
 _LOGGER = logging.getLogger(__name__)
 
+# Seconds between attempts to connect to an OPC server, doubling after each
+# failed attempt up to the maximum
+RECONNECT_MIN_DELAY = 0.5
+RECONNECT_MAX_DELAY = 10
+
+# Seconds to wait for a connection, or for a frame to be taken by the server
+CONNECT_TIMEOUT = 2
+SEND_TIMEOUT = 1
+
 
 class OpenPixelControl(NetworkedDevice):
     """OpenPixelControl device support"""
@@ -24,11 +35,41 @@ class OpenPixelControl(NetworkedDevice):
                 description="Channel to send pixel data",
                 default=0,
             ): vol.All(int, vol.Range(min=0, max=255)),
+            vol.Optional(
+                "port",
+                description="Port of the OPC server",
+                default=7890,
+            ): vol.All(int, vol.Range(min=1, max=65535)),
+            vol.Optional(
+                "protocol",
+                description="Transport to the OPC server. Standard servers, such as fadecandy, use TCP",
+                default="UDP",
+            ): vol.In(["TCP", "UDP"]),
         }
     )
 
+    def __init__(self, ledfx, config):
+        super().__init__(ledfx, config)
+        self._encoder = None
+        self._connection = None
+        self._sock = None
+
     def activate(self):
-        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if self._connection is not None:
+            self._connection.stop()
+            self._connection = None
+
+        if self._config["protocol"] == "UDP":
+            self._sock = self._ledfx.udp_output.sender(self.id)
+        elif self._destination is not None:
+            # connecting, and sending over TCP, happens off the render
+            # threads, so a slow or missing server can't hold them up
+            self._connection = OPCConnection(
+                (self._destination, self._config["port"]),
+                self._ledfx.udp_output.device_stats(self.id),
+            )
+            self._connection.start()
+
         _LOGGER.info(
             f"Open Pixel Control sender for {self.config['name']} started."
         )
@@ -36,45 +77,156 @@ class OpenPixelControl(NetworkedDevice):
 
     def deactivate(self):
         super().deactivate()
+        if self._connection is not None:
+            self._connection.stop()
+            self._connection = None
         _LOGGER.info(
             f"Open Pixel Control sender for {self.config['name']} stopped."
         )
         self._sock = None
 
     def flush(self, data):
+        if self._encoder is None or self._encoder.channel_count != data.size:
+            self._encoder = OPCEncoder(self._config["channel"], data.size)
+        message = self._encoder.encode(data)
+
+        if self._connection is not None:
+            self._connection.send(message)
+            return
         try:
-            OpenPixelControl.send_out(
-                self,
-                self._sock,
-                self.destination,
-                7890,
-                data,
+            self._sock.sendto(
+                message, (self.destination, self._config["port"])
             )
         except AttributeError:
             self.activate()
 
-    @staticmethod
-    def send_out(
-        self,
-        sock,
-        dest,
-        port,
-        data,
-    ):
-        header = struct.pack(
-            ">BBH", self.config["channel"], 0, self.config["pixel_count"] * 3
+
+class OPCEncoder:
+    """
+    Encodes frames of a fixed number of channels into OPC set pixel colours
+    messages. The message is built in a buffer that is reused for every
+    frame, with its header written once up front.
+    """
+
+    HEADER_LEN = 4
+    SET_PIXEL_COLOURS = 0
+
+    def __init__(self, channel, channel_count):
+        self.channel_count = channel_count
+        self._buffer = np.zeros(
+            self.HEADER_LEN + channel_count, dtype=np.uint8
         )
-        pieces = [
-            struct.pack(
-                "BBB",
-                min(255, max(0, int(r))),
-                min(255, max(0, int(g))),
-                min(255, max(0, int(b))),
-            )
-            for r, g, b in data
-        ]
-        message = header + b"".join(pieces)
-        sock.sendto(
-            bytes(message),
-            (dest, port),
+        struct.pack_into(
+            ">BBH",
+            self._buffer,
+            0,
+            channel,
+            self.SET_PIXEL_COLOURS,
+            channel_count,
+        )
+        self._payload = self._buffer[self.HEADER_LEN :]
+
+    def encode(self, data):
+        """Returns the message for a frame of pixel data"""
+        data = data.reshape(-1)
+        if data.dtype != np.uint8:
+            data = np.clip(data, 0, 255)
+        np.copyto(self._payload, data, casting="unsafe")
+        return self._buffer.tobytes()
+
+
+class OPCConnection:
+    """
+    Sends frames to an OPC server over a persistent TCP connection, from a
+    thread of its own.
+
+    Only the newest frame is kept: one that hasn't been sent by the time
+    the next arrives is dropped, so a slow server shows the latest frame
+    rather than falling further and further behind. When the connection
+    can't be made or is lost, it is retried with an increasing delay.
+    """
+
+    def __init__(self, address, stats):
+        self._address = address
+        self._stats = stats
+        self._frame = None
+        self._sock = None
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"ledfx-opc-{self._address[0]}",
+            daemon=True,
         )
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self._thread.join(timeout=1)
+
+    def send(self, message):
+        with self._condition:
+            if self._frame is not None:
+                self._stats.dropped += 1
+            self._frame = message
+            self._condition.notify()
+
+    def _connect(self):
+        sock = socket.create_connection(self._address, timeout=CONNECT_TIMEOUT)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(SEND_TIMEOUT)
+        return sock
+
+    def _disconnect(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _run(self):
+        delay = RECONNECT_MIN_DELAY
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._frame is not None or not self._running
+                )
+                if not self._running:
+                    break
+                message = self._frame
+                self._frame = None
+
+            if self._sock is None:
+                try:
+                    self._sock = self._connect()
+                except OSError as e:
+                    self._stats.errors += 1
+                    _LOGGER.debug(
+                        f"Unable to connect to OPC server at {self._address}: {e}"
+                    )
+                    with self._condition:
+                        self._condition.wait_for(
+                            lambda: not self._running, timeout=delay
+                        )
+                    delay = min(delay * 2, RECONNECT_MAX_DELAY)
+                    continue
+                _LOGGER.info(f"Connected to OPC server at {self._address}")
+                delay = RECONNECT_MIN_DELAY
+
+            try:
+                self._sock.sendall(message)
+            except OSError as e:
+                self._stats.errors += 1
+                _LOGGER.warning(
+                    f"Lost connection to OPC server at {self._address}: {e}"
+                )
+                self._disconnect()
+                continue
+            self._stats.packets += 1
+            self._stats.bytes += len(message)
+
+        self._disconnect()
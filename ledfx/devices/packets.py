@@ -17,7 +17,7 @@ def build_warls_packet(data: np.ndarray, timeout: int, last_frame: np.array):
     """
     packet = bytearray([1, (timeout or 1)])
 
-    byteData = data.astype(np.dtype("B"))
+    byteData = np.asarray(data, dtype=np.uint8)
 
     if last_frame is None or data.shape != last_frame.shape:
         last_frame = np.full(data.shape, np.nan)
@@ -54,7 +54,7 @@ def build_drgb_packet(data: np.ndarray, timeout: int):
     """
     packet = bytearray([2, (timeout or 1)])
 
-    byteData = data.astype(np.dtype("B"))
+    byteData = np.asarray(data, dtype=np.uint8)
     packet.extend(byteData.flatten().tobytes())
     return packet
 
@@ -73,7 +73,7 @@ def build_drgbw_packet(data: np.ndarray, timeout: int):
     """
     packet = bytearray([3, (timeout or 1)])
 
-    byteData = data.astype(np.dtype("B"))
+    byteData = np.asarray(data, dtype=np.uint8)
     out = np.zeros((len(byteData), 4), dtype="B")
     out[:, :3] = byteData
     # 4th column is unusued white channel -> 0
@@ -102,7 +102,7 @@ def build_dnrgb_packet(
         [4, (timeout or 1), (led_start_index >> 8), (led_start_index & 0x00FF)]
     )  # high byte, then low byte
 
-    byteData = data.astype(np.dtype("B"))
+    byteData = np.asarray(data, dtype=np.uint8)
     packet.extend(byteData.flatten().tobytes())
     return packet
 
@@ -129,7 +129,8 @@ def build_adalight_packet(data: np.ndarray, color_order: str):
     )  # high byte, then low byte
     packet.extend([packet[3] ^ packet[4] ^ 0x55])  # checksum
 
-    byteData = data.astype(np.dtype("B"))
+    # copied, as the colour order is swapped in place
+    byteData = np.array(data, dtype=np.uint8)
     # if color_order == "RGB": pass
     if color_order == "GRB":
         byteData[:, [1, 0]] = byteData[:, [0, 1]]  # swap columns
@@ -180,6 +181,6 @@ def build_openrgb_packet(
 
     # body
     out = np.zeros((frame_size, 4), dtype="B")
-    out[:, 0:3] = data.astype(np.dtype("B"))
+    out[:, 0:3] = data
     packet.extend(out.flatten().tobytes())
     return packet
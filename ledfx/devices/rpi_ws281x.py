@@ -86,7 +86,7 @@ class RPI_WS281X(Device):
 
     def flush(self, data):
         """Flush LED data to the strip"""
-        byteData = data.astype(np.dtype("B"))
+        byteData = np.asarray(data, dtype=np.uint8)
 
         i = 3
         for rgb in byteData:
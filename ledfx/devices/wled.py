@@ -4,6 +4,7 @@ import voluptuous as vol
 from pkg_resources import parse_version
 
 from ledfx.devices import NetworkedDevice
+from ledfx.devices.artnet import ArtNetDevice
 from ledfx.devices.ddp import DDPDevice
 from ledfx.devices.e131 import E131Device
 from ledfx.devices.udp import UDPRealtimeDevice
@@ -25,7 +26,7 @@ class WLEDDevice(NetworkedDevice):
                 "sync_mode",
                 description="Streaming protocol to WLED device. Recommended: UDP<480px, DDP>480px",
                 default="UDP",
-            ): vol.In(["UDP", "DDP", "E131"]),
+            ): vol.In(["UDP", "DDP", "E131", "ARTNET"]),
             vol.Optional(
                 "timeout",
                 description="Time between LedFx effect off and WLED effect activate",
@@ -38,6 +39,7 @@ class WLEDDevice(NetworkedDevice):
         "UDP": UDPRealtimeDevice,
         "DDP": DDPDevice,
         "E131": E131Device,
+        "ARTNET": ArtNetDevice,
     }
 
     DEVICE_CONFIGS = {
@@ -64,6 +66,14 @@ class WLEDDevice(NetworkedDevice):
             "channel_offset": 0,
             "packet_priority": 100,
         },
+        "ARTNET": {
+            "name": None,
+            "ip_address": None,
+            "pixel_count": None,
+            "universe": 1,
+            "universe_size": 510,
+            "channel_offset": 0,
+        },
     }
 
     def __init__(self, ledfx, config):
@@ -89,6 +99,8 @@ class WLEDDevice(NetworkedDevice):
 
         self.subdevice = device(self._ledfx, config)
         self.subdevice._destination = self._destination
+        # so that the subdevice's output is counted against this device
+        self.subdevice._id = self.id
 
     def activate(self):
 
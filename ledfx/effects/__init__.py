@@ -1,5 +1,7 @@
 import colorsys
 import logging
+import threading
+import time
 
 # from ledfx.effects.audio import FREQUENCY_RANGES
 from functools import lru_cache
@@ -8,7 +10,7 @@ import numpy as np
 import voluptuous as vol
 
 from ledfx.color import parse_color, validate_color
-from ledfx.utils import BaseRegistry, RegistryLoader
+from ledfx.utils import BaseRegistry, RegistryLoader, get_pixel_dtype
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -20,8 +22,8 @@ class DummyEffect:
     is_active = _active
     NAME = name = ""
 
-    def __init__(self, pixel_count):
-        self.pixels = np.zeros((pixel_count, 3))
+    def __init__(self, pixel_count, dtype=np.float64):
+        self.pixels = np.zeros((pixel_count, 3), dtype=dtype)
 
     def render(self):
         pass
@@ -196,6 +198,9 @@ class Effect(BaseRegistry):
     _config = None
     _active = False
     _virtual = None
+    _shard = None
+    _pipeline = None
+    _render_group = None
 
     # Basic effect properties that can be applied to all effects
     CONFIG_SCHEMA = vol.Schema(
@@ -243,7 +248,9 @@ class Effect(BaseRegistry):
     def activate(self, virtual):
         """Attaches an output channel to the effect"""
         self._virtual = virtual
-        self.pixels = np.zeros((virtual.pixel_count, 3))
+        self.pixels = np.zeros(
+            (virtual.pixel_count, 3), dtype=get_pixel_dtype(self._ledfx)
+        )
         # Iterate all the base classes and check to see if the base
         # class has an on_activate method. If so, call it
         valid_classes = list(type(self).__bases__)
@@ -252,11 +259,19 @@ class Effect(BaseRegistry):
             if hasattr(base, "on_activate"):
                 base.on_activate(self, virtual.pixel_count)
 
+        self._compile_pipeline()
         self._active = True
         _LOGGER.info(f"Effect {self.NAME} activated.")
 
+        self.update_render_group()
+
     def deactivate(self):
         """Detaches an output channel from the effect"""
+        if self._render_group is not None:
+            self._ledfx.effects.leave_render_group(self)
+        if self._shard is not None:
+            self._shard.close()
+            self._shard = None
         self.pixels = None
         self._active = False
 
@@ -298,6 +313,44 @@ class Effect(BaseRegistry):
         )
 
         self.configured_blur = self._config["blur"]
+        self._compile_pipeline()
+
+        if self._shard is not None:
+            self._shard.update_config(self._config)
+        self.update_render_group()
+
+    def update_render_group(self):
+        """
+        Moves an active effect into the render group of effects that produce
+        the same frames as it, ie. those with the same type, config, pixel
+        count and frequency range, then updates its shard to match. Called
+        on activation and whenever any of those change.
+        """
+        effects = getattr(self._ledfx, "effects", None)
+        if self._active and effects is not None:
+            if self._render_group is not None:
+                effects.leave_render_group(self)
+            effects.join_render_group(self)
+        # joining or leaving a group decides whether the effect needs a shard
+        self.update_shard()
+
+    def update_shard(self):
+        """
+        Moves rendering of an active effect to the render pool, if there is
+        one, while it is the leader of its render group. Members of a group
+        share the leader's frames, so they don't need shards of their own.
+        """
+        render_pool = getattr(self._ledfx, "render_pool", None)
+        if not self._active or render_pool is None:
+            return
+        leader = (
+            self._render_group is None or self._render_group.leader is self
+        )
+        if leader and self._shard is None:
+            self._shard = render_pool.attach(self, self._virtual)
+        elif not leader and self._shard is not None:
+            self._shard.close()
+            self._shard = None
 
     def config_updated(self, config):
         """
@@ -317,36 +370,106 @@ class Effect(BaseRegistry):
         """
         pass
 
-    def get_pixels(self):
-        if not hasattr(self, "pixels"):
+    def _compile_pipeline(self):
+        """
+        Compiles the enabled base output filters (flip, mirror, background,
+        brightness and blur) into preallocated buffers and a single index
+        map, so that get_pixels doesn't allocate on every frame. Rebuilt
+        when the config or pixel count changes.
+        """
+        pixels = getattr(self, "pixels", None)
+        if pixels is None:
+            self._pipeline = None
             return
-        pixels = np.copy(self.pixels)
-        # Apply some of the base output filters if necessary
+        pixel_count = len(pixels)
+        dtype = get_pixel_dtype(self._ledfx)
+
+        # flip and mirror are both reorderings of the pixels, so they are
+        # folded into one index map that is gathered in a single take
+        index_map = np.arange(pixel_count)
         if self._config["flip"]:
-            pixels = np.flipud(pixels)
+            index_map = index_map[::-1]
         if self._config["mirror"]:
-            pixels = np.concatenate(
-                (pixels[-1 + len(pixels) % -2 :: -2], pixels[::2])
+            index_map = np.concatenate(
+                (index_map[-1 + pixel_count % -2 :: -2], index_map[::2])
             )
-        if self._config["background_color"]:
-            # TODO: colors in future should have an alpha value, which would work nicely to apply to dim the background color
-            # for now, just set it a bit less bright.
-            # pixels += self._bg_color * 0.5
-            pixels += self._bg_color
-        if self._config["brightness"] is not None:
-            np.multiply(
-                pixels,
-                self._config["brightness"],
-                out=pixels,
-                casting="unsafe",
+        if np.array_equal(index_map, np.arange(pixel_count)):
+            index_map = None
+
+        # TODO: colors in future should have an alpha value, which would work nicely to apply to dim the background color
+        background = (
+            self._bg_color.astype(dtype) if np.any(self._bg_color) else None
+        )
+        brightness = self._config["brightness"]
+        if brightness == 1.0:
+            brightness = None
+
+        output = np.zeros((pixel_count, 3), dtype=dtype)
+        stage = output
+        blur = None
+        if self.configured_blur != 0.0 and pixel_count > 1:
+            # Blur is applied as a "same" mode convolution of every channel
+            # at once. The filters above write into the middle of a zero
+            # padded buffer, and the output accumulates one shifted window
+            # of that buffer per kernel tap.
+            kernel = _gaussian_kernel1d(self.configured_blur, 0, pixel_count)
+            radius = len(kernel) // 2
+            padded = np.zeros((pixel_count + 2 * radius, 3), dtype=dtype)
+            stage = padded[radius : radius + pixel_count]
+            taps = tuple(
+                (padded[i : i + pixel_count], weight)
+                for i, weight in enumerate(kernel[::-1].astype(dtype))
             )
-        # If the configured blur is greater than 0 we need to blur it
-        if self.configured_blur != 0.0:
-            kernel = _gaussian_kernel1d(self.configured_blur, 0, len(pixels))
-            pixels[:, 0] = np.convolve(pixels[:, 0], kernel, mode="same")
-            pixels[:, 1] = np.convolve(pixels[:, 1], kernel, mode="same")
-            pixels[:, 2] = np.convolve(pixels[:, 2], kernel, mode="same")
-        return pixels
+            blur = (taps, np.zeros((pixel_count, 3), dtype=dtype))
+
+        self._pipeline = (
+            pixel_count,
+            index_map,
+            background,
+            brightness,
+            blur,
+            stage,
+            output,
+        )
+
+    def get_pixels(self):
+        """
+        Returns the effect's pixels with the base output filters applied.
+        The returned array is reused for every frame, so it is only valid
+        until the next call.
+        """
+        if not hasattr(self, "pixels") or self.pixels is None:
+            return
+        if self._pipeline is None or self._pipeline[0] != len(self.pixels):
+            self._compile_pipeline()
+        (
+            _,
+            index_map,
+            background,
+            brightness,
+            blur,
+            stage,
+            output,
+        ) = self._pipeline
+
+        if index_map is None:
+            np.copyto(stage, self.pixels, casting="unsafe")
+        elif self.pixels.dtype == stage.dtype:
+            np.take(self.pixels, index_map, axis=0, out=stage)
+        else:
+            stage[:] = self.pixels[index_map]
+        if background is not None:
+            np.add(stage, background, out=stage)
+        if brightness is not None:
+            np.multiply(stage, brightness, out=stage)
+        if blur is not None:
+            (window, weight), *taps = blur[0]
+            scratch = blur[1]
+            np.multiply(window, weight, out=output)
+            for window, weight in taps:
+                np.multiply(window, weight, out=scratch)
+                np.add(output, scratch, out=output)
+        return output
 
     @property
     def is_active(self):
@@ -363,6 +486,73 @@ class Effect(BaseRegistry):
         return self.NAME
 
 
+class RenderGroup:
+    """
+    Active effects that produce identical frames, eg. the same effect on
+    several strips of the same length. Only the group's leader is rendered,
+    once per tick, and its frame is copied out to every member.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.members = []
+        self._lock = threading.Lock()
+        self._frame = None
+        self._rendered_at = 0.0
+        # effect id -> frame buffer handed to that member
+        self._buffers = {}
+
+    @staticmethod
+    def key_for(effect):
+        frequency_range = getattr(effect._virtual, "frequency_range", None)
+        return (
+            effect.type,
+            repr(sorted(effect.config.items())),
+            len(effect.pixels),
+            tuple(frequency_range) if frequency_range else None,
+        )
+
+    @property
+    def leader(self):
+        return self.members[0] if self.members else None
+
+    def frame(self, effect, render):
+        """
+        Returns a frame for a member of the group. The leader is rendered
+        with render(leader) if the group's last frame is older than half of
+        the member's frame interval, otherwise the last frame is reused.
+        """
+        with self._lock:
+            now = time.perf_counter()
+            interval = 1 / (effect._virtual.refresh_rate or 1)
+            if self._frame is None or now - self._rendered_at > interval / 2:
+                frame = render(self.leader)
+                if frame is None:
+                    return None
+                if self._frame is None or self._frame.shape != frame.shape:
+                    self._frame = np.empty_like(frame)
+                np.copyto(self._frame, frame)
+                self._rendered_at = now
+
+            buffer = self._buffers.get(effect.id)
+            if buffer is None or buffer.shape != self._frame.shape:
+                buffer = np.empty_like(self._frame)
+                self._buffers[effect.id] = buffer
+            np.copyto(buffer, self._frame)
+            return buffer
+
+    def add(self, effect):
+        with self._lock:
+            self.members.append(effect)
+
+    def remove(self, effect):
+        with self._lock:
+            self.members.remove(effect)
+            self._buffers.pop(effect.id, None)
+            # the next leader's state may lag the old leader's
+            self._frame = None
+
+
 class Effects(RegistryLoader):
     """Thin wrapper around the effect registry that manages effects"""
 
@@ -371,3 +561,40 @@ class Effects(RegistryLoader):
     def __init__(self, ledfx):
         super().__init__(ledfx=ledfx, cls=Effect, package=self.PACKAGE_NAME)
         self._ledfx.audio = None
+        self._render_groups = {}
+        self._render_groups_lock = threading.Lock()
+
+    def join_render_group(self, effect):
+        """Adds an active effect to the render group for its frames"""
+        key = RenderGroup.key_for(effect)
+        with self._render_groups_lock:
+            group = self._render_groups.get(key)
+            if group is None:
+                group = RenderGroup(key)
+                self._render_groups[key] = group
+            group.add(effect)
+            effect._render_group = group
+        if group.leader is not effect:
+            _LOGGER.debug(
+                f"Effect {effect.id} shares frames with {group.leader.id}"
+            )
+
+    def leave_render_group(self, effect):
+        with self._render_groups_lock:
+            group = effect._render_group
+            effect._render_group = None
+            group.remove(effect)
+            if not group.members:
+                del self._render_groups[group.key]
+        # the next member in line now renders the group's frames
+        if group.members and group.leader._shard is None:
+            group.leader.update_shard()
+
+    @property
+    def render_groups(self):
+        """Returns the ids of the effects in each render group"""
+        with self._render_groups_lock:
+            return [
+                [effect.id for effect in group.members]
+                for group in self._render_groups.values()
+            ]
@@ -1,8 +1,9 @@
 import logging
-import queue
+import threading
 import time
 from collections import deque
 from functools import cached_property, lru_cache
+from types import SimpleNamespace
 
 import aubio
 import numpy as np
@@ -13,21 +14,168 @@ import voluptuous as vol
 import ledfx.api.websocket
 from ledfx.api.websocket import WEB_AUDIO_CLIENTS, WebAudioStream
 from ledfx.effects import Effect
-from ledfx.effects.math import ExpFilter
+from ledfx.effects.audio_file import (
+    RAW_FORMATS,
+    FileAudioStream,
+    open_audio_file,
+)
+from ledfx.effects.math import ExpFilter, InplaceExpFilter
 from ledfx.effects.melbank import FFT_SIZE, MIC_RATE, Melbanks
 from ledfx.events import AudioDeviceChangeEvent, Event
+from ledfx.scheduler import Histogram
 
 _LOGGER = logging.getLogger(__name__)
 
 MIN_MIDI = 21
 MAX_MIDI = 108
 
+# Blocks of audio buffered between the input callback and the analysis
+# worker, and the most samples a single block can hold
+AUDIO_RING_BLOCKS = 8
+AUDIO_RING_BLOCK_SIZE = 8192
+
+# The analysis worker counts an underrun if no audio arrives for this many
+# sample periods while the input stream is open
+UNDERRUN_PERIODS = 4
+
+# Histogram bin edges for the analysis time of each block, in milliseconds
+ANALYSIS_BINS_MS = (0.5, 1, 2, 4, 8, 16, 33)
+
+# How often, in frames of audio, shared filters that are no longer used are
+# dropped
+SHARED_FILTER_PRUNE_FRAMES = 256
+
+
+@lru_cache(maxsize=64)
+def _melbank_interp_linspaces(length, size):
+    old = np.linspace(0, 1, length)
+    new = np.linspace(0, 1, size)
+    return (new, old)
+
+
+class AudioRingBuffer:
+    """
+    Single producer, single consumer ring of audio blocks. The producer
+    (the input callback) only ever advances the write count and the
+    consumer (the analysis worker) only the read count, so neither side
+    takes a lock. A slot is only handed back to the producer once the
+    consumer calls advance(), so blocks can be read in place.
+    """
+
+    def __init__(self, blocks, block_size):
+        self._data = np.zeros((blocks, block_size), dtype=np.float32)
+        self._lengths = [0] * blocks
+        self._blocks = blocks
+        self.block_size = block_size
+        self._written = 0
+        self._read = 0
+
+    def __len__(self):
+        return self._written - self._read
+
+    def full(self):
+        return self._written - self._read >= self._blocks
+
+    def put(self, block):
+        """Copies a block into the ring, returns False if it is full"""
+        if self._written - self._read >= self._blocks:
+            return False
+        slot = self._written % self._blocks
+        self._data[slot, : len(block)] = block
+        self._lengths[slot] = len(block)
+        # publish the block only once it has been written
+        self._written += 1
+        return True
+
+    def peek(self):
+        """Returns a view of the oldest block, or None if the ring is empty"""
+        if self._written == self._read:
+            return None
+        slot = self._read % self._blocks
+        return self._data[slot, : self._lengths[slot]]
+
+    def advance(self):
+        """Releases the oldest block back to the producer"""
+        self._read += 1
+
+    def clear(self):
+        self._read = self._written
+
+
+class AudioDelayLine:
+    """
+    Delays a stream of audio by an exact number of samples, using a
+    circular buffer that holds just the delay plus one block of audio.
+    """
+
+    def __init__(self, delay, block_size):
+        self.delay = delay
+        self._buffer = np.zeros(delay + block_size, dtype=np.float32)
+        self._position = 0
+
+    def _write(self, position, block):
+        split = min(len(block), len(self._buffer) - position)
+        self._buffer[position : position + split] = block[:split]
+        self._buffer[: len(block) - split] = block[split:]
+
+    def _read(self, position, out):
+        split = min(len(out), len(self._buffer) - position)
+        out[:split] = self._buffer[position : position + split]
+        out[split:] = self._buffer[: len(out) - split]
+
+    def process(self, block, out):
+        """
+        Writes a block of audio into the delay line and fills out with the
+        samples from delay samples ago. Output is silent until the delay
+        line first fills.
+        """
+        size = len(self._buffer)
+        self._write(self._position, block)
+        self._read((self._position - self.delay) % size, out[: len(block)])
+        self._position = (self._position + len(block)) % size
+
+
+class AudioStats:
+    """
+    Counters for the hand off between the audio input and analysis.
+
+    overruns       : blocks dropped because analysis had fallen behind
+    underruns      : times the analysis worker waited over UNDERRUN_PERIODS
+                     sample periods without receiving any audio
+    input_overflows: input overflows reported by the audio driver
+    analysis       : how long analysing each block took
+    """
+
+    def __init__(self):
+        self.analysis = Histogram(ANALYSIS_BINS_MS)
+        self.reset()
+
+    def reset(self):
+        self.analysis.reset()
+        self.blocks = 0
+        self.overruns = 0
+        self.underruns = 0
+        self.input_overflows = 0
+        self.since = time.perf_counter()
+
+    def to_dict(self):
+        elapsed = time.perf_counter() - self.since
+        return {
+            "blocks": self.blocks,
+            "blocks_per_second": self.blocks / elapsed if elapsed > 0 else 0,
+            "overruns": self.overruns,
+            "underruns": self.underruns,
+            "input_overflows": self.input_overflows,
+            "analysis": self.analysis.to_dict(),
+        }
+
 
 class AudioInputSource:
 
     _is_activated = False
     _audio = None
     _stream = None
+    _worker = None
     _callbacks = []
     _audioWindowSize = 4
     _processed_audio_sample = None
@@ -96,6 +244,11 @@ class AudioInputSource:
                 vol.Optional("sample_rate", default=60): int,
                 vol.Optional("mic_rate", default=44100): int,
                 vol.Optional("fft_size", default=FFT_SIZE): int,
+                vol.Optional(
+                    "native_rate",
+                    default=False,
+                    description="Analyse audio at the input device's own sample rate instead of resampling it, which uses less CPU and adds less latency",
+                ): bool,
                 vol.Optional("min_volume", default=0.2): vol.All(
                     vol.Coerce(float), vol.Range(min=0.0, max=10.0)
                 ),
@@ -107,12 +260,46 @@ class AudioInputSource:
                     default=0,
                     description="Add a delay to LedFx's output to sync with your audio. Useful for Bluetooth devices which typically have a short audio lag.",
                 ): vol.All(vol.Coerce(int), vol.Range(min=0, max=5000)),
+                vol.Optional(
+                    "file_input",
+                    default="",
+                    description="Stream audio from a WAV or FLAC file, or raw PCM from a named pipe or - for stdin, instead of an audio device",
+                ): str,
+                vol.Optional(
+                    "file_loop",
+                    default=True,
+                    description="Start the file again when it ends",
+                ): bool,
+                vol.Optional(
+                    "file_realtime",
+                    default=True,
+                    description="Stream the file in real time, rather than as fast as it can be analysed",
+                ): bool,
+                vol.Optional(
+                    "raw_sample_rate",
+                    default=44100,
+                    description="Sample rate of raw PCM input",
+                ): vol.All(vol.Coerce(int), vol.Range(min=1000, max=384000)),
+                vol.Optional(
+                    "raw_format",
+                    default="s16le",
+                    description="Sample format of raw PCM input",
+                ): vol.In(list(RAW_FORMATS)),
+                vol.Optional(
+                    "raw_channels",
+                    default=1,
+                    description="Channels of raw PCM input, mixed down to mono",
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=32)),
             },
             extra=vol.ALLOW_EXTRA,
         )
 
     def __init__(self, ledfx, config):
         self._ledfx = ledfx
+        self._ring = AudioRingBuffer(AUDIO_RING_BLOCKS, AUDIO_RING_BLOCK_SIZE)
+        self._ring_ready = threading.Event()
+        self.audio_stats = AudioStats()
+        self.analysis_rate = MIC_RATE
         self.update_config(config)
 
         def deactivate(e):
@@ -151,24 +338,26 @@ class AudioInputSource:
                 self._ledfx.stop()
 
         # Enumerate all of the input devices and find the one matching the
-        # configured host api and device name
-        input_devices = self.query_devices()
-        hostapis = self.query_hostapis()
-        default_device = self.default_device_index()
-        valid_device_indexes = self.valid_device_indexes()
-        device_idx = self._config["audio_device"]
-
-        if device_idx > max(valid_device_indexes):
-            _LOGGER.warning(
-                f"Invalid audio device index: {device_idx}. Reverting to default input device."
-            )
-            device_idx = default_device
+        # configured host api and device name. Not needed when streaming
+        # from a file, which also works without any audio devices
+        if not self._config["file_input"]:
+            input_devices = self.query_devices()
+            hostapis = self.query_hostapis()
+            default_device = self.default_device_index()
+            valid_device_indexes = self.valid_device_indexes()
+            device_idx = self._config["audio_device"]
+
+            if device_idx > max(valid_device_indexes):
+                _LOGGER.warning(
+                    f"Invalid audio device index: {device_idx}. Reverting to default input device."
+                )
+                device_idx = default_device
 
-        elif device_idx not in valid_device_indexes:
-            _LOGGER.warning(
-                f"Audio device {input_devices[device_idx]['name']} has no input channels. Reverting to default input device."
-            )
-            device_idx = default_device
+            elif device_idx not in valid_device_indexes:
+                _LOGGER.warning(
+                    f"Audio device {input_devices[device_idx]['name']} has no input channels. Reverting to default input device."
+                )
+                device_idx = default_device
 
         # hostapis = self._audio.query_hostapis()
         # devices = self._audio.query_devices()
@@ -195,53 +384,6 @@ class AudioInputSource:
         #                 )
         #             )
 
-        # old, do not use
-        # self.pre_emphasis.set_biquad(1., -self._config['pre_emphasis'], 0, 0, 0)
-
-        # USE THESE FOR SCOTT_MEL OR OTHERS
-        # self.pre_emphasis.set_biquad(1.3662, -1.9256, 0.5621, -1.9256, 0.9283)
-
-        # USE THESE FOR MATT_MEl
-        # weaker bass, good for vocals, highs
-        # self.pre_emphasis.set_biquad(0.87492, -1.74984, 0.87492, -1.74799, 0.75169)
-        # bass heavier overall more balanced
-        # self.pre_emphasis.set_biquad(
-        #     0.85870, -1.71740, 0.85870, -1.71605, 0.71874
-        # )
-
-        # Setup a pre-emphasis filter to balance the input volume of lows to highs
-        self.pre_emphasis = aubio.digital_filter(3)
-        self.pre_emphasis.set_biquad(0.8268, -1.6536, 0.8268, -1.6536, 0.6536)
-
-        # self.pre_emphasis = None,
-        freq_domain_length = (self._config["fft_size"] // 2) + 1
-
-        self._raw_audio_sample = np.zeros(
-            MIC_RATE // self._config["sample_rate"],
-            dtype=np.float32,
-        )
-
-        # Setup the phase vocoder to perform a windowed FFT
-        self._phase_vocoder = aubio.pvoc(
-            self._config["fft_size"],
-            MIC_RATE // self._config["sample_rate"],
-        )
-        self._frequency_domain_null = aubio.cvec(self._config["fft_size"])
-        self._frequency_domain = self._frequency_domain_null
-        self._frequency_domain_x = np.linspace(
-            0,
-            MIC_RATE,
-            freq_domain_length,
-        )
-
-        samples_to_delay = int(
-            0.001 * self._config["delay_ms"] * self._config["sample_rate"]
-        )
-        if samples_to_delay:
-            self.delay_queue = queue.Queue(maxsize=samples_to_delay)
-        else:
-            self.delay_queue = None
-
         def open_audio_stream(device_idx):
             device = input_devices[device_idx]
             ch = 1
@@ -250,12 +392,17 @@ class AudioInputSource:
                     ch = 2
 
             if hostapis[device["hostapi"]]["name"] == "WEB AUDIO":
+                # the rate of web audio isn't known until it arrives
+                self.prepare_analysis()
                 ledfx.api.websocket.ACTIVE_AUDIO_STREAM = (
                     self._stream
                 ) = WebAudioStream(
-                    device["client"], self._audio_sample_callback
+                    device["client"],
+                    self._audio_sample_callback,
+                    self._config["sample_rate"],
                 )
             else:
+                self.prepare_analysis(device["default_samplerate"])
                 self._stream = self._audio.InputStream(
                     samplerate=int(device["default_samplerate"]),
                     device=device_idx,
@@ -269,16 +416,40 @@ class AudioInputSource:
                     ),
                 )
 
-            self.resampler = samplerate.Resampler("sinc_fastest", channels=1)
-
             _LOGGER.info(
                 f"Audio source opened: {hostapis[device['hostapi']]['name']}: {device.get('name', device.get('client'))}"
             )
 
             self._stream.start()
 
+        def open_file_stream(path):
+            reader = open_audio_file(
+                path,
+                self._config["raw_sample_rate"],
+                self._config["raw_format"],
+                self._config["raw_channels"],
+            )
+            self.prepare_analysis(reader.samplerate)
+            self._stream = FileAudioStream(
+                reader,
+                self._audio_sample_callback,
+                self._config["sample_rate"],
+                realtime=self._config["file_realtime"],
+                loop=self._config["file_loop"],
+                throttle=self._wait_for_ring_space,
+            )
+            _LOGGER.info(
+                f"Audio source opened: {path} at {reader.samplerate} Hz"
+            )
+
+            self._stream.start()
+
+        self._start_worker()
         try:
-            open_audio_stream(device_idx)
+            if self._config["file_input"]:
+                open_file_stream(self._config["file_input"])
+            else:
+                open_audio_stream(device_idx)
             self._is_activated = True
         except OSError as e:
             _LOGGER.critical(
@@ -289,11 +460,86 @@ class AudioInputSource:
             _LOGGER.error(f"{e}, Reverting to default input device")
             open_audio_stream(default_device)
 
+    def analysis_rate_for(self, input_rate):
+        """
+        Returns the rate audio from an input at input_rate Hz is analysed at.
+        That is MIC_RATE, unless native_rate is set and the input's rate is
+        known and high enough for the whole range of the melbanks, in which
+        case the audio is analysed as it is, without resampling.
+        """
+        if (
+            self._config["native_rate"]
+            and input_rate
+            and input_rate >= MIC_RATE
+        ):
+            return int(input_rate)
+        return MIC_RATE
+
+    def prepare_analysis(self, input_rate=None):
+        """
+        Sets up the analysis state for the current config, for an input at
+        input_rate Hz. Called when the input is opened, or by anything that
+        feeds samples in directly, like the audio benchmark.
+        """
+        self.analysis_rate = self.analysis_rate_for(input_rate)
+
+        # old, do not use
+        # self.pre_emphasis.set_biquad(1., -self._config['pre_emphasis'], 0, 0, 0)
+
+        # USE THESE FOR SCOTT_MEL OR OTHERS
+        # self.pre_emphasis.set_biquad(1.3662, -1.9256, 0.5621, -1.9256, 0.9283)
+
+        # USE THESE FOR MATT_MEl
+        # weaker bass, good for vocals, highs
+        # self.pre_emphasis.set_biquad(0.87492, -1.74984, 0.87492, -1.74799, 0.75169)
+        # bass heavier overall more balanced
+        # self.pre_emphasis.set_biquad(
+        #     0.85870, -1.71740, 0.85870, -1.71605, 0.71874
+        # )
+
+        # Setup a pre-emphasis filter to balance the input volume of lows to highs
+        self.pre_emphasis = aubio.digital_filter(3)
+        self.pre_emphasis.set_biquad(0.8268, -1.6536, 0.8268, -1.6536, 0.6536)
+
+        # self.pre_emphasis = None,
+        freq_domain_length = (self._config["fft_size"] // 2) + 1
+
+        self._raw_audio_sample = np.zeros(
+            self.analysis_rate // self._config["sample_rate"],
+            dtype=np.float32,
+        )
+
+        # Setup the phase vocoder to perform a windowed FFT
+        self._phase_vocoder = aubio.pvoc(
+            self._config["fft_size"],
+            self.analysis_rate // self._config["sample_rate"],
+        )
+        self._frequency_domain_null = aubio.cvec(self._config["fft_size"])
+        self._frequency_domain = self._frequency_domain_null
+        self._frequency_domain_x = np.linspace(
+            0,
+            self.analysis_rate,
+            freq_domain_length,
+        )
+
+        samples_to_delay = round(
+            0.001 * self._config["delay_ms"] * self.analysis_rate
+        )
+        if samples_to_delay:
+            self.delay_line = AudioDelayLine(
+                samples_to_delay, len(self._raw_audio_sample)
+            )
+        else:
+            self.delay_line = None
+
+        self.resampler = samplerate.Resampler("sinc_fastest", channels=1)
+
     def deactivate(self):
         if self._stream:
             self._stream.stop()
             self._stream.close()
             self._stream = None
+        self._stop_worker()
         self._is_activated = False
         _LOGGER.info("Audio source closed.")
 
@@ -318,21 +564,102 @@ class AudioInputSource:
                 return key
         return -1
 
+    def _start_worker(self):
+        self._stop_worker()
+        self._ring.clear()
+        self._worker = threading.Thread(
+            target=self._analysis_worker,
+            name="LedFx Audio Analysis",
+            daemon=True,
+        )
+        self._worker_running = True
+        self._worker.start()
+
+    def _stop_worker(self):
+        worker = self._worker
+        if worker is None:
+            return
+        self._worker = None
+        self._worker_running = False
+        self._ring_ready.set()
+        if worker is not threading.current_thread():
+            worker.join()
+
+    def _wait_for_ring_space(self):
+        """
+        Blocks while the ring buffer is full, for inputs that can be held
+        back rather than drop audio, like files streamed as fast as possible
+        """
+        while self._ring.full() and self._worker is not None:
+            time.sleep(0.0005)
+
     def _audio_sample_callback(self, in_data, frame_count, time_info, status):
-        """Callback for when a new audio sample is acquired"""
-        # time_start = time.time()
-        # self._raw_audio_sample = np.frombuffer(in_data, dtype=np.float32)
+        """
+        Callback for when a new audio sample is acquired. This runs on the
+        audio driver's thread, so it only copies the sample into the ring
+        buffer and leaves the analysis to the worker.
+        """
+        if status and status.input_overflow:
+            self.audio_stats.input_overflows += 1
+
         raw_sample = np.frombuffer(in_data, dtype=np.float32)
+        if len(raw_sample) > self._ring.block_size:
+            _LOGGER.warning(
+                f"Discarded oversized audio frame - {len(raw_sample)} samples, limit {self._ring.block_size}"
+            )
+            return
+
+        if self._ring.put(raw_sample):
+            self._ring_ready.set()
+        else:
+            self.audio_stats.overruns += 1
+
+    def _analysis_worker(self):
+        """Analyses the audio samples buffered by the input callback"""
+        ring = self._ring
+        ready = self._ring_ready
+        stats = self.audio_stats
+        underrun_timeout = UNDERRUN_PERIODS / self._config["sample_rate"]
+
+        while self._worker_running:
+            if not ready.wait(underrun_timeout):
+                if self._stream is not None:
+                    stats.underruns += 1
+                continue
+            ready.clear()
+
+            while self._worker_running:
+                raw_sample = ring.peek()
+                if raw_sample is None:
+                    break
+                time_start = time.perf_counter()
+                try:
+                    self._process_audio_sample(raw_sample)
+                except Exception as e:
+                    _LOGGER.exception(f"Audio analysis failed: {e}")
+                finally:
+                    ring.advance()
+                stats.blocks += 1
+                stats.analysis.record(
+                    (time.perf_counter() - time_start) * 1000
+                )
 
+    def _process_audio_sample(self, raw_sample):
+        """Resamples, delays and analyses a sample from the ring buffer"""
         in_sample_len = len(raw_sample)
-        out_sample_len = MIC_RATE // self._config["sample_rate"]
+        out_sample_len = len(self._raw_audio_sample)
 
         if in_sample_len != out_sample_len:
-            # Simple resampling
+            # resample by the rates where the input's rate is known, so a
+            # frame of the wrong length can't shift the pitch
+            input_rate = getattr(self._stream, "samplerate", None)
+            if input_rate:
+                ratio = self.analysis_rate / input_rate
+            else:
+                ratio = out_sample_len / in_sample_len
             processed_audio_sample = self.resampler.process(
                 raw_sample,
-                # MIC_RATE / self._stream.samplerate
-                out_sample_len / in_sample_len
+                ratio,
                 # end_of_input=True
             )
         else:
@@ -344,24 +671,16 @@ class AudioInputSource:
             )
             return
 
-        # handle delaying the audio with the queue
-        if self.delay_queue:
-            try:
-                self.delay_queue.put_nowait(processed_audio_sample)
-            except queue.Full:
-                self._raw_audio_sample = self.delay_queue.get_nowait()
-                self.delay_queue.put_nowait(processed_audio_sample)
-                self.pre_process_audio()
-                self._invalidate_caches()
-                self._invoke_callbacks()
+        # copy the sample out of the ring buffer slot, delaying it if needed
+        if self.delay_line is not None:
+            self.delay_line.process(
+                processed_audio_sample, self._raw_audio_sample
+            )
         else:
-            self._raw_audio_sample = processed_audio_sample
-            self.pre_process_audio()
-            self._invalidate_caches()
-            self._invoke_callbacks()
-
-        # print(f"Core Audio Processing Latency {round(time.time()-time_start, 3)} s")
-        # return self._raw_audio_sample
+            np.copyto(self._raw_audio_sample, processed_audio_sample)
+        self.pre_process_audio()
+        self._invalidate_caches()
+        self._invoke_callbacks()
 
     def _invoke_callbacks(self):
         """Notifies all clients of the new data"""
@@ -442,18 +761,88 @@ class AudioAnalysisSource(AudioInputSource):
         10000,
     ]
 
+    # Features that are computed on every frame of audio while an active
+    # effect uses them, and the features each of them depends on. Listed in
+    # dependency order, so dependencies are always computed first.
+    FEATURES = {
+        "melbanks": (),
+        "freq_power": ("melbanks",),
+        "volume_beat_now": ("melbanks",),
+        "pitch": (),
+        "onset": (),
+        "bpm_beat_now": (),
+        "bar_oscillator": ("bpm_beat_now",),
+    }
+
     def __init__(self, ledfx, config):
         config = self.CONFIG_SCHEMA(config)
+        self._feature_consumers = dict.fromkeys(self.FEATURES, 0)
+        self._live_features = ()
+        self._melbank_views = {}
+        self._shared_filters = {}
+        self.frame_count = 0
         super().__init__(ledfx, config)
         self.initialise_analysis()
+        self._update_live_features()
+
+    @classmethod
+    def resolve_features(cls, features):
+        """Returns the given features along with all of their dependencies"""
+        resolved = set()
+        pending = list(features)
+        while pending:
+            feature = pending.pop()
+            if feature not in cls.FEATURES:
+                raise ValueError(f"Unknown audio feature: {feature}")
+            if feature not in resolved:
+                resolved.add(feature)
+                pending.extend(cls.FEATURES[feature])
+        return resolved
+
+    def add_features(self, features):
+        """
+        Registers a consumer of features, which are then computed on every
+        frame of audio until the consumer is removed with remove_features
+        """
+        for feature in self.resolve_features(features):
+            self._feature_consumers[feature] += 1
+        self._update_live_features()
+
+    def remove_features(self, features):
+        for feature in self.resolve_features(features):
+            self._feature_consumers[feature] = max(
+                0, self._feature_consumers[feature] - 1
+            )
+        self._update_live_features()
 
-        # Subscribe functions to be run on every frame of audio
-        self.subscribe(self.melbanks)
-        self.subscribe(self.pitch)
-        self.subscribe(self.onset)
-        self.subscribe(self.bar_oscillator)
-        self.subscribe(self.volume_beat_now)
-        self.subscribe(self.freq_power)
+    @property
+    def live_features(self):
+        return [
+            feature
+            for feature, consumers in self._feature_consumers.items()
+            if consumers
+        ]
+
+    def _update_live_features(self):
+        # the melbank graphs of the dev frontend need them computed
+        dev_graphs = self._ledfx.dev_enabled()
+        # replaced rather than modified, it is iterated by the audio worker
+        self._live_features = tuple(
+            getattr(self, feature)
+            for feature, consumers in self._feature_consumers.items()
+            if consumers or (dev_graphs and feature == "melbanks")
+        )
+
+    def _invoke_callbacks(self):
+        """Computes the live features, then notifies all clients"""
+        for feature in self._live_features:
+            feature()
+        super()._invoke_callbacks()
+
+    def prepare_analysis(self, input_rate=None):
+        super().prepare_analysis(input_rate)
+        # the detectors and melbanks are built for the analysis rate
+        self.initialise_analysis()
 
     def initialise_analysis(self):
         # melbanks
@@ -461,11 +850,16 @@ class AudioAnalysisSource(AudioInputSource):
             self.melbanks = Melbanks(
                 self._ledfx, self, self._ledfx.config.get("melbanks", {})
             )
+        elif (self.melbanks.sample_rate, self.melbanks.fft_size) != (
+            self.analysis_rate,
+            self._config["fft_size"],
+        ):
+            self.melbanks.update_config(self.melbanks._config)
 
         fft_params = (
             self._config["fft_size"],
-            MIC_RATE // self._config["sample_rate"],
-            MIC_RATE,
+            self.analysis_rate // self._config["sample_rate"],
+            self.analysis_rate,
         )
 
         # pitch, tempo, onset
@@ -543,6 +937,73 @@ class AudioAnalysisSource(AudioInputSource):
         self.bpm_beat_now.cache_clear()
         self.volume_beat_now.cache_clear()
         self.bar_oscillator.cache_clear()
+        # replaced rather than cleared, effects may still be reading it
+        self._melbank_views = {}
+        self.frame_count += 1
+        if self.frame_count % SHARED_FILTER_PRUNE_FRAMES == 0:
+            self._shared_filters = {
+                key: shared
+                for key, shared in self._shared_filters.items()
+                if shared.frame >= self.frame_count - 1
+            }
+
+    def filtered_signal(self, signal, alpha_decay, alpha_rise, **kwargs):
+        """
+        Returns getattr(self, signal)(**kwargs) smoothed by an ExpFilter,
+        eg. filtered_signal("lows_power", 0.1, 0.1, filtered=False).
+        The filter is shared by every effect that asks for the same signal
+        and smoothing, and updated once per frame of audio by the first of
+        them to ask. The returned value is shared, so must not be modified.
+        """
+        key = (signal, tuple(kwargs.items()), alpha_decay, alpha_rise)
+        shared = self._shared_filters.get(key)
+        if shared is None or shared.frame < self.frame_count - 1:
+            # new, or unused since before the last frame, so start again
+            # as a newly created filter would
+            shared = SimpleNamespace(filter=None, frame=-1)
+            self._shared_filters[key] = shared
+
+        if shared.frame != self.frame_count:
+            value = getattr(self, signal)(**kwargs)
+            if shared.filter is None:
+                if np.ndim(value):
+                    shared.filter = InplaceExpFilter(
+                        np.shape(value), alpha_decay, alpha_rise
+                    )
+                else:
+                    shared.filter = ExpFilter(
+                        alpha_decay=alpha_decay, alpha_rise=alpha_rise
+                    )
+            shared.filter.update(value)
+            shared.frame = self.frame_count
+        return shared.filter.value
+
+    def melbank_view(self, melbank, min_idx, max_idx, size=0, filtered=False):
+        """
+        Returns a read-only section of a melbank, interpolated to size if
+        given. Each view is computed once per frame of audio and shared by
+        every effect that asks for it.
+
+        melbank, int       : index of the melbank resolution
+        min_idx, max_idx   : section of the melbank
+        size, int          : interpolate to size. 0 is no interpolation
+        filtered, bool     : melbank with smoothed attack and decay
+        """
+        key = (melbank, min_idx, max_idx, size, filtered)
+        view = self._melbank_views.get(key)
+        if view is None:
+            if filtered:
+                view = self.melbanks.melbanks_filtered[melbank]
+            else:
+                view = self.melbanks.melbanks[melbank]
+            view = view[min_idx:max_idx]
+            if size and (max_idx - min_idx != size):
+                view = np.interp(
+                    *_melbank_interp_linspaces(max_idx - min_idx, size), view
+                )
+            view.flags.writeable = False
+            self._melbank_views[key] = view
+        return view
 
     @lru_cache(maxsize=None)
     def pitch(self):
@@ -720,6 +1181,159 @@ class AudioAnalysisSource(AudioInputSource):
         return self.bar_oscillator() % 1
 
 
+class AudioFeatureSnapshot:
+    """
+    Read-only copy of the features of an AudioAnalysisSource for a single
+    audio frame. Stands in for the analysis source in processes that don't
+    own the audio input, eg. render shards, so that audio reactive effects
+    can run unmodified. Each call to update() loads a new frame of features
+    and notifies subscribers, just like a new sample from the input source.
+    """
+
+    # these only depend on get_freq_power and bar_oscillator, so they can be
+    # shared with the analysis source
+    get_freq_power = AudioAnalysisSource.get_freq_power
+    beat_power = AudioAnalysisSource.beat_power
+    bass_power = AudioAnalysisSource.bass_power
+    lows_power = AudioAnalysisSource.lows_power
+    mids_power = AudioAnalysisSource.mids_power
+    high_power = AudioAnalysisSource.high_power
+    beat_oscillator = AudioAnalysisSource.beat_oscillator
+    melbank_view = AudioAnalysisSource.melbank_view
+    filtered_signal = AudioAnalysisSource.filtered_signal
+
+    def __init__(self, max_frequencies, melbank_frequencies):
+        self._callbacks = []
+        self._melbank_views = {}
+        self._shared_filters = {}
+        self.frame_count = 0
+        self.melbanks = SimpleNamespace(
+            _config={"max_frequencies": max_frequencies},
+            melbank_processors=tuple(
+                SimpleNamespace(melbank_frequencies=frequencies)
+                for frequencies in melbank_frequencies
+            ),
+            melbanks=tuple(
+                np.zeros(len(frequencies))
+                for frequencies in melbank_frequencies
+            ),
+            melbanks_filtered=tuple(
+                np.zeros(len(frequencies))
+                for frequencies in melbank_frequencies
+            ),
+        )
+        self._volume = self._volume_filtered = 0
+        self._pitch = 0
+        self._onset = self._bpm_beat_now = self._volume_beat_now = False
+        self._bar_oscillator = 0
+        self.beat_counter = 0
+        self.freq_power_raw = np.zeros(len(AudioAnalysisSource.freq_max_mels))
+        self.freq_power_filter = SimpleNamespace(
+            value=np.zeros(len(AudioAnalysisSource.freq_max_mels))
+        )
+
+    @staticmethod
+    def layout(audio):
+        """
+        Returns the melbank layout of an analysis source, which is all that
+        is needed to create a snapshot of it
+        """
+        return (
+            audio.melbanks._config["max_frequencies"],
+            tuple(
+                processor.melbank_frequencies
+                for processor in audio.melbanks.melbank_processors
+            ),
+        )
+
+    @staticmethod
+    def capture(audio):
+        """
+        Captures the current features of an analysis source. Features that
+        no active effect uses are left at their defaults rather than being
+        computed just to be sent.
+        """
+        melbanks = audio.melbanks
+        live = audio.live_features
+        return {
+            "melbanks": tuple(np.copy(x) for x in melbanks.melbanks),
+            "melbanks_filtered": tuple(
+                np.copy(x) for x in melbanks.melbanks_filtered
+            ),
+            "volume": audio.volume(filtered=False),
+            "volume_filtered": audio.volume(filtered=True),
+            "pitch": audio.pitch() if "pitch" in live else 0,
+            "onset": audio.onset() if "onset" in live else False,
+            "bpm_beat_now": (
+                audio.bpm_beat_now() if "bpm_beat_now" in live else False
+            ),
+            "volume_beat_now": (
+                audio.volume_beat_now() if "volume_beat_now" in live else False
+            ),
+            "bar_oscillator": (
+                audio.bar_oscillator() if "bar_oscillator" in live else 0
+            ),
+            "beat_counter": audio.beat_counter,
+            "freq_power_raw": np.copy(audio.freq_power_raw),
+            "freq_power_filtered": np.copy(audio.freq_power_filter.value),
+        }
+
+    def update(self, state):
+        """Loads a new frame of audio features"""
+        for i, melbank in enumerate(state["melbanks"]):
+            self.melbanks.melbanks[i][:] = melbank
+        for i, melbank in enumerate(state["melbanks_filtered"]):
+            self.melbanks.melbanks_filtered[i][:] = melbank
+        self._volume = state["volume"]
+        self._volume_filtered = state["volume_filtered"]
+        self._pitch = state["pitch"]
+        self._onset = state["onset"]
+        self._bpm_beat_now = state["bpm_beat_now"]
+        self._volume_beat_now = state["volume_beat_now"]
+        self._bar_oscillator = state["bar_oscillator"]
+        self.beat_counter = state["beat_counter"]
+        self.freq_power_raw = state["freq_power_raw"]
+        self.freq_power_filter.value = state["freq_power_filtered"]
+        self._melbank_views = {}
+        self.frame_count += 1
+        for callback in self._callbacks:
+            callback()
+
+    def subscribe(self, callback):
+        self._callbacks.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._callbacks:
+            self._callbacks.remove(callback)
+
+    def add_features(self, features):
+        # features are computed by the analysis source this is a copy of
+        pass
+
+    def remove_features(self, features):
+        pass
+
+    def volume(self, filtered=True):
+        if filtered:
+            return self._volume_filtered
+        return self._volume
+
+    def pitch(self):
+        return self._pitch
+
+    def onset(self):
+        return self._onset
+
+    def bpm_beat_now(self):
+        return self._bpm_beat_now
+
+    def volume_beat_now(self):
+        return self._volume_beat_now
+
+    def bar_oscillator(self):
+        return self._bar_oscillator
+
+
 @Effect.no_registration
 class AudioReactiveEffect(Effect):
     """
@@ -728,36 +1342,56 @@ class AudioReactiveEffect(Effect):
     subclasses. This can be expanded to do the common r/g/b filters.
     """
 
+    # The features of AudioAnalysisSource.FEATURES used by the effect. Only
+    # features used by an active effect are computed on every frame of
+    # audio; others are still computed on demand, but detectors that track
+    # the audio over time (eg. onset, bpm) need to be declared to be accurate.
+    AUDIO_FEATURES = ("melbanks",)
+
+    _audio_features = None
+
     def activate(self, channel):
         _LOGGER.info("Activating AudioReactiveEffect.")
-        super().activate(channel)
-
-        if not self._ledfx.audio or id(AudioAnalysisSource) != id(
-            self._ledfx.audio.__class__
+        if not self._ledfx.audio or type(self._ledfx.audio) not in (
+            AudioAnalysisSource,
+            AudioFeatureSnapshot,
         ):
             self._ledfx.audio = AudioAnalysisSource(
                 self._ledfx, self._ledfx.config.get("audio", {})
             )
 
         self.audio = self._ledfx.audio
+        super().activate(channel)
+        if self._audio_features is None:
+            self._audio_features = self.AUDIO_FEATURES
+            self.audio.add_features(self._audio_features)
         self._ledfx.audio.subscribe(self._audio_data_updated)
 
     def deactivate(self):
         _LOGGER.info("Deactivating AudioReactiveEffect.")
         if self.audio:
             self.audio.unsubscribe(self._audio_data_updated)
+            if self._audio_features is not None:
+                self.audio.remove_features(self._audio_features)
+                self._audio_features = None
         super().deactivate()
 
     def create_filter(self, alpha_decay, alpha_rise):
-        # TODO: Since most effects reuse the same general filters it would be
-        # nice for all that computation to be shared. This mean that shared
-        # filters are needed, or if there is really just a small set of filters
-        # that those get added to the Melbank input source instead.
+        # Filters of the audio source's own signals (powers, melbanks) should
+        # use the shared filters of audio.filtered_signal instead, this is
+        # for signals specific to the effect.
         return ExpFilter(alpha_decay=alpha_decay, alpha_rise=alpha_rise)
 
     def _audio_data_updated(self):
-        self.melbank.cache_clear()
-        if self.is_active:
+        # sharded effects are driven by their copy in the render shard, and
+        # grouped effects by their group's leader
+        if (
+            self.is_active
+            and self._shard is None
+            and (
+                self._render_group is None or self._render_group.leader is self
+            )
+        ):
             self.audio_data_updated(self.audio)
 
     def audio_data_updated(self, data):
@@ -783,8 +1417,6 @@ class AudioReactiveEffect(Effect):
             if hasattr(self, prop):
                 delattr(self, prop)
 
-        self._melbank_interp_linspaces.cache_clear()
-
     @cached_property
     def _selected_melbank(self):
         return next(
@@ -833,34 +1465,42 @@ class AudioReactiveEffect(Effect):
     def _input_mel_length(self):
         return self._melbank_max_idx - self._melbank_min_idx
 
-    @lru_cache(maxsize=16)
-    def _melbank_interp_linspaces(self, size):
-        old = np.linspace(0, 1, self._input_mel_length)
-        new = np.linspace(0, 1, size)
-        return (new, old)
-
-    @lru_cache(maxsize=None)
     def melbank(self, filtered=False, size=0):
         """
         This little bit of code pulls together information from the effect's
         virtual (which controls the audio frequency range), and uses that
-        to deliver the melbank, correctly selected and interpolated, to the effect
+        to deliver the melbank, correctly selected and interpolated, to the effect.
+        The result is shared with other effects that use the same frequency
+        range and size, so it is read-only.
 
         size, int      : interpolate the melbank to the target size. value of 0 is no interpolation
         filtered, bool : melbank with smoothed attack and decay
         """
-        if filtered:
-            melbank = self.audio.melbanks.melbanks_filtered[
-                self._selected_melbank
-            ][self._melbank_min_idx : self._melbank_max_idx]
-        else:
-            melbank = self.audio.melbanks.melbanks[self._selected_melbank][
-                self._melbank_min_idx : self._melbank_max_idx
-            ]
-        if size and (self._input_mel_length != size):
-            return np.interp(*self._melbank_interp_linspaces(size), melbank)
-        else:
-            return melbank
+        return self.audio.melbank_view(
+            self._selected_melbank,
+            self._melbank_min_idx,
+            self._melbank_max_idx,
+            size,
+            filtered,
+        )
+
+    def filtered_melbank(
+        self, alpha_decay, alpha_rise, filtered=False, size=0
+    ):
+        """
+        melbank() smoothed by an ExpFilter, shared with the other effects
+        that use the same frequency range, size and smoothing
+        """
+        return self.audio.filtered_signal(
+            "melbank_view",
+            alpha_decay,
+            alpha_rise,
+            melbank=self._selected_melbank,
+            min_idx=self._melbank_min_idx,
+            max_idx=self._melbank_max_idx,
+            size=size,
+            filtered=filtered,
+        )
 
     def melbank_thirds(self, **kwargs):
         """
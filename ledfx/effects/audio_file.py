@@ -0,0 +1,261 @@
+import logging
+import os
+import stat
+import sys
+import threading
+import time
+import wave
+
+import numpy as np
+
+_LOGGER = logging.getLogger(__name__)
+
+# Raw PCM sample formats for pipes, as numpy dtypes and their full scale
+RAW_FORMATS = {
+    "s16le": (np.dtype("<i2"), 2**15),
+    "s32le": (np.dtype("<i4"), 2**31),
+    "f32le": (np.dtype("<f4"), 1),
+}
+
+# A stream in real time that falls further than this behind, eg. because
+# the machine was suspended, skips ahead rather than catching up
+MAX_REALTIME_LAG = 0.5
+
+
+class _WaveReader:
+    """Reads integer PCM WAV files with the standard library"""
+
+    def __init__(self, path):
+        self._wave = wave.open(path, "rb")
+        self.samplerate = self._wave.getframerate()
+        self._channels = self._wave.getnchannels()
+        self._width = self._wave.getsampwidth()
+        if self._width not in (1, 2, 3, 4):
+            raise wave.Error(f"Unsupported sample width: {self._width}")
+
+    def read(self, frames):
+        data = self._wave.readframes(frames)
+        if self._width == 1:
+            # 8 bit WAVs are unsigned
+            samples = np.frombuffer(data, dtype=np.uint8)
+            samples = samples.astype(np.float32) - 128
+        elif self._width == 3:
+            # pad 24 bit samples out to 32 bits
+            padded = np.zeros((len(data) // 3, 4), dtype=np.uint8)
+            padded[:, 1:] = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3)
+            samples = padded.view("<i4").ravel().astype(np.float32)
+            samples /= 2**8
+        else:
+            samples = np.frombuffer(data, dtype=f"<i{self._width}")
+            samples = samples.astype(np.float32)
+        samples /= 2 ** (8 * self._width - 1)
+        return samples.reshape(-1, self._channels).mean(axis=1)
+
+    def rewind(self):
+        self._wave.rewind()
+        return True
+
+    def close(self):
+        self._wave.close()
+
+
+class _SoundFileReader:
+    """Reads FLAC, OGG and other formats through the soundfile package"""
+
+    def __init__(self, path):
+        import soundfile
+
+        self._file = soundfile.SoundFile(path)
+        self.samplerate = self._file.samplerate
+
+    def read(self, frames):
+        samples = self._file.read(frames, dtype="float32", always_2d=True)
+        return samples.mean(axis=1)
+
+    def rewind(self):
+        self._file.seek(0)
+        return True
+
+    def close(self):
+        self._file.close()
+
+
+class _RawReader:
+    """Reads raw interleaved PCM from a pipe, stdin or file"""
+
+    def __init__(self, path, samplerate, sample_format, channels):
+        self._path = path
+        self._closed = False
+        if path == "-":
+            self._file = sys.stdin.buffer
+        elif stat.S_ISFIFO(os.stat(path).st_mode):
+            # opening a named pipe blocks until its writer opens it too, so
+            # it's opened by the first read, on the stream's thread
+            self._file = None
+        else:
+            self._file = open(path, "rb")
+        self.samplerate = samplerate
+        self._dtype, self._scale = RAW_FORMATS[sample_format]
+        self._channels = channels
+
+    def read(self, frames):
+        if self._file is None:
+            file = open(self._path, "rb")
+            if self._closed:
+                file.close()
+                return np.zeros(0, dtype=np.float32)
+            self._file = file
+        size = frames * self._channels * self._dtype.itemsize
+        data = bytearray()
+        # pipes return whatever has been written so far, so keep reading
+        # until the block is complete or the writer has closed the pipe
+        while len(data) < size:
+            chunk = self._file.read(size - len(data))
+            if not chunk:
+                break
+            data.extend(chunk)
+        # drop any partial frame left at the end of the stream
+        data = data[: len(data) - len(data) % (size // frames)]
+        samples = np.frombuffer(data, dtype=self._dtype).astype(np.float32)
+        samples /= self._scale
+        return samples.reshape(-1, self._channels).mean(axis=1)
+
+    def rewind(self):
+        if (
+            self._file is None
+            or self._file is sys.stdin.buffer
+            or not self._file.seekable()
+        ):
+            return False
+        self._file.seek(0)
+        return True
+
+    def close(self):
+        self._closed = True
+        if self._file is not None and self._file is not sys.stdin.buffer:
+            self._file.close()
+
+
+def open_audio_file(path, raw_samplerate, raw_format, raw_channels):
+    """
+    Opens a reader for path. "-", named pipes and .raw/.pcm files are read
+    as raw PCM, WAV files with the standard library, and everything else
+    (eg. FLAC) with the optional soundfile package.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if (
+        path == "-"
+        or extension in (".raw", ".pcm")
+        or stat.S_ISFIFO(os.stat(path).st_mode)
+    ):
+        return _RawReader(path, raw_samplerate, raw_format, raw_channels)
+    if extension == ".wav":
+        try:
+            return _WaveReader(path)
+        except wave.Error:
+            # eg. floating point WAVs, which soundfile can read
+            pass
+    try:
+        return _SoundFileReader(path)
+    except ImportError:
+        raise OSError(
+            f"Unable to read {path}: only WAV files and raw PCM can be read "
+            "without the soundfile package installed"
+        )
+
+
+class FileAudioStream:
+    """
+    Streams audio from a file or pipe to an audio sample callback, from its
+    own thread, in blocks of 1/sample_rate seconds. Has the same interface
+    as a sounddevice InputStream, so that it can stand in for one.
+
+    realtime: pace the blocks at the rate of the audio. Otherwise blocks are
+              sent as fast as throttle() allows, for deterministic runs
+    loop    : start again from the beginning at the end of the file. Pipes
+              can't be looped, and the stream ends with the pipe.
+    """
+
+    def __init__(
+        self,
+        reader,
+        callback,
+        sample_rate,
+        realtime=True,
+        loop=True,
+        throttle=None,
+    ):
+        self._reader = reader
+        self._callback = callback
+        self._realtime = realtime
+        self._loop = loop
+        self._throttle = throttle
+        self.samplerate = reader.samplerate
+        self.blocksize = int(reader.samplerate / sample_rate)
+        self._thread = None
+        self._active = False
+        self.finished = threading.Event()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._active = True
+        self.finished.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="LedFx Audio File", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._active = False
+        thread = self._thread
+        self._thread = None
+        if thread is not None and thread is not threading.current_thread():
+            # a pipe blocked waiting for its writer can't be interrupted, so
+            # don't wait on it forever
+            thread.join(timeout=1)
+
+    def close(self):
+        self.stop()
+        self._reader.close()
+
+    def _read_block(self):
+        """Returns the next full block, or None at the end of the stream"""
+        block = self._reader.read(self.blocksize)
+        while len(block) < self.blocksize:
+            if not (self._loop and self._reader.rewind()):
+                if len(block) == 0:
+                    return None
+                # pad out the last block of the stream with silence
+                return np.pad(block, (0, self.blocksize - len(block)))
+            rest = self._reader.read(self.blocksize - len(block))
+            if len(rest) == 0:
+                # an empty file
+                return None
+            block = np.concatenate((block, rest))
+        return block
+
+    def _run(self):
+        period = self.blocksize / self.samplerate
+        deadline = time.perf_counter()
+        try:
+            while self._active:
+                block = self._read_block()
+                if block is None:
+                    _LOGGER.info("Audio file input finished.")
+                    break
+                if self._realtime:
+                    deadline += period
+                    delay = deadline - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    elif delay < -MAX_REALTIME_LAG:
+                        deadline = time.perf_counter()
+                elif self._throttle is not None:
+                    self._throttle()
+                if self._active:
+                    self._callback(block, len(block), None, None)
+        except (OSError, ValueError) as e:
+            _LOGGER.error(f"Audio file input failed: {e}")
+        finally:
+            self.finished.set()
@@ -9,6 +9,7 @@ class BarAudioEffect(AudioReactiveEffect, GradientEffect):
 
     NAME = "Bar"
     CATEGORY = "BPM"
+    AUDIO_FEATURES = ("bar_oscillator",)
 
     CONFIG_SCHEMA = vol.Schema(
         {
@@ -18,6 +18,7 @@ class BladePowerPlus(AudioReactiveEffect, HSVEffect):
 
     NAME = "Blade Power+"
     CATEGORY = "Classic"
+    AUDIO_FEATURES = ("freq_power",)
 
     _power_funcs = {
         "Beat": "beat_power",
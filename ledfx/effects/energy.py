@@ -9,6 +9,7 @@ class EnergyAudioEffect(AudioReactiveEffect):
 
     NAME = "Energy"
     CATEGORY = "Classic"
+    AUDIO_FEATURES = ("melbanks", "volume_beat_now")
 
     CONFIG_SCHEMA = vol.Schema(
         {
@@ -9,6 +9,7 @@ class Energy2(AudioReactiveEffect, HSVEffect):
 
     NAME = "Energy 2"
     CATEGORY = "Atmospheric"
+    AUDIO_FEATURES = ("freq_power",)
 
     CONFIG_SCHEMA = vol.Schema(
         {
@@ -27,11 +28,10 @@ class Energy2(AudioReactiveEffect, HSVEffect):
 
     def config_updated(self, config):
         self._lows_power = 0
-        self._lows_filter = self.create_filter(alpha_decay=0.1, alpha_rise=0.1)
 
     def audio_data_updated(self, data):
-        self._lows_power = self._lows_filter.update(
-            data.lows_power(filtered=False)
+        self._lows_power = data.filtered_signal(
+            "lows_power", alpha_decay=0.1, alpha_rise=0.1, filtered=False
         )
 
     def render_hsv(self):
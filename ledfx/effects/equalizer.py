@@ -35,8 +35,9 @@ class EQAudioEffect(AudioReactiveEffect, GradientEffect):
 
     def audio_data_updated(self, data):
         # Grab the filtered melbank
-        self.r = self.melbank(filtered=True, size=self.pixel_count)
-        np.clip(self.r, 0, 1, out=self.r)
+        self.r = np.clip(
+            self.melbank(filtered=True, size=self.pixel_count), 0, 1
+        )
 
     def render(self):
         r_split = np.array_split(self.r, self._config["gradient_repeat"])
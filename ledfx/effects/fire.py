@@ -11,6 +11,7 @@ class Fire(AudioReactiveEffect, HSVEffect):
 
     NAME = "Fire"
     CATEGORY = "Atmospheric"
+    AUDIO_FEATURES = ("freq_power",)
 
     CONFIG_SCHEMA = vol.Schema(
         {
@@ -45,9 +46,6 @@ class Fire(AudioReactiveEffect, HSVEffect):
         self.speed = self._config["speed"]
         self.cooling = 0.95
         self._lows_power = 0
-        self._lows_filter = self.create_filter(
-            alpha_decay=0.05, alpha_rise=0.99
-        )
 
         self.spark_count = self._config["intensity"]
         self.color_shift = self._config["color_shift"]
@@ -55,8 +53,8 @@ class Fire(AudioReactiveEffect, HSVEffect):
         self.sparkX = np.zeros(self.spark_count)
 
     def audio_data_updated(self, data):
-        _lows_power = self._lows_filter.update(
-            np.mean(data.lows_power(filtered=False))
+        _lows_power = data.filtered_signal(
+            "lows_power", alpha_decay=0.05, alpha_rise=0.99, filtered=False
         )
         self.cooling = 0.75 + _lows_power * 0.25
         self.accel = 0.02 + _lows_power * 0.1
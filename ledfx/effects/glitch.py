@@ -11,6 +11,7 @@ class Glitch(AudioReactiveEffect, HSVEffect):
 
     NAME = "Glitch"
     CATEGORY = "Atmospheric"
+    AUDIO_FEATURES = ("freq_power",)
 
     CONFIG_SCHEMA = vol.Schema(
         {
@@ -9,6 +9,7 @@ class Lavalamp(AudioReactiveEffect, HSVEffect):
 
     NAME = "Lava lamp"
     CATEGORY = "Atmospheric"
+    AUDIO_FEATURES = ("freq_power",)
 
     CONFIG_SCHEMA = vol.Schema(
         {
@@ -32,15 +33,14 @@ class Lavalamp(AudioReactiveEffect, HSVEffect):
 
     def config_updated(self, config):
         self._lows_power = 0
-        reactivity = self._config["reactivity"]
-        self._lows_filter = self.create_filter(
-            alpha_decay=0.05, alpha_rise=reactivity
-        )
         self._contrast = 1 - self._config["contrast"]
 
     def audio_data_updated(self, data):
-        self._lows_power = self._lows_filter.update(
-            data.lows_power(filtered=False)
+        self._lows_power = data.filtered_signal(
+            "lows_power",
+            alpha_decay=0.05,
+            alpha_rise=self._config["reactivity"],
+            filtered=False,
         )
 
     def render_hsv(self):
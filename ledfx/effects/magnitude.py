@@ -8,6 +8,7 @@ class MagnitudeAudioEffect(AudioReactiveEffect, GradientEffect):
 
     NAME = "Magnitude"
     CATEGORY = "Classic"
+    AUDIO_FEATURES = ("freq_power",)
 
     _power_funcs = {
         "Beat": "beat_power",
@@ -4,8 +4,17 @@ import numpy as np
 
 
 @lru_cache(maxsize=64)
-def _normalized_linspace(size):
-    return np.linspace(0, 1, size)
+def _resampling_map(old_length, new_length):
+    """
+    Precomputes linear interpolation between two lengths as the pair of
+    neighbouring old indices for each new pixel, and the weight of the
+    upper one
+    """
+    positions = np.linspace(0, old_length - 1, new_length)
+    lower = np.minimum(positions.astype(int), max(old_length - 2, 0))
+    upper = np.minimum(lower + 1, old_length - 1)
+    weight = (positions - lower)[:, np.newaxis]
+    return lower, upper, weight
 
 
 def interpolate_pixels(pixels, new_length):
@@ -13,13 +22,14 @@ def interpolate_pixels(pixels, new_length):
     if len(pixels) == new_length:
         return pixels
 
-    x_old = _normalized_linspace(len(pixels))
-    x_new = _normalized_linspace(new_length)
-    new_pixels = np.zeros((len(x_new), pixels.shape[1]))
-
-    new_pixels[:, 0] = np.interp(x_new, x_old, pixels[:, 0])
-    new_pixels[:, 1] = np.interp(x_new, x_old, pixels[:, 1])
-    new_pixels[:, 2] = np.interp(x_new, x_old, pixels[:, 2])
+    lower, upper, weight = _resampling_map(len(pixels), new_length)
+    dtype = np.result_type(pixels.dtype, np.float32)
+    lower_pixels = pixels.take(lower, axis=0).astype(dtype, copy=False)
+    new_pixels = np.subtract(
+        pixels.take(upper, axis=0), lower_pixels, dtype=dtype
+    )
+    new_pixels *= weight
+    new_pixels += lower_pixels
 
     return new_pixels
 
@@ -51,3 +61,41 @@ class ExpFilter:
         self.value = alpha * value + (1.0 - alpha) * self.value
 
         return self.value
+
+
+class InplaceExpFilter:
+    """
+    ExpFilter for a fixed shape of array, that updates a preallocated
+    value in place rather than allocating a new one on every update
+    """
+
+    def __init__(self, shape, alpha_decay=0.5, alpha_rise=0.5):
+        assert 0.0 < alpha_decay < 1.0, "Invalid decay smoothing factor"
+        assert 0.0 < alpha_rise < 1.0, "Invalid rise smoothing factor"
+        self.alpha_decay = alpha_decay
+        self.alpha_rise = alpha_rise
+        self.value = np.zeros(shape)
+        self._rising = np.zeros(shape, dtype=bool)
+        self._alpha = np.zeros(shape)
+        self._delta = np.zeros(shape)
+        self._initialised = False
+
+    def update(self, value):
+        # Handle deferred initilization
+        if not self._initialised:
+            np.copyto(self.value, value)
+            self._initialised = True
+            return self.value
+
+        # value * alpha + self.value * (1 - alpha), with alpha picked per
+        # element depending on whether it is rising or decaying
+        np.greater(value, self.value, out=self._rising)
+        np.multiply(
+            self._rising, self.alpha_rise - self.alpha_decay, out=self._alpha
+        )
+        self._alpha += self.alpha_decay
+        np.subtract(value, self.value, out=self._delta)
+        self._delta *= self._alpha
+        self.value += self._delta
+
+        return self.value
@@ -12,7 +12,7 @@ import voluptuous as vol
 
 import ledfx.effects.mel as mel
 from ledfx.effects import fast_blur_array
-from ledfx.effects.math import ExpFilter
+from ledfx.effects.math import InplaceExpFilter
 from ledfx.events import GraphUpdateEvent
 
 # Since fft size and mic rate are tightly linked to melbank resolution,
@@ -21,6 +21,9 @@ from ledfx.events import GraphUpdateEvent
 # I've forced fft to use mic rate of 30000Hz even if mic is actually ~40000Hz.
 # This increases frequency resolution a lot and reduces latency a bit,
 # improved resolution is noticable for bass, where frequency differs by only 10s of Hz
+# With the native_rate audio option, inputs at MIC_RATE or above are analysed
+# at their own rate instead, and the filterbanks are built for that rate.
+# MAX_FREQ is the top of the melbanks either way.
 
 # these parameters are hard coded and will break configs if changed
 
@@ -94,8 +97,11 @@ class Melbank:
         extra=vol.ALLOW_EXTRA,
     )
 
-    def __init__(self, audio, config):
-        """Initialize all the melbank related variables"""
+    def __init__(self, audio, config, sample_rate=MIC_RATE, fft_size=FFT_SIZE):
+        """
+        Initialize all the melbank related variables, for a spectrum of
+        fft_size computed from audio at sample_rate
+        """
         self._audio = audio
         self._config = self.MELBANK_CONFIG_SCHEMA(config)
 
@@ -121,10 +127,10 @@ class Melbank:
             ).astype(np.float32)
 
             self.filterbank = aubio.filterbank(
-                self._config["samples"], FFT_SIZE
+                self._config["samples"], fft_size
             )
             self.filterbank.set_triangle_bands(
-                self.melbank_frequencies, MIC_RATE
+                self.melbank_frequencies, sample_rate
             )
             self.melbank_frequencies = self.melbank_frequencies[1:-1]
 
@@ -139,18 +145,18 @@ class Melbank:
             ).astype(np.float32)
 
             self.filterbank = aubio.filterbank(
-                self._config["samples"], FFT_SIZE
+                self._config["samples"], fft_size
             )
             self.filterbank.set_triangle_bands(
-                self.melbank_frequencies, MIC_RATE
+                self.melbank_frequencies, sample_rate
             )
             self.melbank_frequencies = self.melbank_frequencies[1:-1]
 
         # Slaney coefficients will always produce 40 samples spanning 133Hz to
         # 6000Hz
         if self._config["coeffs_type"] == "slaney":
-            self.filterbank = aubio.filterbank(40, FFT_SIZE)
-            self.filterbank.set_mel_coeffs_slaney(MIC_RATE)
+            self.filterbank = aubio.filterbank(40, fft_size)
+            self.filterbank.set_mel_coeffs_slaney(sample_rate)
 
             # Sanley frequencies are linear-log spaced where 133Hz to 1000Hz is linear
             # spaced and 1000Hz to 6000Hz is log spaced. It also produced a hardcoded
@@ -175,10 +181,10 @@ class Melbank:
         # Standard mel coefficients
         if self._config["coeffs_type"] == "mel":
             self.filterbank = aubio.filterbank(
-                self._config["samples"], FFT_SIZE
+                self._config["samples"], fft_size
             )
             self.filterbank.set_mel_coeffs(
-                MIC_RATE,
+                sample_rate,
                 self._config["min_frequency"],
                 self._config["max_frequency"],
             )
@@ -196,10 +202,10 @@ class Melbank:
         # HTK mel coefficients
         if self._config["coeffs_type"] == "htk":
             self.filterbank = aubio.filterbank(
-                self._config["samples"], FFT_SIZE
+                self._config["samples"], fft_size
             )
             self.filterbank.set_mel_coeffs_htk(
-                MIC_RATE,
+                sample_rate,
                 self._config["min_frequency"],
                 self._config["max_frequency"],
             )
@@ -220,11 +226,11 @@ class Melbank:
                 num_mel_bands=self._config["samples"],
                 freq_min=self._config["min_frequency"],
                 freq_max=self._config["max_frequency"],
-                num_fft_bands=int(FFT_SIZE // 2) + 1,
-                sample_rate=MIC_RATE,
+                num_fft_bands=int(fft_size // 2) + 1,
+                sample_rate=sample_rate,
             )
             self.filterbank = aubio.filterbank(
-                self._config["samples"], FFT_SIZE
+                self._config["samples"], fft_size
             )
             self.filterbank.set_coeffs(melmat.astype(np.float32))
             self.melbank_frequencies = center_frequencies_hz
@@ -250,10 +256,10 @@ class Melbank:
             ).astype(np.float32)
 
             self.filterbank = aubio.filterbank(
-                self._config["samples"], FFT_SIZE
+                self._config["samples"], fft_size
             )
             self.filterbank.set_triangle_bands(
-                self.melbank_frequencies, MIC_RATE
+                self.melbank_frequencies, sample_rate
             )
             self.melbank_frequencies = self.melbank_frequencies[1:-1]
 
@@ -277,10 +283,10 @@ class Melbank:
             ).astype(np.float32)
 
             self.filterbank = aubio.filterbank(
-                self._config["samples"], FFT_SIZE
+                self._config["samples"], fft_size
             )
             self.filterbank.set_triangle_bands(
-                self.melbank_frequencies, MIC_RATE
+                self.melbank_frequencies, sample_rate
             )
             self.melbank_frequencies = self.melbank_frequencies[1:-1]
 
@@ -299,13 +305,13 @@ class Melbank:
             ) = mel.compute_melmat_from_range(
                 lower_edges_hz=lower_edges_hz,
                 upper_edges_hz=upper_edges_hz,
-                num_fft_bands=int(FFT_SIZE // 2) + 1,
-                sample_rate=MIC_RATE,
+                num_fft_bands=int(fft_size // 2) + 1,
+                sample_rate=sample_rate,
             )
 
             self._config["samples"] = len(center_frequencies_hz)
             self.filterbank = aubio.filterbank(
-                self._config["samples"], FFT_SIZE
+                self._config["samples"], fft_size
             )
             self.filterbank.set_coeffs(melmat.astype(np.float32))
             self.melbank_frequencies = center_frequencies_hz
@@ -325,13 +331,13 @@ class Melbank:
             ) = mel.compute_melmat_from_range(
                 lower_edges_hz=lower_edges_hz,
                 upper_edges_hz=upper_edges_hz,
-                num_fft_bands=int(FFT_SIZE // 2) + 1,
-                sample_rate=MIC_RATE,
+                num_fft_bands=int(fft_size // 2) + 1,
+                sample_rate=sample_rate,
             )
 
             self._config["samples"] = len(center_frequencies_hz)
             self.filterbank = aubio.filterbank(
-                self._config["samples"], FFT_SIZE
+                self._config["samples"], fft_size
             )
             self.filterbank.set_coeffs(melmat.astype(np.float32))
             self.melbank_frequencies = center_frequencies_hz
@@ -369,12 +375,6 @@ class Melbank:
             ):
                 self.highs_index = i + 1
 
-        # Build up some of the common filters
-        self.mel_gain = ExpFilter(alpha_decay=0.01, alpha_rise=0.99)
-        self.mel_smoothing = ExpFilter(alpha_decay=0.7, alpha_rise=0.99)
-        self.common_filter = ExpFilter(alpha_decay=0.99, alpha_rise=0.01)
-        self.diff_filter = ExpFilter(alpha_decay=0.15, alpha_rise=0.99)
-
         # # the simplest pre emphasis. clean and fast.
         # if self._config["pre_emphasis"] != 0:
         #     self.pre_emphasis = np.arange(self._config["samples"])
@@ -388,30 +388,10 @@ class Melbank:
         # else:
         #     self.pre_emphasis = np.ones(self._config["samples"])
 
-    def __call__(self, frequency_domain, filter_banks, filter_banks_filtered):
-        """
-        computes the melbank curve for frequency domain .
-        this function has been modified a bit to make sure all operations
-        are applied to filter_banks in place
-        """
-
-        # Compute the filterbank from the frequency information.
-        filter_banks[:] = self.filterbank(frequency_domain)
-
-        np.power(
-            filter_banks,
-            self.power_factor,
-            out=filter_banks,
-        )
-
-        self.mel_gain.update(np.max(fast_blur_array(filter_banks, sigma=1.0)))
-        filter_banks /= self.mel_gain.value
-        filter_banks[:] = self.mel_smoothing.update(filter_banks)
-
-        self.common_filter.update(filter_banks)
-        filter_banks_filtered[:] = self.diff_filter.update(
-            filter_banks - self.common_filter.value
-        )
+    @property
+    def coeffs(self):
+        """The filterbank coefficients, one row per melbank sample"""
+        return self.filterbank.get_coeffs()
 
 
 class Melbanks:
@@ -451,6 +431,10 @@ class Melbanks:
     def update_config(self, config):
         # validate config
         self._config = self.CONFIG_SCHEMA(config)
+        # the filterbanks are built for the rate and fft size the audio is
+        # analysed at
+        self.sample_rate = self._audio.analysis_rate
+        self.fft_size = self._audio._config["fft_size"]
         # set up the melbanks
         self.melbank_processors = tuple(
             Melbank(
@@ -462,44 +446,111 @@ class Melbanks:
                         # "pre_emphasis": self.MELBANK_PRE_EMPHASIS[i],
                     },
                 },
+                self.sample_rate,
+                self.fft_size,
             )
             for i, freq in enumerate(self._config["max_frequencies"])
         )
         # some useful info that will be accessed faster as variables
         self.mel_count = len(self._config["max_frequencies"])
-        self.mel_len = self.DEFAULT_MELBANK_CONFIG["samples"]
+        self.mel_len = len(self.melbank_processors[0].coeffs)
+        shape = (self.mel_count, self.mel_len)
+
+        # All the melbanks are computed at once, by a single matrix multiply
+        # of their stacked coefficients with the spectrum. Only the FFT bins
+        # that any filter covers are multiplied.
+        coeffs = np.concatenate(
+            [processor.coeffs for processor in self.melbank_processors]
+        )
+        bins = np.flatnonzero(np.any(coeffs, axis=0))
+        if len(bins) == 0:
+            bins = np.zeros(1, dtype=int)
+        self._fft_bins = slice(bins[0], bins[-1] + 1)
+        self._coeffs = np.ascontiguousarray(coeffs[:, self._fft_bins])
+        self._filterbank_output = np.zeros(len(coeffs), dtype=np.float32)
+        self._power_factors = np.array(
+            [processor.power_factor for processor in self.melbank_processors]
+        )[:, np.newaxis]
+
+        # blurring each melbank is a multiply with a precomputed blur matrix
+        self._blur_matrix = np.array(
+            [
+                fast_blur_array(impulse, sigma=1.0)
+                for impulse in np.eye(self.mel_len)
+            ]
+        )
+        self._blurred = np.zeros(shape)
+        self._peaks = np.zeros(self.mel_count)
+        self._differences = np.zeros(shape)
+
+        # Build up some of the common filters, for all melbanks at once
+        self.mel_gain = InplaceExpFilter(
+            self.mel_count, alpha_decay=0.01, alpha_rise=0.99
+        )
+        self.mel_smoothing = InplaceExpFilter(
+            shape, alpha_decay=0.7, alpha_rise=0.99
+        )
+        self.common_filter = InplaceExpFilter(
+            shape, alpha_decay=0.99, alpha_rise=0.01
+        )
+        self.diff_filter = InplaceExpFilter(
+            shape, alpha_decay=0.15, alpha_rise=0.99
+        )
+
         # set up melbank data buffers.
-        # these are stored as numpy arrays in a tuple to allow direct access to the buffers
-        self.melbanks = tuple(
-            np.zeros(self.mel_len) for _ in range(self.mel_count)
+        # these are stored as numpy arrays in a tuple to allow direct access
+        # to the buffers, each is a row of the stacked melbanks
+        self._melbanks = np.zeros(shape)
+        self._melbanks_filtered = np.zeros(shape)
+        self.melbanks = tuple(self._melbanks)
+        self.melbanks_filtered = tuple(self._melbanks_filtered)
+
+    def _update_melbanks(self, frequency_domain):
+        """
+        computes the melbank curves for frequency domain.
+        all operations are applied to the stacked melbanks in place
+        """
+        melbanks = self._melbanks
+
+        # Compute the filterbanks from the frequency information.
+        np.matmul(
+            self._coeffs,
+            frequency_domain.norm[self._fft_bins],
+            out=self._filterbank_output,
         )
-        self.melbanks_filtered = tuple(
-            np.zeros(self.mel_len) for _ in range(self.mel_count)
+        np.power(
+            self._filterbank_output.reshape(melbanks.shape),
+            self._power_factors,
+            out=melbanks,
         )
 
+        np.matmul(melbanks, self._blur_matrix, out=self._blurred)
+        np.max(self._blurred, axis=1, out=self._peaks)
+        melbanks /= self.mel_gain.update(self._peaks)[:, np.newaxis]
+        melbanks[:] = self.mel_smoothing.update(melbanks)
+
+        np.subtract(
+            melbanks,
+            self.common_filter.update(melbanks),
+            out=self._differences,
+        )
+        self._melbanks_filtered[:] = self.diff_filter.update(self._differences)
+
     def __call__(self):
-        # fastest way i could think of.
-        # melbank function is directly referenced by the self.melbanks tuple.
-        # melbank function is given the data buffer to operate directly on
-        # rather than returning and assigning the data.
         frequency_domain = self._audio._frequency_domain
         volume = (
             self._audio.volume(filtered=True)
             > self._audio._config["min_volume"]
         )
 
-        for i in range(self.mel_count):
-            if volume:
-                self.melbank_processors[i](
-                    frequency_domain,
-                    self.melbanks[i],
-                    self.melbanks_filtered[i],
-                )
-            else:
-                self.melbanks[i][:] = 0
-                self.melbanks_filtered[i][:] = 0
+        if volume:
+            self._update_melbanks(frequency_domain)
+        else:
+            self._melbanks[:] = 0
+            self._melbanks_filtered[:] = 0
 
-            if self._ledfx.dev_enabled():
+        if self._ledfx.dev_enabled():
+            for i in range(self.mel_count):
                 self._ledfx.events.fire_event(
                     GraphUpdateEvent(
                         f"melbank_{i}",
@@ -9,6 +9,7 @@ class MultiBarAudioEffect(AudioReactiveEffect, GradientEffect):
 
     NAME = "Multicolor Bar"
     CATEGORY = "BPM"
+    AUDIO_FEATURES = ("bar_oscillator",)
 
     CONFIG_SCHEMA = vol.Schema(
         {
@@ -10,6 +10,7 @@ class PitchSpectrumAudioEffect(AudioReactiveEffect, GradientEffect):
 
     NAME = "Pitch Spectrum"
     CATEGORY = "Classic"
+    AUDIO_FEATURES = ("melbanks", "pitch")
 
     CONFIG_SCHEMA = vol.Schema(
         {
@@ -10,6 +10,7 @@ class PowerAudioEffect(AudioReactiveEffect, GradientEffect):
 
     NAME = "Power"
     CATEGORY = "Classic"
+    AUDIO_FEATURES = ("melbanks", "freq_power", "onset")
 
     CONFIG_SCHEMA = vol.Schema(
         {
@@ -39,8 +40,6 @@ class PowerAudioEffect(AudioReactiveEffect, GradientEffect):
         self.onset = False
 
     def config_updated(self, config):
-        # Create the filters used for the effect
-        self._bass_filter = self.create_filter(alpha_decay=0.1, alpha_rise=0.8)
         self.sparks_color = parse_color(self._config["sparks_color"])
 
     def audio_data_updated(self, data):
@@ -55,8 +54,9 @@ class PowerAudioEffect(AudioReactiveEffect, GradientEffect):
         # Fade bass overlay a little
         self.bass_overlay *= 0.95
         # Get bass power through filter
-        bass = np.max(data.lows_power(filtered=False))
-        bass = self._bass_filter.update(bass)
+        bass = data.filtered_signal(
+            "lows_power", alpha_decay=0.1, alpha_rise=0.8, filtered=False
+        )
         # Map it to the length of the overlay and apply it
         bass_idx = int(bass * self.pixel_count)
         self.bass_overlay[:bass_idx] = self.get_gradient_color(bass)
@@ -14,6 +14,7 @@ class Strobe(AudioReactiveEffect, GradientEffect):
 
     NAME = "Strobe"
     CATEGORY = "Classic"
+    AUDIO_FEATURES = ("volume_beat_now", "onset")
 
     CONFIG_SCHEMA = vol.Schema(
         {
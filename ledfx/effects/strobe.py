@@ -17,6 +17,7 @@ class Strobe(AudioReactiveEffect, GradientEffect):
 
     NAME = "BPM Strobe"
     CATEGORY = "BPM"
+    AUDIO_FEATURES = ("bar_oscillator",)
 
     CONFIG_SCHEMA = vol.Schema(
         {
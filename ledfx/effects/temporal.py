@@ -35,7 +35,12 @@ class TemporalEffect(Effect):
             # Treat the return value of the effect loop as a speed modifier
             # such that effects that are naturally faster or slower can have
             # a consistent feel.
-            sleepInterval = self.effect_loop()
+            # effects in a render group share their leader's frames
+            group = self._render_group
+            if group is None or group.leader is self:
+                sleepInterval = self.effect_loop()
+            else:
+                sleepInterval = None
             if sleepInterval is None:
                 sleepInterval = 1.0
             sleepInterval = sleepInterval * DEFAULT_RATE
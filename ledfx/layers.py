@@ -0,0 +1,104 @@
+import numpy as np
+import voluptuous as vol
+
+BLEND_MODES = ("add", "max", "multiply", "alpha")
+
+LAYER_SCHEMA = vol.Schema(
+    {
+        vol.Optional(
+            "blend_mode",
+            description="How the layer is combined with the layers below it",
+            default="add",
+        ): vol.In(BLEND_MODES),
+        vol.Optional(
+            "opacity",
+            description="Opacity of the layer",
+            default=1.0,
+        ): vol.All(vol.Coerce(float), vol.Range(min=0.0, max=1.0)),
+        vol.Optional(
+            "enabled",
+            description="Show the layer",
+            default=True,
+        ): bool,
+        vol.Optional(
+            "render_divisor",
+            description="Render the layer every n frames of the virtual, reusing its last frame in between",
+            default=1,
+        ): vol.All(int, vol.Range(min=1, max=16)),
+    }
+)
+
+
+class Layer:
+    """
+    An effect layered on top of a virtual's active effect. Layers are
+    composited in order, each one onto the result of the layers below it.
+    """
+
+    def __init__(self, effect, config):
+        self.effect = effect
+        self.config = LAYER_SCHEMA(config)
+        self._frame = None
+        self._scratch = None
+        self._alpha = None
+        self._frames_until_render = 0
+
+    def update_config(self, config):
+        self.config = LAYER_SCHEMA({**self.config, **config})
+        self._frames_until_render = 0
+
+    def _buffers(self, frame):
+        if self._scratch is None or self._scratch.shape != frame.shape:
+            self._frame = np.zeros_like(frame)
+            self._scratch = np.zeros_like(frame)
+            self._alpha = np.zeros((len(frame), 1), dtype=frame.dtype)
+            self._frames_until_render = 0
+
+    def frame(self, render, like):
+        """
+        Returns the layer's frame, rendering it with render(effect) once
+        every render_divisor calls
+        """
+        self._buffers(like)
+        if self._frames_until_render <= 0:
+            frame = render(self.effect)
+            if frame is not None:
+                np.clip(frame, 0, 255, out=self._frame, casting="unsafe")
+            self._frames_until_render = self.config["render_divisor"]
+        self._frames_until_render -= 1
+        return self._frame
+
+    def composite(self, frame, layer_frame):
+        """Blends the layer's frame onto frame in place"""
+        opacity = self.config["opacity"]
+        scratch = self._scratch
+        mode = self.config["blend_mode"]
+        if mode == "add":
+            np.multiply(layer_frame, opacity, out=scratch)
+            np.add(frame, scratch, out=frame)
+        elif mode == "max":
+            np.multiply(layer_frame, opacity, out=scratch)
+            np.maximum(frame, scratch, out=frame)
+        elif mode == "multiply":
+            # opacity fades between leaving frame as is and multiplying it
+            # by the layer scaled to 0-1
+            np.multiply(layer_frame, opacity / 255, out=scratch)
+            np.add(scratch, 1 - opacity, out=scratch)
+            np.multiply(frame, scratch, out=frame)
+        elif mode == "alpha":
+            # the brightest channel of each layer pixel is its alpha, so
+            # black is transparent and overlays can be drawn over the base
+            alpha = self._alpha
+            np.max(layer_frame, axis=1, keepdims=True, out=alpha)
+            np.multiply(alpha, opacity / 255, out=alpha)
+            np.subtract(layer_frame, frame, out=scratch)
+            np.multiply(scratch, alpha, out=scratch)
+            np.add(frame, scratch, out=frame)
+
+    def to_dict(self):
+        return {
+            "type": self.effect.type,
+            "name": self.effect.name,
+            "config": self.effect.config,
+            "layer": self.config,
+        }
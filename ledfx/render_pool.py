@@ -0,0 +1,381 @@
+import logging
+import multiprocessing
+import threading
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+
+import numpy as np
+
+from ledfx.events import Event
+from ledfx.utils import get_pixel_dtype
+
+_LOGGER = logging.getLogger(__name__)
+
+# Each shard's shared memory holds a small header followed by two pixel
+# frames. The worker renders into the frame that isn't currently published,
+# then publishes it by writing its index into the header.
+# header: [published frame index (-1 = none yet), last completed tick]
+HEADER = np.dtype((np.int64, 2))
+
+
+def _frame_buffers(memory, pixel_count, dtype):
+    header = np.ndarray((2,), dtype=np.int64, buffer=memory.buf)
+    frames = np.ndarray(
+        (2, pixel_count, 3),
+        dtype=dtype,
+        buffer=memory.buf,
+        offset=HEADER.itemsize,
+    )
+    return header, frames
+
+
+class EffectShard:
+    """
+    Main process handle for an effect rendered by a render pool worker.
+
+    Each call to frame() returns a copy of the most recent frame published
+    by the worker and, if the worker has finished the last one, requests the
+    next. Rendering is pipelined one frame behind the scheduler, so the
+    render threads never wait on a worker process.
+    """
+
+    def __init__(self, pool, worker, effect, virtual):
+        self._pool = pool
+        self._worker = worker
+        self.virtual_id = virtual.id
+        self.audio_reactive = hasattr(effect, "audio_data_updated")
+        self.pixel_count = virtual.pixel_count
+        self.dtype = get_pixel_dtype(pool._ledfx)
+        self._memory = shared_memory.SharedMemory(
+            create=True,
+            size=HEADER.itemsize
+            + 2 * self.pixel_count * 3 * np.dtype(self.dtype).itemsize,
+        )
+        # a virtual can have several sharded effects at once, during a
+        # transition or with layers, so shards are known by their memory
+        self.id = self._memory.name
+        self._header, self._frames = _frame_buffers(
+            self._memory, self.pixel_count, self.dtype
+        )
+        self._header[:] = (-1, 0)
+        self._ticks_sent = 0
+        self._closed = False
+
+        audio_layout = None
+        if self.audio_reactive:
+            from ledfx.effects.audio import AudioFeatureSnapshot
+
+            audio_layout = AudioFeatureSnapshot.layout(pool._ledfx.audio)
+
+        worker.send(
+            (
+                "attach",
+                self.id,
+                self.virtual_id,
+                effect.type,
+                effect.config,
+                self.pixel_count,
+                tuple(virtual.frequency_range),
+                virtual.refresh_rate,
+                audio_layout,
+            )
+        )
+
+    def frame(self):
+        if self._closed:
+            return np.zeros((self.pixel_count, 3), dtype=self.dtype)
+        published = self._header[0]
+        if published < 0:
+            frame = np.zeros((self.pixel_count, 3), dtype=self.dtype)
+        else:
+            frame = np.copy(self._frames[published])
+
+        if self._header[1] == self._ticks_sent:
+            if self.audio_reactive:
+                self._pool.broadcast_audio()
+            self._ticks_sent += 1
+            self._worker.send(("tick", self.id, self._ticks_sent))
+        return frame
+
+    def update_config(self, config):
+        self._worker.send(("config", self.id, config))
+
+    def update_frequency_range(self, frequency_range):
+        self._worker.send(("frequency_range", self.id, tuple(frequency_range)))
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._worker.send(("detach", self.id))
+        self._pool.release(self)
+        del self._header, self._frames
+        self._memory.close()
+        self._memory.unlink()
+
+
+class RenderWorker:
+    """A render pool worker process and its command queue"""
+
+    def __init__(self, context, colors, config, index):
+        self.index = index
+        self.pixel_load = 0
+        self.shards = 0
+        self._commands = context.Queue()
+        self._process = context.Process(
+            target=_worker_main,
+            args=(self._commands, colors, config),
+            name=f"ledfx-render-shard-{index}",
+            daemon=True,
+        )
+        self._process.start()
+
+    def send(self, command):
+        self._commands.put(command)
+
+    def stop(self, timeout=2):
+        self.send(("stop",))
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._commands.close()
+
+
+class RenderPool:
+    """
+    Opt-in pool of worker processes that render effects outside of the main
+    process, so that effect rendering isn't limited to the one core the GIL
+    allows.
+
+    Effects are sharded across the workers by pixel count as they are
+    activated. Audio features are broadcast to the workers once per audio
+    frame, and rendered frames are shared back through shared memory for
+    the main process to assemble and flush to devices.
+    """
+
+    def __init__(self, ledfx, processes):
+        self._ledfx = ledfx
+        self._lock = threading.Lock()
+        self._audio_frame = None
+        self._audio_subscribed = False
+        self._shards = []
+
+        context = multiprocessing.get_context("spawn")
+        colors = dict(ledfx.colors.items()) if hasattr(ledfx, "colors") else {}
+        config = {"pixel_dtype": ledfx.config.get("pixel_dtype", "float64")}
+        self._workers = [
+            RenderWorker(context, colors, config, i) for i in range(processes)
+        ]
+        _LOGGER.info(f"Render pool started with {processes} processes.")
+
+        def on_shutdown(e):
+            self.stop()
+
+        self._ledfx.events.add_listener(on_shutdown, Event.LEDFX_SHUTDOWN)
+
+    @staticmethod
+    def shardable(effect):
+        # Temporal effects run on their own clock thread, so they aren't
+        # driven by frame ticks
+        from ledfx.effects.temporal import TemporalEffect
+
+        return not isinstance(effect, TemporalEffect)
+
+    def attach(self, effect, virtual):
+        """
+        Moves rendering of an activated effect to the least loaded worker.
+        Returns the effect's shard, or None if it can't be sharded.
+        """
+        if not self.shardable(effect):
+            return None
+
+        with self._lock:
+            worker = min(self._workers, key=lambda w: w.pixel_load)
+            worker.pixel_load += virtual.pixel_count
+            worker.shards += 1
+            shard = EffectShard(self, worker, effect, virtual)
+            self._shards.append(shard)
+
+        _LOGGER.debug(
+            f"Effect {effect.NAME} on virtual {virtual.id} sharded to worker {worker.index}"
+        )
+        return shard
+
+    def release(self, shard):
+        with self._lock:
+            if shard not in self._shards:
+                return
+            self._shards.remove(shard)
+            shard._worker.pixel_load -= shard.pixel_count
+            shard._worker.shards -= 1
+
+            if self._audio_subscribed and not any(
+                s.audio_reactive for s in self._shards
+            ):
+                self._ledfx.audio.unsubscribe(self._on_audio_frame)
+                self._audio_subscribed = False
+
+    def broadcast_audio(self):
+        """
+        Makes sure audio features are being broadcast to the workers. Audio
+        is only subscribed to while an audio reactive effect is sharded.
+        """
+        if self._audio_subscribed or self._ledfx.audio is None:
+            return
+        with self._lock:
+            if not self._audio_subscribed:
+                self._ledfx.audio.subscribe(self._on_audio_frame)
+                self._audio_subscribed = True
+
+    def _on_audio_frame(self):
+        from ledfx.effects.audio import AudioFeatureSnapshot
+
+        state = AudioFeatureSnapshot.capture(self._ledfx.audio)
+        for worker in self._workers:
+            if worker.shards:
+                worker.send(("audio", state))
+
+    @property
+    def workers(self):
+        return {
+            worker.index: {
+                "shards": worker.shards,
+                "pixel_load": worker.pixel_load,
+            }
+            for worker in self._workers
+        }
+
+    def stop(self):
+        for shard in list(self._shards):
+            shard.close()
+        for worker in self._workers:
+            worker.stop()
+        _LOGGER.info("Render pool stopped.")
+
+
+class _WorkerLedFx:
+    """The parts of LedFx that effects rely on, inside a worker process"""
+
+    audio = None
+    render_pool = None
+
+    def __init__(self, colors, config):
+        self.colors = colors
+        self.config = config
+
+    def dev_enabled(self):
+        return False
+
+
+class _WorkerShard:
+    """Worker process side of an EffectShard"""
+
+    def __init__(self, effect, virtual, memory):
+        self.effect = effect
+        self.virtual = virtual
+        self.memory = memory
+        self.header, self.frames = _frame_buffers(
+            memory, virtual.pixel_count, get_pixel_dtype(effect._ledfx)
+        )
+
+    def render(self, tick):
+        self.effect.render()
+        pixels = self.effect.get_pixels()
+        target = 1 if self.header[0] == 0 else 0
+        if pixels is not None:
+            np.copyto(self.frames[target], pixels)
+            self.header[0] = target
+        self.header[1] = tick
+
+    def close(self):
+        self.effect.deactivate()
+        del self.header, self.frames
+        self.memory.close()
+
+
+def _worker_main(commands, colors, config):
+    """Entry point of a render pool worker process"""
+    from ledfx.effects import Effects
+    from ledfx.effects.audio import AudioFeatureSnapshot
+
+    ledfx = _WorkerLedFx(colors, config)
+    effects = Effects(ledfx)
+    shards = {}
+
+    while True:
+        command, *args = commands.get()
+        try:
+            if command == "tick":
+                shard_id, tick = args
+                shard = shards.get(shard_id)
+                if shard is not None:
+                    shard.render(tick)
+
+            elif command == "audio":
+                (state,) = args
+                if ledfx.audio is not None:
+                    ledfx.audio.update(state)
+
+            elif command == "attach":
+                (
+                    shard_id,
+                    virtual_id,
+                    effect_type,
+                    config,
+                    pixel_count,
+                    frequency_range,
+                    refresh_rate,
+                    audio_layout,
+                ) = args
+                if audio_layout is not None and ledfx.audio is None:
+                    ledfx.audio = AudioFeatureSnapshot(*audio_layout)
+                virtual = SimpleNamespace(
+                    id=virtual_id,
+                    pixel_count=pixel_count,
+                    frequency_range=_frequency_range(frequency_range),
+                    refresh_rate=refresh_rate,
+                )
+                effect = effects.create(
+                    ledfx=ledfx, type=effect_type, config=config
+                )
+                effect.activate(virtual)
+                shards[shard_id] = _WorkerShard(
+                    effect,
+                    virtual,
+                    shared_memory.SharedMemory(name=shard_id),
+                )
+
+            elif command == "config":
+                shard_id, config = args
+                shards[shard_id].effect.update_config(config)
+
+            elif command == "frequency_range":
+                shard_id, frequency_range = args
+                shard = shards[shard_id]
+                shard.virtual.frequency_range = _frequency_range(
+                    frequency_range
+                )
+                if hasattr(shard.effect, "clear_melbank_freq_props"):
+                    shard.effect.clear_melbank_freq_props()
+
+            elif command == "detach":
+                (shard_id,) = args
+                shard = shards.pop(shard_id, None)
+                if shard is not None:
+                    effects.destroy(shard.effect.id)
+                    shard.close()
+
+            elif command == "stop":
+                break
+
+        except Exception:
+            _LOGGER.exception(f"Render shard failed to handle '{command}'")
+
+    for shard in shards.values():
+        shard.close()
+
+
+def _frequency_range(frequency_range):
+    from ledfx.effects.melbank import FrequencyRange
+
+    return FrequencyRange(*frequency_range)
@@ -0,0 +1,353 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from ledfx.events import Event
+
+_LOGGER = logging.getLogger(__name__)
+
+# Sleeping is only accurate to around a millisecond (much worse on some
+# platforms), so the clock sleeps until this close to a deadline and then
+# spins for the remainder.
+SPIN_THRESHOLD = 0.0008
+
+# How many missed frames a bucket will render back to back to catch up
+# before giving up and skipping ahead to the next deadline.
+MAX_CATCH_UP_FRAMES = 4
+
+# Histogram bin edges, in milliseconds
+JITTER_BINS_MS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20)
+RENDER_BINS_MS = (0.5, 1, 2, 4, 8, 16, 33, 66)
+
+PACING_MODES = ("skip", "catch_up")
+
+
+def _histogram_labels(bins):
+    labels = [f"<{bins[0]}"]
+    labels.extend(f"{lo}-{hi}" for lo, hi in zip(bins, bins[1:]))
+    labels.append(f">={bins[-1]}")
+    return labels
+
+
+class Histogram:
+    """Fixed bin histogram of millisecond timings"""
+
+    def __init__(self, bins):
+        self.bins = bins
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * (len(self.bins) + 1)
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = 0
+
+    def record(self, value_ms):
+        self.counts[bisect_left(self.bins, value_ms)] += 1
+        self.total += value_ms
+        self.samples += 1
+        if value_ms > self.max:
+            self.max = value_ms
+
+    def to_dict(self):
+        return {
+            "mean_ms": self.total / self.samples if self.samples else 0.0,
+            "max_ms": self.max,
+            "histogram": dict(zip(_histogram_labels(self.bins), self.counts)),
+        }
+
+
+class FrameStats:
+    """
+    Pacing statistics for a single virtual.
+
+    jitter  : how late each frame was dispatched relative to its deadline
+    render  : how long each frame took to render and flush
+    overruns: frames skipped because the previous frame was still rendering
+              (in catch_up pacing, only those beyond MAX_CATCH_UP_FRAMES)
+    """
+
+    def __init__(self):
+        self.jitter = Histogram(JITTER_BINS_MS)
+        self.render = Histogram(RENDER_BINS_MS)
+        self.reset()
+
+    def reset(self):
+        self.jitter.reset()
+        self.render.reset()
+        self.frames = 0
+        self.overruns = 0
+        self.since = time.perf_counter()
+
+    def to_dict(self):
+        elapsed = time.perf_counter() - self.since
+        return {
+            "frames": self.frames,
+            "overruns": self.overruns,
+            "fps": self.frames / elapsed if elapsed > 0 else 0.0,
+            "jitter": self.jitter.to_dict(),
+            "render": self.render.to_dict(),
+        }
+
+
+class RenderBucket:
+    """
+    A group of virtuals that share a refresh rate, and therefore a clock
+    deadline. Every virtual in the bucket is ticked on the same deadline.
+    """
+
+    def __init__(self, refresh_rate, start_time):
+        self.refresh_rate = refresh_rate
+        self.interval = 1 / refresh_rate
+        self.deadline = start_time + self.interval
+        self.missed = 0
+        # virtual id -> virtual
+        self.virtuals = {}
+
+    def advance(self, now, catch_up):
+        """
+        Moves the deadline on by exactly one frame, so the frame period
+        never drifts with render time. If the clock has fallen behind, the
+        deadline jumps to the next one still ahead of it, and the frames in
+        between are missed. Returns how many of those the virtuals should
+        render back to back to catch up: none when skipping, otherwise up to
+        MAX_CATCH_UP_FRAMES. The rest are counted as missed.
+        """
+        self.deadline += self.interval
+        if self.deadline > now:
+            return 0
+
+        behind = int((now - self.deadline) / self.interval) + 1
+        self.deadline += behind * self.interval
+        frames = min(behind, MAX_CATCH_UP_FRAMES) if catch_up else 0
+        self.missed += behind - frames
+        return frames
+
+
+class RenderScheduler:
+    """
+    Drives every active virtual from a single clock thread.
+
+    Virtuals are grouped into buckets by refresh rate. Each bucket keeps an
+    absolute monotonic deadline that advances by one frame period per tick,
+    independent of how long frames take to render. When a bucket's deadline
+    passes, a frame for each of its virtuals is handed to a small fixed pool
+    of render workers. A virtual whose previous frame is still rendering when
+    its next deadline arrives skips that frame, so a slow virtual can't pile
+    up work in the pool. With catch_up pacing, the frames it missed are
+    rendered in order by the same worker as soon as it finishes instead,
+    up to MAX_CATCH_UP_FRAMES at a time.
+    """
+
+    def __init__(self, ledfx, workers, pacing="skip"):
+        self._ledfx = ledfx
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._buckets = {}
+        self._pending = {}
+        # virtual id -> frames still to render once its current one is done
+        self._owed = {}
+        self._stats = {}
+        self._catch_up = pacing == "catch_up"
+        self._running = False
+        self._thread = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="ledfx-render"
+        )
+
+        def on_shutdown(e):
+            self.stop()
+
+        self._ledfx.events.add_listener(on_shutdown, Event.LEDFX_SHUTDOWN)
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._clock, name="ledfx-render-clock", daemon=True
+        )
+        self._thread.start()
+        _LOGGER.debug("Render scheduler started.")
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+            self._wakeup.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._executor.shutdown(wait=True)
+        _LOGGER.debug("Render scheduler stopped.")
+
+    def add(self, virtual):
+        """
+        Schedules a virtual at its refresh rate. Adding a virtual that is
+        already scheduled moves it to the bucket for its current refresh rate.
+        """
+        refresh_rate = virtual.refresh_rate
+        if not refresh_rate:
+            return
+
+        with self._lock:
+            self._discard(virtual.id)
+            bucket = self._buckets.get(refresh_rate)
+            if bucket is None:
+                bucket = RenderBucket(refresh_rate, time.perf_counter())
+                self._buckets[refresh_rate] = bucket
+                _LOGGER.debug(f"Render bucket created for {refresh_rate} fps")
+            bucket.virtuals[virtual.id] = virtual
+            self._stats.setdefault(virtual.id, FrameStats())
+            self._wakeup.notify()
+
+        self.start()
+
+    def remove(self, virtual):
+        """
+        Unschedules a virtual, waiting for any frame it has in flight to
+        finish unless called from a render worker.
+        """
+        with self._lock:
+            self._discard(virtual.id)
+            future = self._pending.pop(virtual.id, None)
+            self._owed.pop(virtual.id, None)
+            self._stats.pop(virtual.id, None)
+
+        if future is not None and not self._in_worker():
+            wait((future,))
+
+    def _discard(self, virtual_id):
+        for refresh_rate, bucket in list(self._buckets.items()):
+            if bucket.virtuals.pop(virtual_id, None) is None:
+                continue
+            if not bucket.virtuals:
+                del self._buckets[refresh_rate]
+                _LOGGER.debug(f"Render bucket removed for {refresh_rate} fps")
+
+    @staticmethod
+    def _in_worker():
+        return threading.current_thread().name.startswith("ledfx-render")
+
+    @property
+    def buckets(self):
+        """Returns the ids of the scheduled virtuals by refresh rate"""
+        with self._lock:
+            return {
+                refresh_rate: list(bucket.virtuals)
+                for refresh_rate, bucket in self._buckets.items()
+            }
+
+    def stats(self, virtual_id=None):
+        """
+        Returns the pacing statistics of every scheduled virtual, or of a
+        single virtual if an id is given
+        """
+        with self._lock:
+            if virtual_id is not None:
+                stats = self._stats.get(virtual_id)
+                return stats.to_dict() if stats is not None else None
+            return {
+                "pacing": "catch_up" if self._catch_up else "skip",
+                "buckets": {
+                    refresh_rate: {
+                        "virtuals": list(bucket.virtuals),
+                        "missed": bucket.missed,
+                    }
+                    for refresh_rate, bucket in self._buckets.items()
+                },
+                "virtuals": {
+                    virtual_id: stats.to_dict()
+                    for virtual_id, stats in self._stats.items()
+                },
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            for stats in self._stats.values():
+                stats.reset()
+            for bucket in self._buckets.values():
+                bucket.missed = 0
+
+    def _sleep_until(self, deadline):
+        """
+        Hybrid wait: sleep on the condition until just before the deadline,
+        then spin out the last fraction of a millisecond, without holding
+        the lock. Returns early if woken by a change to the schedule.
+        """
+        remaining = deadline - time.perf_counter()
+        if remaining > SPIN_THRESHOLD:
+            if self._wakeup.wait(remaining - SPIN_THRESHOLD):
+                return
+        self._lock.release()
+        try:
+            while time.perf_counter() < deadline:
+                pass
+        finally:
+            self._lock.acquire()
+
+    def _clock(self):
+        with self._lock:
+            while self._running:
+                if not self._buckets:
+                    self._wakeup.wait()
+                    continue
+
+                next_deadline = min(
+                    bucket.deadline for bucket in self._buckets.values()
+                )
+                if next_deadline > time.perf_counter():
+                    self._sleep_until(next_deadline)
+                    continue
+
+                now = time.perf_counter()
+                for bucket in self._buckets.values():
+                    if bucket.deadline > now:
+                        continue
+                    deadline = bucket.deadline
+                    frames = 1 + bucket.advance(now, self._catch_up)
+                    for virtual_id, virtual in bucket.virtuals.items():
+                        self._dispatch(virtual_id, virtual, deadline, frames)
+
+    def _dispatch(self, virtual_id, virtual, deadline, frames):
+        if not virtual.active:
+            return
+        stats = self._stats[virtual_id]
+        future = self._pending.get(virtual_id)
+        if future is not None and not future.done():
+            # previous frame missed this deadline
+            if not self._catch_up:
+                stats.overruns += 1
+                return
+            # the worker rendering it renders these frames next
+            owed = self._owed.get(virtual_id, 0) + frames
+            if owed > MAX_CATCH_UP_FRAMES:
+                stats.overruns += owed - MAX_CATCH_UP_FRAMES
+                owed = MAX_CATCH_UP_FRAMES
+            self._owed[virtual_id] = owed
+            return
+        frames += self._owed.pop(virtual_id, 0)
+        if frames > 1 + MAX_CATCH_UP_FRAMES:
+            stats.overruns += frames - 1 - MAX_CATCH_UP_FRAMES
+            frames = 1 + MAX_CATCH_UP_FRAMES
+        stats.jitter.record((time.perf_counter() - deadline) * 1000)
+        self._pending[virtual_id] = self._executor.submit(
+            self._render, virtual, stats, frames
+        )
+
+    def _render(self, virtual, stats, frames):
+        while frames:
+            start = time.perf_counter()
+            try:
+                virtual.process_frame()
+            except Exception:
+                _LOGGER.exception(
+                    f"Virtual {virtual.id}: Failed to render frame"
+                )
+            stats.render.record((time.perf_counter() - start) * 1000)
+            stats.frames += 1
+            frames -= 1
+            if not frames:
+                with self._lock:
+                    frames = self._owed.pop(virtual.id, 0)
@@ -1,5 +1,15 @@
 import numpy as np
 
+# Easing curves map the linear progress of a transition, from 0 to 1, to the
+# weight that the new effect is blended in with. Custom curves can be added
+# here, any callable that maps [0, 1] onto [0, 1] will do.
+EASING_CURVES = {
+    "Linear": lambda x: x,
+    "Ease In": lambda x: x * x,
+    "Ease Out": lambda x: x * (2 - x),
+    "Ease In Out": lambda x: x * x * (3 - 2 * x),
+}
+
 
 class IterClass(type):
     def __iter__(cls):
@@ -7,6 +17,13 @@ class IterClass(type):
 
 
 class Transitions(metaclass=IterClass):
+    """
+    Blends the frame of a new effect (x1) with the frame of the effect it is
+    replacing (x2). Everything that depends only on the pixel count, like the
+    per-pixel thresholds of dissolve and iris, is computed once here, and
+    every transition writes into x1 (or out, if given) without allocating.
+    """
+
     def __init__(self, pixel_count, max_brightness=1, min_brightness=0):
         self.pixel_count = pixel_count
         self.max_brightness = max_brightness
@@ -18,6 +35,8 @@ class Transitions(metaclass=IterClass):
         # [-1::-2] or [-2::-2]
         # https://discord.com/channels/469985374052286474/785654790247546941/835507683129032725
         self.iris_array = np.concatenate([i[::2], i[-1 + len(i) % -2 :: -2]])
+        # mask of the pixels taken from x2, reused every frame
+        self._mask = np.zeros((pixel_count, 1), dtype=bool)
 
     def __getitem__(cls, mode):
         return getattr(cls, "NAMED_FUNCTIONS")[mode]
@@ -29,62 +48,92 @@ class Transitions(metaclass=IterClass):
         assert np.shape(x1) == np.shape(x2)
         assert 0 <= weight <= 1
 
-    def add(self, x1, x2, weight):
+    @staticmethod
+    def ease(easing, progress):
+        """Returns the blend weight for the linear progress of a transition"""
+        return EASING_CURVES[easing](progress)
+
+    def _take_where(self, thresholds, x1, x2, weight, out):
+        """Sets the pixels whose threshold is above weight to x2"""
+        if out is not x1:
+            np.copyto(out, x1)
+        np.greater(thresholds, weight, out=self._mask[:, 0])
+        np.copyto(out, x2, where=self._mask)
+
+    def add(self, x1, x2, weight, out=None):
         """
         weighted additive blending of x1 and x2
         operates on x1 directly
         """
-        np.multiply(x1, weight, x1)
-        x3 = np.multiply(x2, 1 - weight)
-        np.add(x1, x3, x1)
+        if out is None:
+            out = x1
+        # x1 * weight + x2 * (1 - weight) == (x1 - x2) * weight + x2
+        np.subtract(x1, x2, out=out)
+        np.multiply(out, weight, out=out)
+        np.add(out, x2, out=out)
 
-    def dissolve(self, x1, x2, weight):
+    def dissolve(self, x1, x2, weight, out=None):
         """
         random indexes of x1 are set to the value of x2
         roughly proportional in quantity to weight
         """
-        indexes = np.greater(self.dissolve_array, weight)
-        x1[indexes, :] = x2[indexes, :]
+        self._take_where(
+            self.dissolve_array, x1, x2, weight, x1 if out is None else out
+        )
 
-    def push(self, x1, x2, weight):
+    def push(self, x1, x2, weight, out=None):
         """
         x1 "pushes" x2 to the side, proportional to weight
         """
+        if out is None:
+            out = x1
+        elif out is not x1:
+            np.copyto(out, x1)
         idx = int((1 - weight) * self.pixel_count)
-        x2 = np.roll(x2, idx, axis=0)
-        x1[:idx, :] = x2[:idx, :]
+        # the first idx pixels of x2 rolled by idx are its last idx pixels
+        if idx:
+            out[:idx, :] = x2[-idx:, :]
 
-    def slide(self, x1, x2, weight):
+    def slide(self, x1, x2, weight, out=None):
         """
         x1 overlaps x2 from the side, proportional to weight
         """
+        if out is None:
+            out = x1
+        elif out is not x1:
+            np.copyto(out, x1)
         idx = int((1 - weight) * self.pixel_count)
-        x1[:idx, :] = x2[:idx, :]
+        out[:idx, :] = x2[:idx, :]
 
-    def iris(self, x1, x2, weight):
+    def iris(self, x1, x2, weight, out=None):
         """
         x2 overlaps x1 from the centre, proportional to weight
         """
-        indexes = np.greater(self.iris_array, weight)
-        x1[indexes, :] = x2[indexes, :]
+        self._take_where(
+            self.iris_array, x1, x2, weight, x1 if out is None else out
+        )
 
-    def throughWhite(self, x1, x2, weight):
+    def throughWhite(self, x1, x2, weight, out=None):
         """
         fades x1 into white, then out into x2
         """
+        if out is None:
+            out = x1
         if weight < 0.5:
-            np.clip(x2, weight * 2 * 255, None, out=x1)
+            np.clip(x2, weight * 2 * 255, None, out=out)
         else:
-            np.clip(x1, (1 - weight) * 2 * 255, None, out=x1)
+            np.clip(x1, (1 - weight) * 2 * 255, None, out=out)
 
-    def throughBlack(self, x1, x2, weight):
+    def throughBlack(self, x1, x2, weight, out=None):
         """
         fades x1 into black, then out into x2
         """
+        if out is None:
+            out = x1
         if weight < 0.5:
-            np.clip(x2, None, 255 * (1 - (weight * 2)), x1)
+            np.clip(x2, None, 255 * (1 - (weight * 2)), out)
         else:
-            np.clip(x1, None, 255 * 2 * (weight - 0.5), x1)
+            np.clip(x1, None, 255 * 2 * (weight - 0.5), out)
 
     NAMED_FUNCTIONS = {
         "Add": add,
@@ -0,0 +1,198 @@
+import logging
+import queue
+import socket
+import threading
+import time
+
+from ledfx.events import Event
+
+_LOGGER = logging.getLogger(__name__)
+
+# Packets waiting to be sent, from all devices. When the network can't keep
+# up, packets are dropped rather than holding up the render threads.
+OUTPUT_QUEUE_SIZE = 4096
+
+# The most packets the output thread sends in one go before checking for
+# more, so that one busy device can't hold up the counters of the others
+OUTPUT_BATCH_SIZE = 256
+
+
+class OutputStats:
+    """
+    Counters for the packets of a single device.
+
+    packets: packets sent
+    bytes  : bytes sent, excluding UDP/IP headers
+    dropped: packets dropped because the output queue was full
+    errors : packets the network refused, eg. for an unreachable host
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.packets = 0
+        self.bytes = 0
+        self.dropped = 0
+        self.errors = 0
+        self.since = time.perf_counter()
+
+    def to_dict(self):
+        elapsed = time.perf_counter() - self.since
+        return {
+            "packets": self.packets,
+            "packets_per_second": (
+                self.packets / elapsed if elapsed > 0 else 0
+            ),
+            "bytes": self.bytes,
+            "dropped": self.dropped,
+            "errors": self.errors,
+        }
+
+
+class UDPSender:
+    """
+    Stands in for the UDP socket of a device. Packets passed to sendto are
+    queued for the output thread instead of being sent straight away, so
+    the caller never waits on the network.
+    """
+
+    def __init__(self, output, stats):
+        self._output = output
+        self.stats = stats
+
+    def sendto(self, data, address):
+        self._output.send(self.stats, data, address)
+
+
+class UDPOutput:
+    """
+    Sends the UDP packets of every networked device from one output thread.
+
+    Devices hand their encoded packets to the output through a UDPSender.
+    The output thread takes everything that has been queued since it last
+    looked and sends it as a batch, through one socket per address family
+    shared by all of the devices.
+    """
+
+    def __init__(self, ledfx, queue_size=OUTPUT_QUEUE_SIZE):
+        self._ledfx = ledfx
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stats = {}
+        self._sockets = {}
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread = None
+        self.batches = 0
+
+        def on_shutdown(e):
+            self.stop()
+
+        self._ledfx.events.add_listener(on_shutdown, Event.LEDFX_SHUTDOWN)
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(
+                target=self._run, name="ledfx-udp-output", daemon=True
+            )
+            self._thread.start()
+        _LOGGER.debug("UDP output started.")
+
+    def stop(self):
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            thread = self._thread
+            self._thread = None
+        try:
+            # wake the output thread if it's waiting for packets
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        thread.join(timeout=1)
+        for sock in self._sockets.values():
+            sock.close()
+        self._sockets = {}
+        _LOGGER.debug("UDP output stopped.")
+
+    def sender(self, device_id):
+        """Returns the UDPSender for a device, starting the output"""
+        self.start()
+        return UDPSender(self, self.device_stats(device_id))
+
+    def device_stats(self, device_id):
+        """
+        Returns the OutputStats of a device, so that devices which send
+        some other way are counted alongside the rest
+        """
+        return self._stats.setdefault(device_id, OutputStats())
+
+    def send(self, stats, data, address):
+        """
+        Queues a packet to be sent to address, a (host, port) tuple.
+        bytes, and memoryviews of bytes, are queued as they are. Anything
+        else could change before it's sent, so is copied first.
+        """
+        if not isinstance(data, bytes) and not (
+            isinstance(data, memoryview) and isinstance(data.obj, bytes)
+        ):
+            data = bytes(data)
+        try:
+            self._queue.put_nowait((stats, data, address))
+        except queue.Full:
+            stats.dropped += 1
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "batches": self.batches,
+            "devices": {
+                device_id: stats.to_dict()
+                for device_id, stats in self._stats.items()
+            },
+        }
+
+    def reset_stats(self):
+        self.batches = 0
+        for stats in self._stats.values():
+            stats.reset()
+
+    def _socket(self, host):
+        family = socket.AF_INET6 if ":" in host else socket.AF_INET
+        sock = self._sockets.get(family)
+        if sock is None:
+            sock = self._sockets[family] = socket.socket(
+                family, socket.SOCK_DGRAM
+            )
+        return sock
+
+    def _run(self):
+        batch = []
+        while self._running:
+            batch.append(self._queue.get())
+            while len(batch) < OUTPUT_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._send_batch(batch)
+            batch.clear()
+
+    def _send_batch(self, batch):
+        self.batches += 1
+        for item in batch:
+            if item is None:
+                continue
+            stats, data, address = item
+            try:
+                self._socket(address[0]).sendto(data, address)
+            except OSError as e:
+                stats.errors += 1
+                _LOGGER.debug(f"Unable to send to {address}: {e}")
+                continue
+            stats.packets += 1
+            stats.bytes += len(data)
@@ -4,6 +4,7 @@ import importlib
 import inspect
 import ipaddress
 import logging
+import logging.handlers
 import os
 import pkgutil
 import re
@@ -51,6 +52,14 @@ def calc_available_fps():
 AVAILABLE_FPS = calc_available_fps()
 
 
+PIXEL_DTYPES = {"float64": np.float64, "float32": np.float32}
+
+
+def get_pixel_dtype(ledfx):
+    """Returns the numeric type that pixel buffers are rendered in"""
+    return PIXEL_DTYPES[ledfx.config.get("pixel_dtype", "float64")]
+
+
 @lru_cache(maxsize=32)
 def fps_to_sleep_interval(fps):
     monotonic_res = time.get_clock_info("monotonic").resolution
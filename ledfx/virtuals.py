@@ -1,6 +1,4 @@
 import logging
-import threading
-import time
 from functools import cached_property
 
 import numpy as np
@@ -26,8 +24,9 @@ from ledfx.events import (
 )
 
 # from ledfx.config import save_config
-from ledfx.transitions import Transitions
-from ledfx.utils import fps_to_sleep_interval
+from ledfx.layers import Layer
+from ledfx.transitions import EASING_CURVES, Transitions
+from ledfx.utils import get_pixel_dtype
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -77,6 +76,11 @@ class Virtual:
                 description="Type of transition between effects",
                 default="Add",
             ): vol.In([mode for mode in Transitions]),
+            vol.Optional(
+                "transition_easing",
+                description="Easing curve of the transition between effects",
+                default="Linear",
+            ): vol.In(list(EASING_CURVES)),
             vol.Optional(
                 "frequency_min",
                 description="Lowest frequency for this virtual's audio reactive effects",
@@ -118,7 +122,6 @@ class Virtual:
 
     _paused = False
     _active = False
-    _output_thread = None
     _active_effect = None
     _transition_effect = None
 
@@ -129,6 +132,8 @@ class Virtual:
         # in, +ve mean fading out
         self.fade_timer = 0
         self._segments = []
+        # effects composited on top of the active effect, bottom first
+        self._layers = []
 
         self.frequency_range = FrequencyRange(
             self._config["frequency_min"], self._config["frequency_max"]
@@ -154,6 +159,9 @@ class Virtual:
             raise ValueError(msg)
 
     def activate_segments(self, segments):
+        # device offsets and sizes are compiled into the device maps
+        if hasattr(self, "_device_maps"):
+            delattr(self, "_device_maps")
         for device_id, start_pixel, end_pixel, invert in segments:
             device = self._ledfx.devices.get(device_id)
             if not device.is_active():
@@ -201,7 +209,7 @@ class Virtual:
             "pixel_count",
             "refresh_rate",
             "_devices",
-            "_segments_by_device",
+            "_device_maps",
         ]:
             if hasattr(self, prop):
                 delattr(self, prop)
@@ -228,6 +236,10 @@ class Virtual:
 
             self.invalidate_cached_props()
 
+            # refresh rate may have changed with the devices
+            if self._active:
+                self._ledfx.render_scheduler.add(self)
+
             _LOGGER.debug(
                 f"Virtual {self.id}: updated with {len(self._segments)} segments, totalling {self.pixel_count} pixels"
             )
@@ -241,6 +253,10 @@ class Virtual:
                     self._active_effect.deactivate()
                     if self.pixel_count > 0:
                         self._active_effect.activate(self)
+                for layer in self._layers:
+                    layer.effect.deactivate()
+                    if self.pixel_count > 0:
+                        layer.effect.activate(self)
 
             mode = self._config["transition_mode"]
             self.frame_transitions = self.transitions[mode]
@@ -273,7 +289,9 @@ class Virtual:
         self.transition_frame_counter = 0
 
         if self._active_effect is None:
-            self._transition_effect = DummyEffect(self.pixel_count)
+            self._transition_effect = DummyEffect(
+                self.pixel_count, get_pixel_dtype(self._ledfx)
+            )
 
         else:
             self.clear_transition_effect()
@@ -296,6 +314,52 @@ class Virtual:
             self.active = False
             raise
 
+    @property
+    def layers(self):
+        return self._layers
+
+    @property
+    def _effects(self):
+        """
+        Returns every effect in use on the virtual: the active effect, the
+        one it's transitioning from, and the effects of its layers
+        """
+        effects = [self._active_effect, self._transition_effect]
+        effects.extend(layer.effect for layer in self._layers)
+        return [effect for effect in effects if effect is not None]
+
+    def add_layer(self, effect, config=None):
+        """
+        Adds an effect as a new layer on top of the virtual's existing
+        layers. config is validated against ledfx.layers.LAYER_SCHEMA.
+        """
+        if not self._devices:
+            error = f"Virtual {self.id}: Cannot add layer, no configured device segments"
+            _LOGGER.warning(error)
+            raise ValueError(error)
+
+        layer = Layer(effect, config or {})
+        effect.activate(self)
+        # the render thread iterates the layers, so they are replaced
+        # rather than modified in place
+        self._layers = [*self._layers, layer]
+        return layer
+
+    def update_layer(self, index, config):
+        self._layers[index].update_config(config)
+
+    def remove_layer(self, index):
+        layers = list(self._layers)
+        layer = layers.pop(index)
+        self._layers = layers
+        layer.effect.deactivate()
+
+    def clear_layers(self):
+        layers = self._layers
+        self._layers = []
+        for layer in layers:
+            layer.effect.deactivate()
+
     def transition_to_active(self):
         self._active_effect = self._transition_effect
         self._transition_effect = None
@@ -308,7 +372,9 @@ class Virtual:
         self._ledfx.events.fire_event(EffectClearedEvent())
 
         self._transition_effect = self._active_effect
-        self._active_effect = DummyEffect(self.pixel_count)
+        self._active_effect = DummyEffect(
+            self.pixel_count, get_pixel_dtype(self._ledfx)
+        )
 
         self.transition_frame_total = (
             self.refresh_rate * self._config["transition_time"]
@@ -334,8 +400,11 @@ class Virtual:
         self.clear_transition_effect()
 
         if self._active:
+            self._ledfx.render_scheduler.remove(self)
             # Clear all the pixel data before deactivating the device
-            self.assembled_frame = np.zeros((self.pixel_count, 3))
+            self.assembled_frame = np.zeros(
+                (self.pixel_count, 3), dtype=get_pixel_dtype(self._ledfx)
+            )
             self.flush(self.assembled_frame)
             self._ledfx.events.fire_event(
                 VirtualUpdateEvent(self.id, self.assembled_frame)
@@ -347,49 +416,64 @@ class Virtual:
     def active_effect(self):
         return self._active_effect
 
-    def thread_function(self):
-        while True:
-            if not self._active:
-                break
-            if (
-                self._active_effect
-                and self._active_effect.is_active
-                and hasattr(self._active_effect, "pixels")
-            ):
-                # self.assembled_frame = await self._ledfx.loop.run_in_executor(
-                #     self._ledfx.thread_executor, self.assemble_frame
-                # )
-                self.assembled_frame = self.assemble_frame()
-                if self.assembled_frame is not None and not self._paused:
-                    if not self._config["preview_only"]:
-                        # self._ledfx.thread_executor.submit(self.flush)
-                        # await self._ledfx.loop.run_in_executor(
-                        #     self._ledfx.thread_executor, self.flush
-                        # )
-                        self.flush()
-
-                    self._ledfx.events.fire_event(
-                        VirtualUpdateEvent(self.id, self.assembled_frame)
-                    )
+    def process_frame(self):
+        """
+        Renders, flushes and publishes a single frame. Called by the render
+        scheduler once per frame at the virtual's refresh rate.
+        """
+        if not self._active:
+            return
+        if (
+            self._active_effect
+            and self._active_effect.is_active
+            and hasattr(self._active_effect, "pixels")
+        ):
+            self.assembled_frame = self.assemble_frame()
+            if self.assembled_frame is not None and not self._paused:
+                if not self._config["preview_only"]:
+                    self.flush()
+
+                # the frame is rendered into buffers that the next frame
+                # reuses, and listeners may read it later from the loop
+                self._ledfx.events.fire_event(
+                    VirtualUpdateEvent(self.id, np.copy(self.assembled_frame))
+                )
+
+    @staticmethod
+    def _effect_frame(effect):
+        """
+        Renders an effect and returns its frame. Effects in a render group
+        share the frame rendered by the group's leader.
+        """
+        group = getattr(effect, "_render_group", None)
+        if group is not None:
+            return group.frame(effect, Virtual._render_effect)
+        return Virtual._render_effect(effect)
 
-            time.sleep(fps_to_sleep_interval(self.refresh_rate))
+    @staticmethod
+    def _render_effect(effect):
+        """
+        Renders an effect and returns its frame. Effects running in a render
+        shard return the latest frame from their shard instead.
+        """
+        shard = getattr(effect, "_shard", None)
+        if shard is not None:
+            return shard.frame()
+        effect.render()
+        return effect.get_pixels()
 
     def assemble_frame(self):
         """
         Assembles the frame to be flushed.
         """
         # Get and process active effect frame
-        self._active_effect.render()
-        frame = self._active_effect.get_pixels()
+        frame = self._effect_frame(self._active_effect)
         if frame is None:
             return
         frame[frame > 255] = 255
         frame[frame < 0] = 0
         # np.clip(frame, 0, 255, frame)
 
-        if self._config["center_offset"]:
-            frame = np.roll(frame, self._config["center_offset"], axis=0)
-
         # This part handles blending two effects together
         if (
             self._transition_effect is not None
@@ -399,27 +483,20 @@ class Virtual:
             and self._config["transition_time"] > 0
         ):
             # Get and process transition effect frame
-            self._transition_effect.render()
-            transition_frame = self._transition_effect.get_pixels()
+            transition_frame = self._effect_frame(self._transition_effect)
             # np.clip(transition_frame, 0, 255, transition_frame)
             transition_frame[frame > 255] = 255
             transition_frame[frame < 0] = 0
 
-            if self._config["center_offset"]:
-                transition_frame = np.roll(
-                    transition_frame,
-                    self._config["center_offset"],
-                    axis=0,
-                )
-
             # Blend both frames together
             self.transition_frame_counter += 1
             self.transition_frame_counter = min(
                 max(self.transition_frame_counter, 0),
                 self.transition_frame_total,
             )
-            weight = (
-                self.transition_frame_counter / self.transition_frame_total
+            weight = self.transitions.ease(
+                self._config["transition_easing"],
+                self.transition_frame_counter / self.transition_frame_total,
             )
             self.frame_transitions(
                 self.transitions, frame, transition_frame, weight
@@ -427,6 +504,16 @@ class Virtual:
             if self.transition_frame_counter == self.transition_frame_total:
                 self.clear_transition_effect()
 
+        # Composite the layers on top, each onto the result of those below
+        layers = self._layers
+        if layers:
+            for layer in layers:
+                if layer.config["enabled"]:
+                    layer.composite(
+                        frame, layer.frame(self._effect_frame, frame)
+                    )
+            np.clip(frame, 0, 255, out=frame)
+
         np.multiply(frame, self._config["max_brightness"], frame)
 
         return frame
@@ -441,9 +528,6 @@ class Virtual:
             _LOGGER.warning(error)
             raise RuntimeError(error)
 
-        if hasattr(self, "_thread"):
-            self._thread.join()
-
         _LOGGER.debug(
             f"Virtual {self.id}: Activating with segments {self._segments}"
         )
@@ -454,18 +538,12 @@ class Virtual:
                 _LOGGER.error(e)
             self._active = True
 
-        # self.thread_function()
-
-        self._thread = threading.Thread(target=self.thread_function)
-        self._thread.start()
+        self._ledfx.render_scheduler.add(self)
         self._ledfx.events.fire_event(VirtualPauseEvent(self.id))
-        # self._task = self._ledfx.loop.create_task(self.thread_function())
-        # self._task.add_done_callback(lambda task: task.result())
 
     def deactivate(self):
         self._active = False
-        if hasattr(self, "_thread"):
-            self._thread.join()
+        self._ledfx.render_scheduler.remove(self)
         self.deactivate_segments()
         self._ledfx.events.fire_event(VirtualPauseEvent(self.id))
 
@@ -496,28 +574,19 @@ class Virtual:
         """
         if pixels is None:
             pixels = self.assembled_frame
-        for device_id, segments in self._segments_by_device.items():
+        if self._config["mapping"] == "copy" and self._config["center_offset"]:
+            # the offset applies before resampling, so it can't be folded
+            # into the device maps
+            pixels = np.roll(pixels, self._config["center_offset"], axis=0)
+        # copy mapping resamples the frame once per segment length, shared
+        # by every segment of that length across all devices
+        resampled = {None: pixels}
+        for device_id, device_map in self._device_maps.items():
             data = []
-            for (
-                start,
-                stop,
-                step,
-                device_start,
-                device_end,
-            ) in segments:
-                if self._config["mapping"] == "span":
-                    data.append(
-                        (pixels[start:stop:step], device_start, device_end)
-                    )
-                elif self._config["mapping"] == "copy":
-                    target_len = device_end - device_start + 1
-                    data.append(
-                        (
-                            interpolate_pixels(pixels, target_len)[::step],
-                            device_start,
-                            device_end,
-                        )
-                    )
+            for length, frame_index, device_index in device_map:
+                if length not in resampled:
+                    resampled[length] = interpolate_pixels(pixels, length)
+                data.append((resampled[length], frame_index, device_index))
             device = self._ledfx.devices.get(device_id)
             if device is None:
                 _LOGGER.warning(
@@ -559,35 +628,64 @@ class Virtual:
         return self._segments
 
     @cached_property
-    def _segments_by_device(self):
+    def _device_maps(self):
         """
-        List to help split effect output to the correct pixels of each device
+        Compiles the segments into index maps, so that routing a frame to a
+        device is a single gather from the frame into the device's pixels.
+
+        Returns a dict of device id to a tuple of (length, frame_index,
+        device_index). In span mapping length is None and frame_index
+        indexes the frame itself. In copy mapping the frame is resampled to
+        length first, and segments of the same length share one map.
+        Segment order, inversion and the virtual and device center offsets
+        are all folded into the indices. device_index is None when the map
+        covers every pixel of the device in order.
         """
+        span = self._config["mapping"] == "span"
+        pixel_count = self.pixel_count
+        virtual_offset = self._config["center_offset"]
         data_start = 0
-        segments_by_device = {}
+        groups_by_device = {}
         for device_id, device_start, device_end, inverse in self._segments:
+            groups = groups_by_device.setdefault(device_id, {})
+            device = self._ledfx.devices.get(device_id)
             segment_width = device_end - device_start + 1
-            if not inverse:
-                start = data_start
-                stop = data_start + segment_width
-                step = 1
-            else:
-                start = data_start + segment_width - 1
-                stop = None if data_start == 0 else data_start - 1
-                step = -1
-            segment_info = (
-                start,
-                stop,
-                step,
-                device_start,
-                device_end,
-            )
-            if device_id in segments_by_device.keys():
-                segments_by_device[device_id].append(segment_info)
+            if span:
+                length = None
+                frame_index = (
+                    np.arange(data_start, data_start + segment_width)
+                    - virtual_offset
+                ) % pixel_count
+                data_start += segment_width
             else:
-                segments_by_device[device_id] = [segment_info]
-            data_start += segment_width
-        return segments_by_device
+                length = segment_width
+                frame_index = np.arange(segment_width)
+            if inverse:
+                frame_index = frame_index[::-1]
+            if device is None:
+                continue
+
+            device_index = (
+                np.arange(device_start, device_end + 1)
+                + device.config["center_offset"]
+            ) % device.pixel_count
+            frame_indices, device_indices = groups.setdefault(length, ([], []))
+            frame_indices.append(frame_index)
+            device_indices.append(device_index)
+
+        device_maps = {}
+        for device_id, groups in groups_by_device.items():
+            device = self._ledfx.devices.get(device_id)
+            device_map = []
+            for length, (frame_indices, device_indices) in groups.items():
+                device_index = np.concatenate(device_indices)
+                if np.array_equal(device_index, np.arange(device.pixel_count)):
+                    device_index = None
+                device_map.append(
+                    (length, np.concatenate(frame_indices), device_index)
+                )
+            device_maps[device_id] = tuple(device_map)
+        return device_maps
 
     @cached_property
     def _devices(self):
@@ -647,10 +745,16 @@ class Virtual:
         if hasattr(self, "_config"):
             if _config["mapping"] != self._config["mapping"]:
                 self.invalidate_cached_props()
+            elif _config["center_offset"] != self._config[
+                "center_offset"
+            ] and hasattr(self, "_device_maps"):
+                delattr(self, "_device_maps")
             if (
                 _config["transition_mode"] != self._config["transition_mode"]
                 or _config["transition_time"]
                 != self._config["transition_time"]
+                or _config["transition_easing"]
+                != self._config["transition_easing"]
             ):
                 self.frame_transitions = self.transitions[
                     _config["transition_mode"]
@@ -669,6 +773,9 @@ class Virtual:
                         virtual._config["transition_mode"] = _config[
                             "transition_mode"
                         ]
+                        virtual._config["transition_easing"] = _config[
+                            "transition_easing"
+                        ]
 
             if (
                 "frequency_min" in _config.keys()
@@ -690,29 +797,27 @@ class Virtual:
                 diff = abs(_config["frequency_max"] - _config["frequency_min"])
                 if diff < MIN_FREQ_DIFFERENCE:
                     _config["frequency_max"] += diff
-                # if they're changed, clear some cached properties
-                # so the changes take effect
-                if (
-                    (
-                        _config["frequency_min"]
-                        != self._config["frequency_min"]
-                        or _config["frequency_max"]
-                        != self._config["frequency_max"]
-                    )
-                    and (self._active_effect is not None)
-                    and (
-                        hasattr(
-                            self._active_effect, "clear_melbank_freq_props"
-                        )
-                    )
-                ):
-                    self._active_effect.clear_melbank_freq_props()
+        frequency_changed = hasattr(self, "_config") and (
+            _config["frequency_min"] != self._config["frequency_min"]
+            or _config["frequency_max"] != self._config["frequency_max"]
+        )
 
         setattr(self, "_config", _config)
 
         self.frequency_range = FrequencyRange(
             self._config["frequency_min"], self._config["frequency_max"]
         )
+        for effect in self._effects:
+            # if the range changed, clear some cached properties so the
+            # changes take effect
+            if frequency_changed and hasattr(
+                effect, "clear_melbank_freq_props"
+            ):
+                effect.clear_melbank_freq_props()
+                if effect._shard is not None:
+                    effect._shard.update_frequency_range(self.frequency_range)
+            if hasattr(effect, "update_render_group"):
+                effect.update_render_group()
 
         self._ledfx.events.fire_event(
             VirtualConfigUpdateEvent(self.id, self._config)
@@ -763,6 +868,22 @@ class Virtuals:
                     )
                 except RuntimeError:
                     pass
+            for layer in virtual.get("layers", []):
+                try:
+                    effect = self._ledfx.effects.create(
+                        ledfx=self._ledfx,
+                        type=layer["type"],
+                        config=layer["config"],
+                    )
+                    self._ledfx.virtuals.get(virtual["id"]).add_layer(
+                        effect, layer["layer"]
+                    )
+                except vol.MultipleInvalid:
+                    _LOGGER.warning(
+                        "Effect schema changed. Not restoring layer"
+                    )
+                except ValueError:
+                    pass
             self._ledfx.events.fire_event(
                 VirtualConfigUpdateEvent(virtual["id"], virtual["config"])
             )
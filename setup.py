@@ -38,7 +38,6 @@ INSTALL_REQUIRES = [
     "python-rtmidi>=1.4.9",
     "pyupdater>=3.1.0",
     "requests>=2.24.0",
-    "sacn~=1.6.3",
     "sentry-sdk~=1.4.3",
     "sounddevice~=0.4.2",
     "samplerate>=0.1.0",
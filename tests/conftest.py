@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from ledfx.effects import Effects
+from ledfx.effects.audio import AudioFeatureSnapshot
+from ledfx.effects.melbank import MEL_MAX_FREQS
+from ledfx.transitions import Transitions
+from ledfx.virtuals import Virtual
+
+
+@pytest.fixture
+def ledfx():
+    """The parts of LedFx that virtuals and effects rely on"""
+    ledfx = SimpleNamespace(
+        config={"pixel_dtype": "float64", "global_transitions": False},
+        events=SimpleNamespace(
+            add_listener=lambda *args: None, fire_event=lambda *args: None
+        ),
+        render_scheduler=SimpleNamespace(
+            add=lambda *args: None, remove=lambda *args: None
+        ),
+        render_pool=None,
+        dev_enabled=lambda: False,
+    )
+    ledfx.effects = Effects(ledfx)
+    # stands in for the audio input, the effects only need its melbanks
+    ledfx.audio = AudioFeatureSnapshot(
+        MEL_MAX_FREQS,
+        tuple(np.linspace(20, freq, 24) for freq in MEL_MAX_FREQS),
+    )
+    return ledfx
+
+
+@pytest.fixture
+def make_virtual(ledfx):
+    """
+    Returns a function that creates virtuals without any segments, which
+    are rendered by calling assemble_frame rather than by the scheduler
+    """
+
+    def make(virtual_id="strip", pixel_count=16, **config):
+        virtual = Virtual(
+            ledfx,
+            Virtual.schema()(
+                {"name": virtual_id, "transition_time": 0.1, **config}
+            ),
+        )
+        virtual._id = virtual_id
+        virtual._devices = [
+            SimpleNamespace(clear_virtual_segments=lambda *args: None)
+        ]
+        virtual.refresh_rate = 60
+        virtual.pixel_count = pixel_count
+        virtual.transitions = Transitions(pixel_count)
+        virtual.frame_transitions = virtual.transitions["Add"]
+        return virtual
+
+    return make
+
+
+@pytest.fixture
+def create_effect(ledfx):
+    """
+    Returns a function that creates an audio reactive effect which, with no
+    audio, shows its background color
+    """
+
+    def create(color, **config):
+        return ledfx.effects.create(
+            ledfx=ledfx,
+            type="energy",
+            config={"background_color": color, "blur": 0, **config},
+        )
+
+    return create
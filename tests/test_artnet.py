@@ -0,0 +1,60 @@
+import struct
+
+import numpy as np
+
+from ledfx.devices.artnet import ArtNetEncoder
+
+
+def art_dmx(sequence, port_address, data):
+    """Builds an ArtDmx packet field by field, as laid out in the spec"""
+    if len(data) % 2:
+        data += b"\x00"
+    return (
+        b"Art-Net\x00"
+        + struct.pack("<H", 0x5000)
+        + struct.pack(">H", 14)
+        + bytes([sequence, 0, port_address & 0xFF, port_address >> 8])
+        + struct.pack(">H", len(data))
+        + data
+    )
+
+
+def test_encodes_channels_across_universes():
+    data = (np.arange(900) % 256).astype(np.uint8)
+    encoder = ArtNetEncoder(range(0x1FE, 0x200), 510, 0, 900)
+    packets = [bytes(packet) for packet in encoder.encode(data)]
+    assert packets == [
+        art_dmx(1, 0x1FE, data[:510].tobytes()),
+        art_dmx(1, 0x1FF, data[510:].tobytes()),
+    ]
+
+
+def test_channel_offset_and_odd_lengths():
+    data = np.array([1, 2, 3], dtype=np.uint8)
+    encoder = ArtNetEncoder(range(5, 7), 4, 2, 3)
+    packets = [bytes(packet) for packet in encoder.encode(data)]
+    assert packets == [
+        art_dmx(1, 5, b"\x00\x00\x01\x02"),
+        art_dmx(1, 6, b"\x03"),
+    ]
+
+
+def test_sequence_skips_zero():
+    encoder = ArtNetEncoder(range(1), 510, 0, 3)
+    data = np.zeros(3, dtype=np.uint8)
+    sequences = [encoder.encode(data)[0][12] for _ in range(256)]
+    assert sequences[:2] == [1, 2]
+    assert sequences[254:] == [255, 1]
+
+
+def test_packets_outlive_the_next_frame():
+    encoder = ArtNetEncoder(range(1), 510, 0, 3)
+    first = encoder.encode(np.full(3, 7, dtype=np.uint8))[0]
+    encoder.encode(np.full(3, 9, dtype=np.uint8))
+    assert bytes(first) == art_dmx(1, 0, b"\x07\x07\x07")
+
+
+def test_sync_packet():
+    assert ArtNetEncoder.SYNC_PACKET == (
+        b"Art-Net\x00\x00\x52\x00\x0e\x00\x00"
+    )
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from ledfx.effects.audio import AudioDelayLine
+
+
+def run(delay_line, stream, block_sizes):
+    """Passes a stream through the delay line in blocks of the given sizes"""
+    output = np.full_like(stream, np.nan)
+    start = 0
+    for size in block_sizes:
+        delay_line.process(
+            stream[start : start + size], output[start : start + size]
+        )
+        start += size
+    assert start == len(stream)
+    return output
+
+
+@pytest.mark.parametrize("delay", [0, 1, 500, 737, 2000])
+def test_delays_by_exact_samples(delay):
+    stream = np.random.default_rng(delay).random(20000, dtype=np.float32)
+    output = run(AudioDelayLine(delay, 500), stream, [500] * 40)
+
+    np.testing.assert_array_equal(output[:delay], 0)
+    np.testing.assert_array_equal(
+        output[delay:], stream[: len(stream) - delay]
+    )
+
+
+def test_blocks_of_varying_size():
+    # like a resampler, which is a sample or so short now and then
+    sizes = [480, 500, 499, 500, 501, 500, 7, 500, 13] * 10
+    stream = np.random.default_rng(0).random(sum(sizes), dtype=np.float32)
+    output = run(AudioDelayLine(600, 501), stream, sizes)
+
+    np.testing.assert_array_equal(output[:600], 0)
+    np.testing.assert_array_equal(output[600:], stream[:-600])
@@ -0,0 +1,62 @@
+import os
+import threading
+import time
+from contextlib import suppress
+
+import numpy as np
+import pytest
+
+from ledfx.effects.audio_file import FileAudioStream, open_audio_file
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="needs named pipes")
+def test_pipe_opens_before_its_writer(tmp_path):
+    path = str(tmp_path / "audio")
+    os.mkfifo(path)
+
+    opened = threading.Event()
+    reader = None
+
+    def open_reader():
+        nonlocal reader
+        reader = open_audio_file(path, 30000, "s16le", 1)
+        opened.set()
+
+    # opening would hang without a writer, so it's done off the test thread
+    threading.Thread(target=open_reader, daemon=True).start()
+    assert opened.wait(1)
+
+    blocks = []
+    stream = FileAudioStream(
+        reader,
+        lambda block, *args: blocks.append(np.copy(block)),
+        60,
+        realtime=False,
+        loop=False,
+    )
+    stream.start()
+    with open(path, "wb") as writer:
+        writer.write(np.full(1000, 16384, dtype=np.int16).tobytes())
+    assert stream.finished.wait(1)
+    stream.close()
+
+    assert len(blocks) == 2
+    assert np.allclose(np.concatenate(blocks)[:1000], 0.5)
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="needs named pipes")
+def test_pipe_closed_before_its_writer(tmp_path):
+    path = str(tmp_path / "audio")
+    os.mkfifo(path)
+    reader = open_audio_file(path, 30000, "s16le", 1)
+    stream = FileAudioStream(reader, lambda *args: None, 60)
+    stream.start()
+    time.sleep(0.05)
+    start = time.perf_counter()
+    stream.close()
+    assert time.perf_counter() - start < 2
+
+    # the writer gets the pipe open, and the stream lets it go
+    with suppress(BrokenPipeError), open(path, "wb") as writer:
+        writer.write(b"\0" * 1000)
+    assert stream.finished.wait(1)
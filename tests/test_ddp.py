@@ -0,0 +1,43 @@
+import struct
+
+import numpy as np
+import pytest
+
+from ledfx.devices.ddp import DDPDevice, DDPEncoder
+
+
+def ddp_packet(flags, sequence, offset, data):
+    """Builds a DDP packet field by field, as laid out in the spec"""
+    return (
+        struct.pack(">BBBBLH", flags, sequence, 1, 1, offset, len(data)) + data
+    )
+
+
+@pytest.mark.parametrize(
+    "channel_count", [3, DDPDevice.MAX_DATALEN, DDPDevice.MAX_DATALEN * 2 + 9]
+)
+def test_encodes_frame_into_packets(channel_count):
+    data = (np.arange(channel_count) % 256).astype(np.uint8)
+    packets = DDPEncoder(channel_count).encode(data, 7)
+
+    expected = []
+    for offset in range(0, channel_count, DDPDevice.MAX_DATALEN):
+        chunk = data[offset : offset + DDPDevice.MAX_DATALEN].tobytes()
+        expected.append(ddp_packet(0x40, 7, offset, chunk))
+    # only the last packet pushes the frame to the pixels
+    last = expected[-1]
+    expected[-1] = bytes([0x41]) + last[1:]
+    assert [bytes(packet) for packet in packets] == expected
+
+
+def test_encodes_pixel_arrays():
+    pixels = np.array([[1, 2, 3], [4, 5, 6]], dtype=np.uint8)
+    packets = DDPEncoder(6).encode(pixels, 1)
+    assert bytes(packets[0]) == ddp_packet(0x41, 1, 0, bytes(range(1, 7)))
+
+
+def test_packets_outlive_the_next_frame():
+    encoder = DDPEncoder(3)
+    first = encoder.encode(np.full(3, 7, dtype=np.uint8), 1)[0]
+    encoder.encode(np.full(3, 9, dtype=np.uint8), 2)
+    assert bytes(first) == ddp_packet(0x41, 1, 0, b"\x07\x07\x07")
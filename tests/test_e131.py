@@ -0,0 +1,88 @@
+import uuid
+
+import numpy as np
+from sacn.messages.data_packet import DataPacket
+from sacn.messages.sync_packet import SyncPacket
+
+from ledfx.devices.e131 import E131Device, E131Encoder
+
+CID = uuid.UUID("b4f3c0de-0000-4000-8000-00000000000a").bytes
+
+
+def sacn_packet(universe, sequence, dmx, **kwargs):
+    return bytes(
+        DataPacket(
+            cid=tuple(CID),
+            sourceName="LedFx",
+            universe=universe,
+            dmxData=tuple(int(value) for value in dmx),
+            sequence=sequence,
+            **kwargs,
+        ).getBytes()
+    )
+
+
+def encoder(*args, **kwargs):
+    return E131Encoder(*args, "LedFx", cid=CID, **kwargs)
+
+
+def test_matches_sacn_data_packets():
+    data = (np.arange(900) % 256).astype(np.uint8)
+    e131 = encoder(range(1, 3), 510, 0, 900)
+    e131.write(data)
+    packets = [bytes(packet) for packet in e131.encode()]
+    assert packets == [
+        sacn_packet(1, 1, data[:510]),
+        sacn_packet(2, 1, data[510:]),
+    ]
+
+
+def test_channel_offset():
+    data = np.array([1, 2, 3, 4], dtype=np.uint8)
+    e131 = encoder(range(7, 9), 3, 1, 4)
+    e131.write(data)
+    packets = [bytes(packet) for packet in e131.encode()]
+    assert packets == [
+        sacn_packet(7, 1, [0, 1, 2]),
+        sacn_packet(8, 1, [3, 4]),
+    ]
+
+
+def test_sequence_priority_and_termination():
+    e131 = encoder(range(1, 2), 510, 0, 3, priority=150)
+    for _ in range(255):
+        e131.encode()
+    assert bytes(e131.encode()[0]) == sacn_packet(1, 0, [], priority=150)
+    assert bytes(e131.encode(terminated=True)[0]) == sacn_packet(
+        1, 1, [], priority=150, streamTerminated=True
+    )
+
+
+def test_matches_sacn_sync_packets():
+    e131 = encoder(range(1, 2), 510, 0, 3, sync_universe=63999)
+    e131.write(np.full(3, 9, dtype=np.uint8))
+    assert bytes(e131.encode()[0]) == sacn_packet(
+        1, 1, [9, 9, 9], sync_universe=63999
+    )
+    for sequence in (1, 2):
+        assert e131.encode_sync() == bytes(
+            SyncPacket(
+                cid=tuple(CID), syncAddr=63999, sequence=sequence
+            ).getBytes()
+        )
+
+
+def test_packets_outlive_the_next_frame():
+    e131 = encoder(range(1, 2), 510, 0, 3)
+    e131.write(np.full(3, 7, dtype=np.uint8))
+    first = e131.encode()[0]
+    e131.write(np.full(3, 9, dtype=np.uint8))
+    e131.encode()
+    assert bytes(first) == sacn_packet(1, 1, [7, 7, 7])
+
+
+def test_saved_universe_sizes_are_clamped():
+    config = E131Device.CONFIG_SCHEMA(
+        {"pixel_count": 10, "universe_size": 600}
+    )
+    assert config["universe_size"] == 512
@@ -0,0 +1,36 @@
+import struct
+
+import numpy as np
+
+from ledfx.devices.open_pixel_control import OPCEncoder, OpenPixelControl
+
+
+def set_pixel_colours(channel, data):
+    """Builds an OPC set pixel colours message, as laid out in the spec"""
+    return struct.pack(">BBH", channel, 0, len(data)) + data
+
+
+def test_encodes_set_pixel_colours():
+    data = (np.arange(600) % 256).astype(np.uint8)
+    encoder = OPCEncoder(3, 600)
+    assert encoder.encode(data) == set_pixel_colours(3, data.tobytes())
+
+
+def test_clips_float_pixels():
+    encoder = OPCEncoder(0, 6)
+    pixels = np.array([[-5, 0, 12.7], [128, 255, 300]])
+    assert encoder.encode(pixels) == set_pixel_colours(
+        0, bytes([0, 0, 12, 128, 255, 255])
+    )
+
+
+def test_messages_outlive_the_next_frame():
+    encoder = OPCEncoder(0, 3)
+    first = encoder.encode(np.full(3, 7, dtype=np.uint8))
+    encoder.encode(np.full(3, 9, dtype=np.uint8))
+    assert first == set_pixel_colours(0, b"\x07\x07\x07")
+
+
+def test_saved_configs_keep_udp():
+    config = OpenPixelControl.CONFIG_SCHEMA({"pixel_count": 10, "channel": 0})
+    assert config["protocol"] == "UDP"
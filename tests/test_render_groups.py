@@ -0,0 +1,36 @@
+def test_same_effects_share_a_group(make_virtual, create_effect):
+    first = make_virtual("first")
+    second = make_virtual("second")
+    third = make_virtual("third", pixel_count=8)
+    effects = [create_effect("#ff0000") for _ in range(3)]
+    for virtual, effect in zip((first, second, third), effects):
+        virtual.set_effect(effect)
+
+    assert effects[0]._render_group is effects[1]._render_group
+    assert effects[1]._render_group.leader is effects[0]
+    # a different pixel count renders a different frame
+    assert effects[2]._render_group is not effects[0]._render_group
+
+
+def test_frequency_range_regroups_every_effect(make_virtual, create_effect):
+    first = make_virtual("first")
+    second = make_virtual("second")
+    effect = create_effect("#ff0000")
+    first.set_effect(effect)
+
+    # second is transitioning from an effect like first's, with another
+    # like it as a layer
+    transition = create_effect("#ff0000")
+    second.set_effect(transition)
+    second.set_effect(create_effect("#0000ff"))
+    layer = create_effect("#ff0000")
+    second.add_layer(layer)
+    assert second._transition_effect is transition
+    assert transition._render_group is effect._render_group
+    assert layer._render_group is effect._render_group
+
+    second.update_config({"frequency_max": 5000})
+    for moved in (transition, layer):
+        assert moved._render_group is not effect._render_group
+        assert moved._render_group.key[3] == tuple(second.frequency_range)
+    assert effect._render_group.members == [effect]
@@ -0,0 +1,81 @@
+import time
+
+import numpy as np
+import pytest
+
+from ledfx.render_pool import RenderPool
+
+RED = [255, 0, 0]
+GREEN = [0, 255, 0]
+BLUE = [0, 0, 255]
+
+
+@pytest.fixture
+def pool(ledfx):
+    ledfx.render_pool = RenderPool(ledfx, 1)
+    yield ledfx.render_pool
+    ledfx.render_pool.stop()
+
+
+def render_until(virtual, color, timeout=10):
+    """Renders frames until the whole virtual is color"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        frame = virtual.assemble_frame()
+        if frame is not None and np.allclose(frame, color, atol=1):
+            return
+        time.sleep(1 / 60)
+    raise AssertionError(f"Virtual never rendered {color}, got {frame[0]}")
+
+
+def test_attach_and_detach(pool, make_virtual, create_effect):
+    virtual = make_virtual()
+    effect = create_effect("#ff0000")
+    virtual.set_effect(effect)
+    assert effect._shard is not None
+    assert pool.workers[0]["shards"] == 1
+    render_until(virtual, RED)
+
+    virtual.clear_frame()
+    assert effect._shard is None
+    assert pool.workers[0] == {"shards": 0, "pixel_load": 0}
+
+
+def test_transition_between_sharded_effects(pool, make_virtual, create_effect):
+    virtual = make_virtual()
+    first = create_effect("#ff0000")
+    virtual.set_effect(first)
+    render_until(virtual, RED)
+
+    second = create_effect("#0000ff")
+    virtual.set_effect(second)
+    # both effects are sharded while the transition runs
+    assert first._shard is not None and second._shard is not None
+    assert first._shard.id != second._shard.id
+    render_until(virtual, BLUE)
+    assert virtual._transition_effect is None
+    assert first._shard is None
+    assert pool.workers[0]["shards"] == 1
+
+    # the new effect's shard outlives the old one's
+    second.update_config({"background_color": "#00ff00"})
+    render_until(virtual, GREEN)
+
+
+def test_promoted_leader_is_sharded(pool, make_virtual, create_effect):
+    first = make_virtual("first")
+    second = make_virtual("second")
+    leader = create_effect("#ff0000")
+    member = create_effect("#ff0000")
+    first.set_effect(leader)
+    second.set_effect(member)
+    # the member shares the leader's frames, so isn't sharded itself
+    assert member._render_group is leader._render_group
+    assert leader._shard is not None and member._shard is None
+    render_until(second, RED)
+
+    first.clear_frame()
+    assert member._render_group.leader is member
+    assert member._shard is not None
+    member.update_config({"background_color": "#0000ff"})
+    render_until(second, BLUE)
@@ -0,0 +1,125 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from ledfx.scheduler import MAX_CATCH_UP_FRAMES, RenderBucket, RenderScheduler
+
+
+class FakeVirtual:
+    def __init__(self, virtual_id, refresh_rate, render_time=0):
+        self.id = virtual_id
+        self.refresh_rate = refresh_rate
+        self.active = True
+        self.render_time = render_time
+        self.frames = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def process_frame(self):
+        self.release.wait()
+        if self.render_time:
+            time.sleep(self.render_time)
+        self.frames += 1
+
+
+@pytest.fixture
+def scheduler():
+    def make(pacing="skip"):
+        ledfx = SimpleNamespace(
+            events=SimpleNamespace(add_listener=lambda *args: None)
+        )
+        schedulers.append(RenderScheduler(ledfx, 2, pacing))
+        return schedulers[-1]
+
+    schedulers = []
+    yield make
+    for scheduler in schedulers:
+        scheduler.stop()
+
+
+def test_bucket_deadline_does_not_drift():
+    bucket = RenderBucket(50, 0)
+    for _ in range(99):
+        assert bucket.advance(bucket.deadline + 0.001, False) == 0
+    assert bucket.deadline == pytest.approx(100 / 50)
+    assert bucket.missed == 0
+
+
+def test_bucket_skips_missed_frames():
+    # dispatched the frame due at 0.02s, the 9 due from 0.04s to 0.2s
+    # have been missed
+    bucket = RenderBucket(50, 0)
+    assert bucket.advance(0.205, False) == 0
+    assert bucket.missed == 9
+    assert bucket.deadline > 0.205
+
+
+def test_bucket_catches_up_missed_frames():
+    bucket = RenderBucket(50, 0)
+    assert bucket.advance(0.205, True) == MAX_CATCH_UP_FRAMES
+    assert bucket.missed == 9 - MAX_CATCH_UP_FRAMES
+    assert bucket.deadline > 0.205
+
+
+def test_renders_at_refresh_rate(scheduler):
+    render = scheduler()
+    virtual = FakeVirtual("strip", 50)
+    render.add(virtual)
+    time.sleep(0.5)
+    render.remove(virtual)
+
+    assert 20 <= virtual.frames <= 26
+    assert render.buckets == {}
+
+
+def test_skip_drops_frames_of_slow_virtual(scheduler):
+    render = scheduler("skip")
+    virtual = FakeVirtual("strip", 100)
+    virtual.release.clear()
+    render.add(virtual)
+    time.sleep(0.1)
+    overruns = render.stats("strip")["overruns"]
+    virtual.release.set()
+    time.sleep(0.005)
+
+    assert overruns >= 5
+    # the blocked frame, and at most the next one on time
+    assert virtual.frames <= 2
+
+
+def test_catch_up_renders_missed_frames(scheduler):
+    render = scheduler("catch_up")
+    virtual = FakeVirtual("strip", 100)
+    virtual.release.clear()
+    render.add(virtual)
+    time.sleep(0.1)
+    virtual.release.set()
+    time.sleep(0.005)
+
+    # the blocked frame, then the frames missed while it was blocked, and
+    # perhaps the next one on time
+    assert 1 + MAX_CATCH_UP_FRAMES <= virtual.frames <= 2 + MAX_CATCH_UP_FRAMES
+    assert render.stats("strip")["overruns"] >= 5
+
+
+def test_remove_drops_stats(scheduler):
+    render = scheduler()
+    virtual = FakeVirtual("strip", 50)
+    render.add(virtual)
+    assert "strip" in render.stats()["virtuals"]
+    render.remove(virtual)
+    assert "strip" not in render.stats()["virtuals"]
+    assert render.stats("strip") is None
+
+
+def test_add_and_remove_are_not_held_up_by_the_clock(scheduler):
+    render = scheduler()
+    render.add(FakeVirtual("fast", 1000))
+    virtual = FakeVirtual("strip", 50)
+    start = time.perf_counter()
+    for _ in range(100):
+        render.add(virtual)
+        render.remove(virtual)
+    assert time.perf_counter() - start < 0.5
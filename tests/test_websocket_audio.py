@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+
+import ledfx.api.websocket as websocket
+from ledfx.api.websocket import (
+    WEB_AUDIO_HEADER,
+    WEB_AUDIO_LOST_STATUS,
+    WEB_AUDIO_VERSION,
+    WebAudioStream,
+    WebsocketConnection,
+)
+
+# 1/60 of a second at 48 kHz
+BLOCKSIZE = 800
+
+
+class Recorder:
+    def __init__(self):
+        self.blocks = []
+        self.statuses = []
+
+    def __call__(self, indata, frames, time, status):
+        assert len(indata) == frames
+        self.blocks.append(np.copy(indata))
+        self.statuses.append(status)
+
+
+@pytest.fixture
+def stream(monkeypatch):
+    recorder = Recorder()
+    stream = WebAudioStream("phone", recorder, 60)
+    stream.recorder = recorder
+    stream.start()
+    monkeypatch.setattr(websocket, "ACTIVE_AUDIO_STREAM", stream)
+    return stream
+
+
+def frame(
+    samples,
+    sequence=0,
+    sample_format=0,
+    client="phone",
+    sample_rate=48000,
+    version=WEB_AUDIO_VERSION,
+):
+    client = client.encode()
+    header = WEB_AUDIO_HEADER.pack(
+        version, sample_format, len(client), sample_rate, sequence
+    )
+    return header + client + samples.tobytes()
+
+
+def receive(data):
+    WebsocketConnection(None).audio_stream_binary_handler(data)
+
+
+def test_decodes_float32_samples(stream):
+    samples = np.linspace(-1, 1, BLOCKSIZE, dtype="<f4")
+    receive(frame(samples))
+    assert stream.samplerate == 48000
+    assert len(stream.recorder.blocks) == 1
+    np.testing.assert_array_equal(stream.recorder.blocks[0], samples)
+
+
+def test_decodes_int16_samples(stream):
+    samples = np.full(BLOCKSIZE, -(2**14), dtype="<i2")
+    receive(frame(samples, sample_format=1))
+    np.testing.assert_array_equal(stream.recorder.blocks[0], -0.5)
+
+
+def test_frames_are_split_into_blocks_of_the_rate(stream):
+    samples = np.arange(BLOCKSIZE * 5 // 2, dtype="<f4")
+    receive(frame(samples[:1000], 0))
+    receive(frame(samples[1000:], 1))
+    assert [block[0] for block in stream.recorder.blocks] == [0, 800]
+    assert stream.recorder.blocks[1][-1] == 1599
+
+    # a change of rate starts a new block of the new size
+    receive(frame(np.zeros(400, dtype="<f4"), 2, sample_rate=24000))
+    assert stream.blocksize == 400
+    assert len(stream.recorder.blocks) == 3
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        WEB_AUDIO_HEADER.pack(WEB_AUDIO_VERSION, 0, 5, 48000, 0)[:-1],
+        # the client id runs past the end of the frame
+        WEB_AUDIO_HEADER.pack(WEB_AUDIO_VERSION, 0, 5, 48000, 0) + b"ph",
+        frame(np.zeros(BLOCKSIZE, dtype="<f4"), version=2),
+        frame(np.zeros(BLOCKSIZE, dtype="<f4"), sample_format=7),
+        frame(np.zeros(BLOCKSIZE, dtype="<f4"), client="laptop"),
+    ],
+)
+def test_discards_bad_frames(stream, data):
+    receive(data)
+    assert stream.recorder.blocks == []
+
+
+@pytest.mark.parametrize("sample_rate", [0, 30, 10**6])
+def test_discards_frames_of_bad_rates(stream, sample_rate):
+    receive(frame(np.zeros(BLOCKSIZE, dtype="<f4"), 0))
+    receive(frame(np.zeros(100, dtype="<f4"), 1, sample_rate=sample_rate))
+    assert len(stream.recorder.blocks) == 1
+    assert stream.samplerate == 48000
+    assert stream._sequence == 0
+
+
+def test_stream_discards_rates_below_one_sample_per_block(stream):
+    stream.receive(np.zeros(100, dtype=np.float32), 30, 0)
+    assert stream.recorder.blocks == []
+    assert stream.samplerate is None
+
+
+def test_counts_lost_and_late_frames(stream):
+    samples = np.zeros(BLOCKSIZE, dtype="<f4")
+    for sequence in (2**32 - 1, 0, 3, 2, 3, 4):
+        receive(frame(samples, sequence))
+
+    # 1 and 2 were lost, 2 and 3 then arrived late and were dropped
+    assert stream.lost_frames == 2
+    assert stream.late_frames == 2
+    assert stream.recorder.statuses == [
+        None,
+        None,
+        WEB_AUDIO_LOST_STATUS,
+        None,
+    ]